@@ -30,6 +30,7 @@ pg = st.navigation({
         st.Page("pages/dev/experiment.py", title="Experiment", icon=":material/science:"),
         st.Page("pages/dev/sanity_check.py", title="Sanity Check", icon=":material/vital_signs:"),
         st.Page("pages/dev/index_audit.py", title="Index Audit", icon=":material/inventory:"),
+        st.Page("pages/dev/migrations.py", title="Migrations", icon=":material/move_up:"),
     ],
     "": [
         st.Page("pages/config.py", title="Config", icon=":material/settings:"),
@@ -0,0 +1,234 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from models import Sidecar
+
+CATALOG_FILENAME = "catalog.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sidecars (
+    sidecar_path TEXT PRIMARY KEY,
+    data_path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    original_filename TEXT NOT NULL,
+    batch_id INTEGER,
+    serial INTEGER,
+    document_key TEXT,
+    verdict TEXT NOT NULL,
+    document_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    cost REAL NOT NULL,
+    currency TEXT NOT NULL,
+    sidecar_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sidecars_original_filename ON sidecars(original_filename);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+"""
+
+_UPSERT = """
+INSERT OR REPLACE INTO sidecars (
+    sidecar_path, data_path, mtime_ns, size, original_filename, batch_id, serial, document_key,
+    verdict, document_type, name, date, time, cost, currency, sidecar_json
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_state_cache: dict[Path, tuple[int, dict[str, tuple[Sidecar, str]]]] = {}
+_state_lock = threading.Lock()
+
+
+def is_year_month_dir(path: Path) -> bool:
+    return (
+        path.parent.name.isdigit()
+        and (path.name.isdigit() or path.name == "undated")
+    )
+
+
+def iter_year_month_dirs(output_path: Path):
+    for year_dir in output_path.iterdir():
+        if not year_dir.is_dir() or not year_dir.name.isdigit():
+            continue
+        for month_dir in year_dir.iterdir():
+            if not month_dir.is_dir() or not (month_dir.name.isdigit() or month_dir.name == "undated"):
+                continue
+            yield month_dir
+
+
+def _connect(output_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(output_path / CATALOG_FILENAME, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+@contextmanager
+def _catalog(output_path: Path):
+    conn = _connect(output_path)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _bump_version(conn: sqlite3.Connection) -> None:
+    conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+
+def _version(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+
+def _row_for(sidecar_rel: str, data_rel: str, st: os.stat_result, sidecar: Sidecar) -> tuple:
+    review = sidecar.review
+    return (
+        sidecar_rel,
+        data_rel,
+        st.st_mtime_ns,
+        st.st_size,
+        sidecar.original_filename,
+        sidecar.batch_id,
+        sidecar.serial,
+        sidecar.document_key,
+        review.verdict,
+        review.document_type,
+        review.name,
+        review.date,
+        review.time,
+        float(review.cost),
+        review.currency,
+        sidecar.model_dump_json(exclude_none=True),
+    )
+
+
+def catalog_root_for(data_file: Path) -> Path | None:
+    month_dir = data_file.parent
+    if not is_year_month_dir(month_dir):
+        return None
+    return month_dir.parent.parent
+
+
+def record_sidecar(data_file: Path, sidecar: Sidecar) -> None:
+    output_path = catalog_root_for(data_file)
+    if output_path is None:
+        return
+    sidecar_file = data_file.with_suffix(".json")
+    sidecar_rel = sidecar_file.relative_to(output_path).as_posix()
+    data_rel = data_file.relative_to(output_path).as_posix() if data_file.exists() else ""
+    with _catalog(output_path) as conn:
+        conn.execute(_UPSERT, _row_for(sidecar_rel, data_rel, sidecar_file.stat(), sidecar))
+        _bump_version(conn)
+
+
+def forget_sidecar(data_file: Path) -> None:
+    output_path = catalog_root_for(data_file)
+    if output_path is None:
+        return
+    sidecar_rel = data_file.with_suffix(".json").relative_to(output_path).as_posix()
+    with _catalog(output_path) as conn:
+        if conn.execute("DELETE FROM sidecars WHERE sidecar_path = ?", (sidecar_rel,)).rowcount:
+            _bump_version(conn)
+
+
+def record_move(output_path: Path, old_data_rel: str, new_data_rel: str) -> None:
+    old_sidecar_rel = Path(old_data_rel).with_suffix(".json").as_posix()
+    new_sidecar_rel = Path(new_data_rel).with_suffix(".json").as_posix()
+    new_sidecar = output_path / new_sidecar_rel
+    with _catalog(output_path) as conn:
+        moved = conn.execute(
+            "UPDATE sidecars SET sidecar_path = ?, data_path = ?, mtime_ns = ?, size = ? WHERE sidecar_path = ?",
+            (
+                new_sidecar_rel,
+                new_data_rel if (output_path / new_data_rel).exists() else "",
+                new_sidecar.stat().st_mtime_ns if new_sidecar.exists() else 0,
+                new_sidecar.stat().st_size if new_sidecar.exists() else -1,
+                old_sidecar_rel,
+            ),
+        ).rowcount
+        if moved:
+            _bump_version(conn)
+
+
+def reconcile_catalog(output_path: Path) -> int:
+    with _catalog(output_path) as conn:
+        known = {
+            sidecar_rel: (mtime_ns, size, data_rel)
+            for sidecar_rel, mtime_ns, size, data_rel in conn.execute(
+                "SELECT sidecar_path, mtime_ns, size, data_path FROM sidecars"
+            )
+        }
+        seen: set[str] = set()
+        upserts: list[tuple] = []
+        relinks: list[tuple[str, str]] = []
+        for month_dir in iter_year_month_dirs(output_path):
+            folder = month_dir.relative_to(output_path).as_posix()
+            sidecar_entries: list[os.DirEntry] = []
+            stem_to_datafile: dict[str, str] = {}
+            with os.scandir(month_dir) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext == ".json":
+                        sidecar_entries.append(entry)
+                    else:
+                        stem_to_datafile[stem] = f"{folder}/{entry.name}"
+            for entry in sidecar_entries:
+                sidecar_rel = f"{folder}/{entry.name}"
+                seen.add(sidecar_rel)
+                data_rel = stem_to_datafile.get(os.path.splitext(entry.name)[0], "")
+                st = entry.stat()
+                prior = known.get(sidecar_rel)
+                if prior is None or prior[0] != st.st_mtime_ns or prior[1] != st.st_size:
+                    sidecar = Sidecar.model_validate_json(Path(entry.path).read_text(encoding="utf-8"))
+                    upserts.append(_row_for(sidecar_rel, data_rel, st, sidecar))
+                elif prior[2] != data_rel:
+                    relinks.append((data_rel, sidecar_rel))
+        removed = [(rel,) for rel in known if rel not in seen]
+        changes = len(upserts) + len(relinks) + len(removed)
+        if changes:
+            conn.executemany(_UPSERT, upserts)
+            conn.executemany("UPDATE sidecars SET data_path = ? WHERE sidecar_path = ?", relinks)
+            conn.executemany("DELETE FROM sidecars WHERE sidecar_path = ?", removed)
+            _bump_version(conn)
+    return changes
+
+
+def catalog_original_filenames(output_path: Path) -> set[str]:
+    reconcile_catalog(output_path)
+    with _catalog(output_path) as conn:
+        return {fn for (fn,) in conn.execute("SELECT original_filename FROM sidecars")}
+
+
+def catalog_version(output_path: Path) -> int:
+    reconcile_catalog(output_path)
+    with _catalog(output_path) as conn:
+        return _version(conn)
+
+
+def load_catalog_state(output_path: Path) -> dict[str, tuple[Sidecar, str]]:
+    reconcile_catalog(output_path)
+    key = output_path.resolve()
+    with _catalog(output_path) as conn:
+        version = _version(conn)
+        with _state_lock:
+            cached = _state_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return dict(cached[1])
+        rows = conn.execute(
+            "SELECT sidecar_json, data_path FROM sidecars ORDER BY sidecar_path"
+        ).fetchall()
+    state = {}
+    for sidecar_json, data_rel in rows:
+        sidecar = Sidecar.model_validate_json(sidecar_json)
+        state[sidecar.original_filename] = (sidecar, data_rel)
+    with _state_lock:
+        _state_cache[key] = (version, state)
+    return dict(state)
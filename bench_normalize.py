@@ -0,0 +1,61 @@
+import argparse
+import random
+import string
+import time
+from pathlib import Path
+
+import numpy as np
+
+from name_similarity import levenshtein_similarity
+from normalize_engines import StringEngine
+
+
+def python_dist_matrix(all_names: list[str]) -> np.ndarray:
+    n = len(all_names)
+    dist_matrix = np.zeros((n, n), dtype=np.float64)
+    for i in range(n):
+        for j in range(i + 1, n):
+            d = 1.0 - levenshtein_similarity(all_names[i], all_names[j])
+            dist_matrix[i, j] = d
+            dist_matrix[j, i] = d
+    return dist_matrix
+
+
+def synthetic_names(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    bases = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 14))) for _ in range(max(1, n // 4))]
+    names: set[str] = set()
+    while len(names) < n:
+        base = list(rng.choice(bases))
+        for _ in range(rng.randint(0, 2)):
+            base[rng.randrange(len(base))] = rng.choice(string.ascii_lowercase)
+        names.add("".join(base) + rng.choice(["", " store", " #" + str(rng.randint(1, 99))]))
+    return sorted(names)
+
+
+def _timed(fn) -> tuple[float, np.ndarray]:
+    start = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - start, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare normalize string distance implementations.")
+    parser.add_argument("--sizes", default="250,1000,2000", help="comma-separated name counts")
+    parser.add_argument("--python-max", type=int, default=2000, help="skip the pure Python loop above this size")
+    args = parser.parse_args()
+    engine = StringEngine()
+    for n in (int(x) for x in args.sizes.split(",")):
+        names = synthetic_names(n)
+        fast_s, fast = _timed(lambda: engine._dist_matrix(Path("."), names))
+        cut_s, _ = _timed(lambda: engine._dist_matrix(Path("."), names, 0.2))
+        line = f"n={n:>6}  cdist {fast_s:8.3f}s  cdist+cutoff {cut_s:8.3f}s"
+        if n <= args.python_max:
+            slow_s, slow = _timed(lambda: python_dist_matrix(names))
+            drift = float(np.abs(slow - fast).max())
+            line += f"  python loop {slow_s:8.3f}s  speedup {slow_s / fast_s:6.1f}x  max diff {drift:.2e}"
+        print(line, flush=True)
+
+
+if __name__ == "__main__":
+    main()
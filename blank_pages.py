@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from data import append_ocr_result, build_document_index, load_decisions, save_decisions
+from models import DocumentIndex, DocumentKey, OcrResult, ReviewDecision
+
+BLANK_SAMPLE_SIZE = 256
+BLANK_MARGIN = 0.04
+INK_DELTA = 48
+BLANK_INK_RATIO = 0.002
+BLANK_WORKERS = os.cpu_count() or 1
+BLANK_INLINE_LIMIT = 16
+
+
+def ink_ratio(path: Path) -> float:
+    with Image.open(path) as img:
+        img.draft("L", (BLANK_SAMPLE_SIZE, BLANK_SAMPLE_SIZE))
+        gray = ImageOps.exif_transpose(img).convert("L")
+        gray.thumbnail((BLANK_SAMPLE_SIZE, BLANK_SAMPLE_SIZE))
+    pixels = np.asarray(gray, dtype=np.int16)
+    h, w = pixels.shape
+    dy, dx = int(h * BLANK_MARGIN), int(w * BLANK_MARGIN)
+    inner = pixels[dy:h - dy, dx:w - dx]
+    if not inner.size:
+        return 0.0
+    paper = np.median(inner)
+    return float(np.mean(np.abs(inner - paper) > INK_DELTA))
+
+
+def _ink_ratio_or_none(path: Path) -> float | None:
+    try:
+        return ink_ratio(path)
+    except Exception:
+        return None
+
+
+def ink_ratios(paths: list[Path]) -> dict[Path, float | None]:
+    if len(paths) <= BLANK_INLINE_LIMIT:
+        return {p: _ink_ratio_or_none(p) for p in paths}
+    workers = min(BLANK_WORKERS, len(paths))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        ratios = pool.map(_ink_ratio_or_none, paths, chunksize=max(1, len(paths) // (workers * 4)))
+        return dict(zip(paths, ratios))
+
+
+def blank_keys(items: list[tuple[str, Path]], threshold: float = BLANK_INK_RATIO) -> set[str]:
+    ratios = ink_ratios([path for _, path in items])
+    return {key for key, path in items if ratios[path] is not None and ratios[path] < threshold}
+
+
+def split_blank_pages(index: DocumentIndex, blank: set[str]) -> tuple[list[DocumentKey], list[str]]:
+    blank_docs: list[DocumentKey] = []
+    blank_pages: list[str] = []
+    for doc_key in dict.fromkeys(index.key_to_doc_key(k) for k in sorted(blank)):
+        keys = index.keys_for_doc(doc_key)
+        if all(k in blank for k in keys):
+            blank_docs.append(doc_key)
+        else:
+            blank_pages.extend(k for k in keys if k in blank)
+    return blank_docs, blank_pages
+
+
+def skip_blank_pages(
+    output_path: Path, to_process: list[tuple[str, Path]], indexed_keys: set[str]
+) -> tuple[list[tuple[str, Path]], dict[str, OcrResult], list[DocumentKey]]:
+    blank = blank_keys(to_process)
+    if not blank:
+        return to_process, {}, []
+    blank_docs, _ = split_blank_pages(build_document_index(output_path, indexed_keys), blank)
+    decisions = load_decisions(output_path)
+    tossed = [doc_key for doc_key in blank_docs if str(doc_key) not in decisions]
+    if tossed:
+        for doc_key in tossed:
+            decisions[str(doc_key)] = ReviewDecision(
+                verdict="tossed",
+                document_type="corrupted",
+                name="",
+                date="",
+                time="",
+                cost=0.0,
+                currency="",
+                comment="blank page",
+            )
+        save_decisions(output_path, decisions)
+    empty = {key: OcrResult(markdown="") for key in sorted(blank)}
+    for key, result in empty.items():
+        append_ocr_result(output_path, key, result)
+    return [(k, p) for k, p in to_process if k not in blank], empty, tossed
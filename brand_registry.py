@@ -80,61 +80,91 @@ def brand_registry_mtime() -> float:
     return path.stat().st_mtime if path is not None and path.exists() else 0.0
 
 
+class _TrieNode:
+    __slots__ = ("children", "best")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.best: tuple[int, int, int] | None = None
+
+
+class BrandMatcher:
+    def __init__(self, directory: BrandDirectory):
+        self._brands = directory.brands
+        self._root = _TrieNode()
+        self._prefixes: dict[tuple[int, int], str] = {}
+        for bi, brand in enumerate(directory.brands):
+            for pi, prefix in enumerate(brand.prefixes):
+                p = prefix.strip()
+                if not p:
+                    continue
+                self._prefixes[(bi, pi)] = p
+                node = self._root
+                for ch in p.casefold():
+                    node = node.children.setdefault(ch, _TrieNode())
+                rank = (-len(p), bi, pi)
+                if node.best is None or rank < node.best:
+                    node.best = rank
+
+    def resolve(self, merchant_name: str) -> ResolvedBrand:
+        if not merchant_name or not self._prefixes:
+            return ResolvedBrand()
+        node = self._root
+        best: tuple[int, int, int] | None = None
+        for ch in merchant_name.casefold():
+            node = node.children.get(ch)
+            if node is None:
+                break
+            if node.best is not None and (best is None or node.best < best):
+                best = node.best
+        if best is None:
+            return ResolvedBrand()
+        _, bi, pi = best
+        brand = self._brands[bi]
+        prefix = self._prefixes[(bi, pi)]
+        return ResolvedBrand(
+            brand_id=brand.id,
+            brand_label=brand.label,
+            matched_prefix=prefix,
+            brand_location=merchant_name[len(prefix) :].strip(),
+        )
+
+
+_matcher_cache: dict[Path | None, tuple[float, BrandMatcher]] = {}
+
+
+def load_brand_matcher() -> BrandMatcher:
+    key = brand_directory_path()
+    mtime = brand_registry_mtime()
+    cached = _matcher_cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    matcher = BrandMatcher(load_brand_directory())
+    _matcher_cache[key] = (mtime, matcher)
+    return matcher
+
+
 def resolve_brand(merchant_name: str, directory: BrandDirectory) -> ResolvedBrand:
     if not merchant_name or not directory.brands:
         return ResolvedBrand()
-    name_cf = merchant_name.casefold()
-    candidates: list[tuple[int, int, int, BrandEntry, str]] = []
-    for bi, brand in enumerate(directory.brands):
-        for pi, prefix in enumerate(brand.prefixes):
-            p = prefix.strip()
-            if not p:
-                continue
-            if name_cf.startswith(p.casefold()):
-                candidates.append((len(p), bi, pi, brand, p))
-    if not candidates:
-        return ResolvedBrand()
-    candidates.sort(key=lambda x: (-x[0], x[1], x[2]))
-    _, _, _, best_brand, best_prefix = candidates[0]
-    remainder = merchant_name[len(best_prefix) :].strip()
-    return ResolvedBrand(
-        brand_id=best_brand.id,
-        brand_label=best_brand.label,
-        matched_prefix=best_prefix,
-        brand_location=remainder,
-    )
+    return BrandMatcher(directory).resolve(merchant_name)
 
 
-def enrich_receipt_brand_columns(
-    df: pd.DataFrame, directory: BrandDirectory
-) -> pd.DataFrame:
+def enrich_receipt_brand_columns(df: pd.DataFrame, matcher: BrandMatcher) -> pd.DataFrame:
     if df.empty or "document_type" not in df.columns:
         return df
-    brand_ids: list[str | None] = []
-    brand_labels: list[str | None] = []
-    brand_locs: list[str] = []
-    groups: list[str] = []
-    for _, row in df.iterrows():
-        if row.get("document_type") != "receipt":
-            brand_ids.append(None)
-            brand_labels.append(None)
-            brand_locs.append("")
-            groups.append("")
-            continue
-        name = str(row.get("name") or "")
-        rb = resolve_brand(name, directory)
-        brand_ids.append(rb.brand_id)
-        brand_labels.append(rb.brand_label)
-        brand_locs.append(rb.brand_location)
-        if rb.brand_id and rb.brand_label:
-            groups.append(rb.brand_label)
-        else:
-            groups.append(name)
+    is_receipt = df["document_type"] == "receipt"
+    names = df["name"].fillna("").astype(str) if "name" in df.columns else pd.Series("", index=df.index)
+    resolved = {name: matcher.resolve(name) for name in names[is_receipt].unique()}
+    brand_ids = names.map({name: rb.brand_id for name, rb in resolved.items()})
+    brand_labels = names.map({name: rb.brand_label for name, rb in resolved.items()})
+    brand_locs = names.map({name: rb.brand_location for name, rb in resolved.items()})
+    matched = is_receipt & brand_ids.notna() & brand_labels.notna()
     out = df.copy()
-    out["brand_id"] = brand_ids
-    out["brand_label"] = brand_labels
-    out["brand_location"] = brand_locs
-    out["merchant_group"] = groups
+    out["brand_id"] = brand_ids.where(is_receipt, None).astype(object)
+    out["brand_label"] = brand_labels.where(is_receipt, None).astype(object)
+    out["brand_location"] = brand_locs.where(is_receipt, "")
+    out["merchant_group"] = brand_labels.where(matched, names.where(is_receipt, ""))
     return out
 
 
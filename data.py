@@ -1,8 +1,9 @@
 import json
+from datetime import datetime
 from pathlib import Path
 
-import numpy as np
 
+from archive_catalog import catalog_original_filenames, forget_sidecar, load_catalog_state, record_sidecar
 from models import (
     DocumentExtraction,
     DocumentExtractionAdapter,
@@ -13,9 +14,14 @@ from models import (
     OtherResult,
     ReceiptResult,
     ReviewDecision,
+    ReviewDecisionsAdapter,
     Sidecar,
+    SmartMatchEntry,
+    SmartMatchEntriesAdapter,
     SmartMatchHistoryRow,
 )
+from record_log import RecordLog, delete_record_log, open_record_log
+from working_set import cached, file_signature, forget, stored, updated
 
 
 def sidecar_path_for(file_path: Path) -> Path:
@@ -33,58 +39,147 @@ def write_sidecar(file_path: Path, entry: Sidecar):
     sidecar_path_for(file_path).write_text(
         entry.model_dump_json(indent=2, exclude_none=True), encoding="utf-8"
     )
+    record_sidecar(file_path, entry)
 
 
 def delete_sidecar(file_path: Path):
     sidecar_path_for(file_path).unlink(missing_ok=True)
+    forget_sidecar(file_path)
 
 
 
-def load_ocr_results(output_path: Path) -> dict[str, OcrResult]:
-    results_file = output_path / "ocr.json"
-    if not results_file.exists():
-        return {}
-    data = json.loads(results_file.read_text(encoding="utf-8"))
+OCR_LOG = "ocr.log"
+EXTRACTIONS_LOG = "extractions.log"
+
+
+LEGACY_OCR_FILE = "ocr.json"
+LEGACY_EXTRACTIONS_FILE = "extractions.json"
+MIGRATED_SUFFIX = ".migrated"
+
+
+def _decode_legacy_ocr(data: dict) -> dict[str, OcrResult]:
     if "results" in data:
         return {}
     return {k: OcrResult.model_validate(v) for k, v in data.items()}
 
 
-def save_ocr_results(output_path: Path, results: dict[str, OcrResult]):
-    d = {k: v.model_dump() for k, v in results.items()}
-    (output_path / "ocr.json").write_text(
-        json.dumps(d, indent=2, ensure_ascii=False), encoding="utf-8"
+def _decode_legacy_extractions(data: dict) -> dict[str, DocumentExtraction]:
+    return {k: DocumentExtractionAdapter.validate_python(v) for k, v in data.items()}
+
+
+def _ocr_log(output_path: Path) -> RecordLog:
+    return open_record_log(output_path / OCR_LOG)
+
+
+def _extractions_log(output_path: Path) -> RecordLog:
+    return open_record_log(output_path / EXTRACTIONS_LOG)
+
+
+def _migrate_json_to_log(kind: str, log: RecordLog, legacy: Path, decode_legacy) -> int:
+    records = decode_legacy(json.loads(legacy.read_text(encoding="utf-8")))
+    missing = {k: v.model_dump_json().encode("utf-8") for k, v in records.items() if k not in log}
+    log.put_many(missing)
+    forget(kind, log.root)
+    legacy.rename(legacy.with_name(legacy.name + MIGRATED_SUFFIX))
+    return len(missing)
+
+
+def migrate_legacy_ocr_results(output_path: Path) -> int:
+    return _migrate_json_to_log("ocr", _ocr_log(output_path), output_path / LEGACY_OCR_FILE, _decode_legacy_ocr)
+
+
+def migrate_legacy_extractions(output_path: Path) -> int:
+    return _migrate_json_to_log(
+        "extractions",
+        _extractions_log(output_path),
+        output_path / LEGACY_EXTRACTIONS_FILE,
+        _decode_legacy_extractions,
     )
 
 
+def _put(records: dict, key: str, value) -> dict:
+    records[key] = value
+    return records
+
+
+def load_ocr_results(output_path: Path) -> dict[str, OcrResult]:
+    if not output_path.exists():
+        return {}
+    log = _ocr_log(output_path)
+    return cached(
+        "ocr", log.root, lambda: {k: OcrResult.model_validate_json(v) for k, v in log.read_all().items()}, copy=dict
+    )
+
+
+def load_ocr_result(output_path: Path, key: str) -> OcrResult | None:
+    raw = _ocr_log(output_path).get(key)
+    return OcrResult.model_validate_json(raw) if raw is not None else None
+
+
+def save_ocr_results(output_path: Path, results: dict[str, OcrResult]):
+    log = _ocr_log(output_path)
+    log.replace_all({k: v.model_dump_json().encode("utf-8") for k, v in results.items()})
+    stored("ocr", log.root, dict(results))
+
+
+def append_ocr_result(output_path: Path, key: str, result: OcrResult):
+    log = _ocr_log(output_path)
+    before = file_signature(log.root)
+    log.put(key, result.model_dump_json().encode("utf-8"))
+    updated("ocr", log.root, before, lambda results: _put(results, key, result))
+
+
+def clear_ocr_results(output_path: Path):
+    forget("ocr", output_path / OCR_LOG)
+    delete_record_log(output_path / OCR_LOG)
+
+
 def load_extractions(output_path: Path) -> dict[str, DocumentExtraction]:
-    ext_file = output_path / "extractions.json"
-    if not ext_file.exists():
+    if not output_path.exists():
         return {}
-    data = json.loads(ext_file.read_text(encoding="utf-8"))
-    return {k: DocumentExtractionAdapter.validate_python(v) for k, v in data.items()}
+    log = _extractions_log(output_path)
+    return cached(
+        "extractions",
+        log.root,
+        lambda: {k: DocumentExtractionAdapter.validate_json(v) for k, v in log.read_all().items()},
+        copy=dict,
+    )
+
+
+def load_extraction(output_path: Path, doc_key: str) -> DocumentExtraction | None:
+    raw = _extractions_log(output_path).get(doc_key)
+    return DocumentExtractionAdapter.validate_json(raw) if raw is not None else None
 
 
 def save_extractions(output_path: Path, extractions: dict[str, DocumentExtraction]):
-    d = {k: v.model_dump() for k, v in extractions.items()}
-    (output_path / "extractions.json").write_text(
-        json.dumps(d, indent=2, ensure_ascii=False), encoding="utf-8"
-    )
+    log = _extractions_log(output_path)
+    log.replace_all({k: v.model_dump_json().encode("utf-8") for k, v in extractions.items()})
+    stored("extractions", log.root, dict(extractions))
+
+
+def append_extraction(output_path: Path, doc_key: str, extraction: DocumentExtraction):
+    log = _extractions_log(output_path)
+    before = file_signature(log.root)
+    log.put(doc_key, extraction.model_dump_json().encode("utf-8"))
+    updated("extractions", log.root, before, lambda extractions: _put(extractions, doc_key, extraction))
+
+
+def clear_extractions(output_path: Path):
+    forget("extractions", output_path / EXTRACTIONS_LOG)
+    delete_record_log(output_path / EXTRACTIONS_LOG)
 
 
 def load_decisions(output_path: Path) -> dict[str, ReviewDecision]:
     dec_file = output_path / "decisions.json"
     if not dec_file.exists():
         return {}
-    raw = json.loads(dec_file.read_text(encoding="utf-8"))
-    return {k: ReviewDecision(**v) for k, v in raw.items()}
+    return cached("decisions", dec_file, lambda: ReviewDecisionsAdapter.validate_json(dec_file.read_bytes()), copy=dict)
 
 
 def save_decisions(output_path: Path, decisions: dict[str, ReviewDecision]):
-    d = {k: v.model_dump() for k, v in decisions.items()}
-    (output_path / "decisions.json").write_text(
-        json.dumps(d, indent=2, ensure_ascii=False), encoding="utf-8"
-    )
+    dec_file = output_path / "decisions.json"
+    dec_file.write_bytes(ReviewDecisionsAdapter.dump_json(decisions, indent=2))
+    stored("decisions", dec_file, dict(decisions))
 
 
 def load_name_cache(output_path: Path) -> dict[str, dict]:
@@ -100,64 +195,165 @@ def save_name_cache(output_path: Path, cache: dict[str, dict]):
     )
 
 
-def load_smart_match_cache(output_path: Path) -> dict[str, dict]:
-    cache_file = output_path / "smart_match_cache.json"
-    if not cache_file.exists():
-        return {}
-    return json.loads(cache_file.read_text(encoding="utf-8"))
+SMART_MATCH_HISTORY = "smart_match_history.json"
+SMART_MATCH_INDEX = "smart_match_index"
+LEGACY_SMART_MATCH_FILE = "smart_match_cache.json"
 
 
-def save_smart_match_cache(output_path: Path, cache: dict[str, dict]):
-    (output_path / "smart_match_cache.json").write_text(
-        json.dumps(cache, indent=2, ensure_ascii=False), encoding="utf-8"
-    )
+def smart_match_row(extraction: DocumentExtraction | None, confirmed: str) -> SmartMatchHistoryRow:
+    if isinstance(extraction, ReceiptResult):
+        return SmartMatchHistoryRow(extracted=extraction.name, extracted_phone=extraction.phone, confirmed=confirmed)
+    if isinstance(extraction, OtherResult):
+        return SmartMatchHistoryRow(extracted=extraction.title, extracted_phone="", confirmed=confirmed)
+    return SmartMatchHistoryRow(extracted="", extracted_phone="", confirmed=confirmed)
 
 
-def build_smart_match_history(
+def _smart_match_key(row: SmartMatchHistoryRow | SmartMatchEntry) -> tuple[str, str, str]:
+    return row.extracted, row.extracted_phone, row.confirmed
+
+
+def _smart_match_history_row(key: tuple[str, str, str]) -> SmartMatchHistoryRow:
+    extracted, extracted_phone, confirmed = key
+    return SmartMatchHistoryRow(extracted=extracted, extracted_phone=extracted_phone, confirmed=confirmed)
+
+
+def smart_match_entry_rows(entries: list[SmartMatchEntry]) -> list[SmartMatchHistoryRow]:
+    return [_smart_match_history_row(_smart_match_key(e)) for e in entries]
+
+
+def _fold_legacy_smart_match_cache(legacy: Path) -> list[SmartMatchEntry]:
+    last_seen = datetime.fromtimestamp(legacy.stat().st_mtime).isoformat(timespec="seconds")
+    entries: dict[tuple[str, str, str], SmartMatchEntry] = {}
+    for entry in json.loads(legacy.read_text(encoding="utf-8")).values():
+        row = SmartMatchHistoryRow(
+            extracted=entry.get("extracted", ""),
+            extracted_phone=entry.get("extracted_phone", ""),
+            confirmed=entry.get("confirmed", ""),
+        )
+        if not row.confirmed:
+            continue
+        key = _smart_match_key(row)
+        if key in entries:
+            entries[key].count += 1
+        else:
+            entries[key] = SmartMatchEntry(**row.model_dump(), last_seen=last_seen)
+    return list(entries.values())
+
+
+def migrate_legacy_smart_match_cache(output_path: Path) -> int:
+    legacy = output_path / LEGACY_SMART_MATCH_FILE
+    entries = {_smart_match_key(e): e for e in load_smart_match_entries(output_path)}
+    previous = set(entries)
+    folded = _fold_legacy_smart_match_cache(legacy)
+    for entry in folded:
+        merged = entries.get(_smart_match_key(entry))
+        if merged is None:
+            entries[_smart_match_key(entry)] = entry
+        else:
+            merged.count += entry.count
+            merged.last_seen = max(merged.last_seen, entry.last_seen)
+    _write_smart_match_entries(output_path, previous, list(entries.values()))
+    legacy.rename(legacy.with_name(legacy.name + MIGRATED_SUFFIX))
+    return sum(e.count for e in folded)
+
+
+def _copy_entries(entries: list[SmartMatchEntry]) -> list[SmartMatchEntry]:
+    return [e.model_copy() for e in entries]
+
+
+def load_smart_match_entries(output_path: Path) -> list[SmartMatchEntry]:
+    f = output_path / SMART_MATCH_HISTORY
+    if not f.exists():
+        return []
+    return cached("smart_match", f, lambda: SmartMatchEntriesAdapter.validate_json(f.read_bytes()), copy=_copy_entries)
+
+
+def save_smart_match_entries(output_path: Path, entries: list[SmartMatchEntry]):
+    entries = sorted(entries, key=lambda e: (e.confirmed, e.extracted, e.extracted_phone))
+    f = output_path / SMART_MATCH_HISTORY
+    f.write_bytes(SmartMatchEntriesAdapter.dump_json(entries, indent=2))
+    stored("smart_match", f, _copy_entries(entries))
+
+
+def _write_smart_match_entries(
+    output_path: Path, previous: set[tuple[str, str, str]], entries: list[SmartMatchEntry]
+):
+    f = output_path / SMART_MATCH_HISTORY
+    before = file_signature(f)
+    save_smart_match_entries(output_path, entries)
+    current = {_smart_match_key(e) for e in entries}
+    added = [_smart_match_history_row(k) for k in current - previous]
+    removed = [_smart_match_history_row(k) for k in previous - current]
+    updated(SMART_MATCH_INDEX, f, before, lambda index: index.apply(added, removed))
+
+
+def update_smart_match_entries(
+    output_path: Path,
+    added: list[SmartMatchHistoryRow],
+    removed: list[SmartMatchHistoryRow] | None = None,
+):
+    entries = {_smart_match_key(e): e for e in load_smart_match_entries(output_path)}
+    previous = set(entries)
+    for row in removed or []:
+        entry = entries.get(_smart_match_key(row))
+        if entry is None:
+            continue
+        entry.count -= 1
+        if entry.count <= 0:
+            del entries[_smart_match_key(row)]
+    now = datetime.now().isoformat(timespec="seconds")
+    for row in added:
+        if not row.confirmed:
+            continue
+        entry = entries.get(_smart_match_key(row))
+        if entry is None:
+            entries[_smart_match_key(row)] = SmartMatchEntry(**row.model_dump(), last_seen=now)
+        else:
+            entry.count += 1
+            entry.last_seen = now
+    _write_smart_match_entries(output_path, previous, list(entries.values()))
+
+
+def rename_smart_match_confirmed(output_path: Path, normalizations: dict[str, str]):
+    entries: dict[tuple[str, str, str], SmartMatchEntry] = {}
+    changed = False
+    loaded = load_smart_match_entries(output_path)
+    for entry in loaded:
+        confirmed = normalizations.get(entry.confirmed, entry.confirmed)
+        changed |= confirmed != entry.confirmed
+        key = (entry.extracted, entry.extracted_phone, confirmed)
+        merged = entries.get(key)
+        if merged is None:
+            entries[key] = entry.model_copy(update={"confirmed": confirmed})
+        else:
+            merged.count += entry.count
+            merged.last_seen = max(merged.last_seen, entry.last_seen)
+    if changed:
+        _write_smart_match_entries(output_path, {_smart_match_key(e) for e in loaded}, list(entries.values()))
+
+
+def decision_smart_match_rows(
     extractions: dict[str, DocumentExtraction],
     decisions: dict[str, ReviewDecision],
-    smart_cache: dict[str, dict],
 ) -> list[SmartMatchHistoryRow]:
-    rows: list[SmartMatchHistoryRow] = []
+    rows: dict[tuple[str, str, str], SmartMatchHistoryRow] = {}
     for doc_key, decision in decisions.items():
-        if decision.verdict != "accepted" or doc_key not in extractions:
-            continue
-        ext = extractions[doc_key]
-        if isinstance(ext, ReceiptResult):
-            rows.append(
-                SmartMatchHistoryRow(
-                    extracted=ext.name,
-                    extracted_phone=ext.phone,
-                    confirmed=decision.name,
-                )
-            )
-        elif isinstance(ext, OtherResult):
-            rows.append(
-                SmartMatchHistoryRow(
-                    extracted=ext.title,
-                    extracted_phone="",
-                    confirmed=decision.name,
-                )
-            )
-    for doc_key, entry in smart_cache.items():
-        if (
-            doc_key in extractions
-            and doc_key in decisions
-            and decisions[doc_key].verdict == "accepted"
-        ):
+        if decision.verdict != "accepted" or not isinstance(extractions.get(doc_key), (ReceiptResult, OtherResult)):
             continue
-        ex = entry.get("extracted", "")
-        conf = entry.get("confirmed", "")
-        if not conf:
-            continue
-        rows.append(
-            SmartMatchHistoryRow(
-                extracted=ex,
-                extracted_phone=entry.get("extracted_phone", ""),
-                confirmed=conf,
-            )
-        )
-    return rows
+        row = smart_match_row(extractions[doc_key], decision.name)
+        rows.setdefault(_smart_match_key(row), row)
+    return list(rows.values())
+
+
+def build_smart_match_history(
+    extractions: dict[str, DocumentExtraction],
+    decisions: dict[str, ReviewDecision],
+    smart_entries: list[SmartMatchEntry],
+) -> list[SmartMatchHistoryRow]:
+    rows = {_smart_match_key(row): row for row in decision_smart_match_rows(extractions, decisions)}
+    for entry in smart_entries:
+        rows.setdefault(_smart_match_key(entry), _smart_match_history_row(_smart_match_key(entry)))
+    return list(rows.values())
 
 
 def load_name_normalizations(output_path: Path) -> dict[str, str]:
@@ -188,17 +384,29 @@ def save_distinct_pairs(output_path: Path, pairs: set[frozenset[str]]):
     )
 
 
+def _deep_copy_groups(doc_groups: DocumentGroups) -> DocumentGroups:
+    return doc_groups.model_copy(deep=True)
+
+
 def load_document_groups(output_path: Path) -> DocumentGroups:
     f = output_path / "documents.json"
     if not f.exists():
         return DocumentGroups(groups=[])
-    return DocumentGroups.model_validate_json(f.read_text(encoding="utf-8"))
+    return cached(
+        "document_groups",
+        f,
+        lambda: DocumentGroups.model_validate_json(f.read_text(encoding="utf-8")),
+        copy=_deep_copy_groups,
+    )
 
 
 def save_document_groups(output_path: Path, doc_groups: DocumentGroups):
-    (output_path / "documents.json").write_text(
-        doc_groups.model_dump_json(indent=2), encoding="utf-8"
-    )
+    f = output_path / "documents.json"
+    f.write_text(doc_groups.model_dump_json(indent=2), encoding="utf-8")
+    stored("document_groups", f, doc_groups.model_copy(deep=True))
+
+
+DOCUMENT_INDEX_MEMO = 8
 
 
 def build_document_index(
@@ -206,8 +414,16 @@ def build_document_index(
     indexed_keys: set[str],
     ocr_keys: set[str] | None = None,
 ) -> DocumentIndex:
-    raw = load_document_groups(output_path).groups
-    return DocumentIndex.from_raw_groups(raw, indexed_keys, ocr_keys)
+    built: dict[tuple, DocumentIndex] = cached("document_index", output_path / "documents.json", dict)
+    memo_key = (frozenset(indexed_keys), frozenset(ocr_keys) if ocr_keys is not None else None)
+    index = built.get(memo_key)
+    if index is None:
+        raw = load_document_groups(output_path).groups
+        index = DocumentIndex.from_raw_groups(raw, indexed_keys, ocr_keys)
+        if len(built) >= DOCUMENT_INDEX_MEMO:
+            built.clear()
+        built[memo_key] = index
+    return index
 
 
 def _batch_id_from_key(key: str) -> int | None:
@@ -236,16 +452,6 @@ def clear_extractions_decisions_for_batch(output_path: Path, batch_id: int):
         save_decisions(output_path, decisions)
 
 
-def _iter_year_month_dirs(output_path: Path):
-    for year_dir in output_path.iterdir():
-        if not year_dir.is_dir() or not year_dir.name.isdigit():
-            continue
-        for month_dir in year_dir.iterdir():
-            if not month_dir.is_dir() or not (month_dir.name.isdigit() or month_dir.name == "undated"):
-                continue
-            yield month_dir
-
-
 def scan_organized_filenames(output_path: Path) -> set[str]:
     organized: set[str] = set()
     tossed_dir = output_path / "tossed"
@@ -254,10 +460,7 @@ def scan_organized_filenames(output_path: Path) -> set[str]:
     marked_dir = output_path / "marked"
     if marked_dir.exists():
         organized.update(p.name for p in marked_dir.iterdir() if p.is_file() and p.suffix.lower() != ".json")
-    for month_dir in _iter_year_month_dirs(output_path):
-        for sidecar_path in month_dir.glob("*.json"):
-            sidecar = Sidecar.model_validate_json(sidecar_path.read_text(encoding="utf-8"))
-            organized.add(sidecar.original_filename)
+    organized.update(catalog_original_filenames(output_path))
     return organized
 
 
@@ -268,38 +471,4 @@ def load_reorganized_state(
     tossed_dir = output_path / "tossed"
     if tossed_dir.exists():
         tossed = {p.name for p in tossed_dir.iterdir() if p.is_file() and p.suffix.lower() != ".json"}
-
-    accepted_metadata: dict[str, tuple[Sidecar, str]] = {}
-    for month_dir in _iter_year_month_dirs(output_path):
-        sidecar_paths: list[Path] = []
-        stem_to_datafile: dict[str, Path] = {}
-        for p in month_dir.iterdir():
-            if not p.is_file():
-                continue
-            if p.suffix == ".json":
-                sidecar_paths.append(p)
-            else:
-                stem_to_datafile[p.stem] = p
-        for sidecar_path in sidecar_paths:
-            sidecar = Sidecar.model_validate_json(sidecar_path.read_text(encoding="utf-8"))
-            data_file = stem_to_datafile.get(sidecar_path.stem)
-            rel_path = data_file.relative_to(output_path).as_posix() if data_file else ""
-            accepted_metadata[sidecar.original_filename] = (sidecar, rel_path)
-
-    return tossed, accepted_metadata
-
-
-def load_embeddings_cache(output_path: Path) -> tuple[list[str], np.ndarray | None]:
-    f = output_path / "name_embeddings.npz"
-    if not f.exists():
-        return [], None
-    data = np.load(f, allow_pickle=True)
-    return data["names"].tolist(), data["matrix"]
-
-
-def save_embeddings_cache(output_path: Path, names: list[str], matrix: np.ndarray):
-    np.savez_compressed(
-        output_path / "name_embeddings.npz",
-        names=np.array(names),
-        matrix=matrix,
-    )
+    return tossed, load_catalog_state(output_path)
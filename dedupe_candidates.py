@@ -1,9 +1,23 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
 from datetime import datetime, timedelta
+from pathlib import Path
 
-from models import ReviewDecision
+from archive_catalog import catalog_version, load_catalog_state
+from models import DedupePair, ReviewDecision
+from name_similarity import levenshtein_similarity
+from temporal_index import TemporalIndex, epoch_seconds
 
 MAX_GAP = timedelta(minutes=5)
 WEEK_WINDOW = timedelta(days=7)
+COST_TOLERANCE = 0.01
+TIME_WEIGHT = 0.4
+COST_WEIGHT = 0.4
+NAME_WEIGHT = 0.2
+
+_index_cache: dict[Path, tuple[int, TemporalIndex]] = {}
+_pairs_cache: dict[Path, tuple[int, tuple[timedelta, float], list[DedupePair]]] = {}
+_index_lock = threading.Lock()
 
 
 def parse_verdict_datetime(date_str: str, time_str: str) -> datetime | None:
@@ -22,49 +36,98 @@ def parse_verdict_datetime(date_str: str, time_str: str) -> datetime | None:
     return datetime(year, month, day, hour, minute)
 
 
-def _build_document_timeline(
-    decisions: dict[str, ReviewDecision],
-) -> list[tuple[str, datetime]]:
-    documents: list[tuple[str, datetime]] = []
+def receipt_index(decisions: dict[str, ReviewDecision]) -> TemporalIndex:
+    keys: list[str] = []
+    moments: list[datetime] = []
     for fn, decision in decisions.items():
         if decision.verdict == "tossed" or decision.document_type != "receipt":
             continue
-        dt = parse_verdict_datetime(decision.date, decision.time)
+        try:
+            dt = parse_verdict_datetime(decision.date, decision.time)
+        except ValueError:
+            continue
         if dt is not None:
-            documents.append((fn, dt))
-    documents.sort(key=lambda x: x[1])
-    return documents
-
-
-def find_dedupe_clusters(
+            keys.append(fn)
+            moments.append(dt)
+    return TemporalIndex(keys, moments)
+
+
+def archived_receipt_index(output_path: Path) -> TemporalIndex:
+    version = catalog_version(output_path)
+    key = output_path.resolve()
+    with _index_lock:
+        cached = _index_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    state = load_catalog_state(output_path)
+    index = receipt_index({fn: sidecar.review for fn, (sidecar, _path) in state.items()})
+    with _index_lock:
+        _index_cache[key] = (version, index)
+    return index
+
+
+def _pair(index: TemporalIndex, decisions: dict[str, ReviewDecision], i: int, j: int, span: int, cost_tolerance: float) -> DedupePair:
+    first, second = decisions[index.keys[i]], decisions[index.keys[j]]
+    seconds_apart = int(index.epochs[j] - index.epochs[i])
+    cost_delta = abs(first.cost - second.cost)
+    allowed = cost_tolerance * max(abs(first.cost), abs(second.cost))
+    cost_score = 1.0 if cost_delta == 0 else 1.0 - cost_delta / allowed
+    name_score = (
+        levenshtein_similarity(first.name.casefold(), second.name.casefold()) if first.name and second.name else 0.0
+    )
+    score = TIME_WEIGHT * (1.0 - seconds_apart / (span + 60)) + COST_WEIGHT * cost_score + NAME_WEIGHT * name_score
+    return DedupePair(
+        first=index.keys[i],
+        second=index.keys[j],
+        seconds_apart=seconds_apart,
+        cost_delta=cost_delta,
+        name_score=name_score,
+        score=round(score, 4),
+    )
+
+
+def find_dedupe_pairs(
     decisions: dict[str, ReviewDecision],
-) -> list[list[str]]:
-    documents = _build_document_timeline(decisions)
-
-    time_clusters: list[list[str]] = []
-    current_cluster: list[str] = []
-    prev_dt: datetime | None = None
-    for fn, dt in documents:
-        if prev_dt is not None and (dt - prev_dt) <= MAX_GAP:
-            current_cluster.append(fn)
-        else:
-            if len(current_cluster) >= 2:
-                time_clusters.append(current_cluster)
-            current_cluster = [fn]
-        prev_dt = dt
-    if len(current_cluster) >= 2:
-        time_clusters.append(current_cluster)
-
-    clusters: list[list[str]] = []
-    for tc in time_clusters:
-        by_cost: dict[float, list[str]] = {}
-        for fn in tc:
-            by_cost.setdefault(decisions[fn].cost, []).append(fn)
-        for group in by_cost.values():
-            if len(group) >= 2:
-                clusters.append(group)
-
-    return clusters
+    index: TemporalIndex | None = None,
+    time_tolerance: timedelta = MAX_GAP,
+    cost_tolerance: float = COST_TOLERANCE,
+) -> list[DedupePair]:
+    index = index or receipt_index(decisions)
+    span = int(time_tolerance.total_seconds())
+    reach = cost_tolerance / (1.0 - cost_tolerance) if cost_tolerance < 1.0 else float("inf")
+    epochs = index.epochs.tolist()
+    costs = [decisions[fn].cost for fn in index.keys]
+    active: list[tuple[float, int]] = []
+    tail = 0
+    pairs: list[DedupePair] = []
+    for i, (moment, cost) in enumerate(zip(epochs, costs)):
+        while epochs[tail] < moment - span:
+            del active[bisect_left(active, (costs[tail], tail))]
+            tail += 1
+        radius = reach * abs(cost) + 1e-9
+        lo = bisect_left(active, (cost - radius, -1))
+        hi = bisect_right(active, (cost + radius, len(epochs)))
+        for other_cost, j in active[lo:hi]:
+            if abs(cost - other_cost) <= cost_tolerance * max(abs(cost), abs(other_cost)):
+                pairs.append(_pair(index, decisions, j, i, span, cost_tolerance))
+        insort(active, (cost, i))
+    pairs.sort(key=lambda p: (-p.score, p.seconds_apart, p.first, p.second))
+    return pairs
+
+
+def archived_dedupe_pairs(output_path: Path, time_tolerance: timedelta, cost_tolerance: float) -> list[DedupePair]:
+    version = catalog_version(output_path)
+    key = output_path.resolve()
+    with _index_lock:
+        cached = _pairs_cache.get(key)
+    if cached is not None and cached[:2] == (version, (time_tolerance, cost_tolerance)):
+        return cached[2]
+    state = load_catalog_state(output_path)
+    decisions = {fn: sidecar.review for fn, (sidecar, _path) in state.items()}
+    pairs = find_dedupe_pairs(decisions, archived_receipt_index(output_path), time_tolerance, cost_tolerance)
+    with _index_lock:
+        _pairs_cache[key] = (version, (time_tolerance, cost_tolerance), pairs)
+    return pairs
 
 
 def find_adjacent_documents(
@@ -73,23 +136,22 @@ def find_adjacent_documents(
     cost: float,
     decisions: dict[str, ReviewDecision],
     exclude_fn: str = "",
+    index: TemporalIndex | None = None,
 ) -> list[str]:
     target_dt = parse_verdict_datetime(date_str, time_str)
     if target_dt is None:
         return []
 
-    adjacent: list[tuple[str, datetime]] = []
-    for fn, decision in decisions.items():
-        if fn == exclude_fn:
-            continue
-        if decision.verdict == "tossed" or decision.document_type != "receipt":
-            continue
-        dt = parse_verdict_datetime(decision.date, decision.time)
-        if dt is not None and abs(dt - target_dt) <= MAX_GAP and decision.cost == cost:
-            adjacent.append((fn, dt))
-
-    adjacent.sort(key=lambda x: abs(x[1] - target_dt))
-    return [fn for fn, _ in adjacent]
+    index = index or receipt_index(decisions)
+    span = index.span(target_dt - MAX_GAP, target_dt + MAX_GAP)
+    target = epoch_seconds(target_dt)
+    adjacent = [
+        (abs(int(index.epochs[i] - target)), int(index.ranks[i]), index.keys[i])
+        for i in range(span.start, span.stop)
+        if index.keys[i] != exclude_fn and index.keys[i] in decisions and decisions[index.keys[i]].cost == cost
+    ]
+    adjacent.sort()
+    return [fn for _, _, fn in adjacent]
 
 
 def get_receipts_in_week(
@@ -99,22 +161,18 @@ def get_receipts_in_week(
     include_fn: str = "",
     include_date: str = "",
     include_time: str = "",
+    index: TemporalIndex | None = None,
 ) -> list[str]:
     target_dt = parse_verdict_datetime(date_str, time_str)
     if target_dt is None:
         return []
     lo = target_dt - WEEK_WINDOW
     hi = target_dt + WEEK_WINDOW
-    documents: list[tuple[str, datetime]] = []
-    for fn, decision in decisions.items():
-        if decision.verdict == "tossed" or decision.document_type != "receipt":
-            continue
-        dt = parse_verdict_datetime(decision.date, decision.time)
-        if dt is not None and lo <= dt <= hi:
-            documents.append((fn, dt))
+    index = index or receipt_index(decisions)
+    span = index.span(lo, hi)
+    documents = index.keys[span]
     if include_fn and include_date and include_time:
         include_dt = parse_verdict_datetime(include_date, include_time)
         if include_dt is not None and lo <= include_dt <= hi:
-            documents.append((include_fn, include_dt))
-    documents.sort(key=lambda x: x[1])
-    return [fn for fn, _ in documents]
+            documents.insert(index.insertion_point(include_dt) - span.start, include_fn)
+    return documents
@@ -0,0 +1,156 @@
+import ast
+import json
+import re
+import struct
+import threading
+from pathlib import Path
+
+import numpy as np
+
+EMBEDDINGS_DIRNAME = "embeddings"
+VECTORS_FILENAME = "vectors.npy"
+NAMES_FILENAME = "names.jsonl"
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_HEADER_BYTES = 128
+
+
+def _npy_header(rows: int, dim: int) -> bytes:
+    header = repr({"descr": "<f4", "fortran_order": False, "shape": (rows, dim)})
+    body_len = NPY_HEADER_BYTES - len(NPY_MAGIC) - 2
+    return NPY_MAGIC + struct.pack("<H", body_len) + header.ljust(body_len - 1).encode("latin1") + b"\n"
+
+
+def _read_npy_shape(path: Path) -> tuple[int, int]:
+    with open(path, "rb") as f:
+        head = f.read(NPY_HEADER_BYTES)
+    body_len = struct.unpack("<H", head[len(NPY_MAGIC) : len(NPY_MAGIC) + 2])[0]
+    header = ast.literal_eval(head[len(NPY_MAGIC) + 2 : len(NPY_MAGIC) + 2 + body_len].decode("latin1"))
+    rows, dim = header["shape"]
+    return rows, dim
+
+
+def _name_line(name: str) -> bytes:
+    return (json.dumps(name, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def model_namespace(model: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", model).strip("._") or "default"
+
+
+class EmbeddingStore:
+    def __init__(self, root: Path):
+        self._root = root
+        self._lock = threading.RLock()
+        self._names: list[str] = []
+        self._lookup: dict[str, int] = {}
+        self._names_offset = 0
+        self._matrix: np.ndarray | None = None
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self._root / VECTORS_FILENAME
+
+    @property
+    def _names_path(self) -> Path:
+        return self._root / NAMES_FILENAME
+
+    def _sync_names(self) -> None:
+        if not self._names_path.exists():
+            self._names, self._lookup, self._names_offset = [], {}, 0
+            return
+        size = self._names_path.stat().st_size
+        if size < self._names_offset:
+            self._names, self._lookup, self._names_offset = [], {}, 0
+        if size == self._names_offset:
+            return
+        with open(self._names_path, "rb") as f:
+            f.seek(self._names_offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            name = json.loads(line)
+            self._lookup.setdefault(name, len(self._names))
+            self._names.append(name)
+        self._names_offset += end
+
+    def _rows(self) -> int:
+        if not self._vectors_path.exists():
+            return 0
+        return _read_npy_shape(self._vectors_path)[0]
+
+    def _sync(self) -> int:
+        self._sync_names()
+        count = min(len(self._names), self._rows())
+        if count < len(self._names):
+            for name in self._names[count:]:
+                self._names_offset -= len(_name_line(name))
+                if self._lookup.get(name, -1) >= count:
+                    del self._lookup[name]
+            del self._names[count:]
+        return count
+
+    def names(self) -> list[str]:
+        with self._lock:
+            self._sync()
+            return list(self._names)
+
+    def lookup(self) -> dict[str, int]:
+        with self._lock:
+            self._sync()
+            return dict(self._lookup)
+
+    def matrix(self) -> np.ndarray | None:
+        with self._lock:
+            count = self._sync()
+            if count == 0:
+                return None
+            if self._matrix is None or self._matrix.shape[0] < count:
+                self._matrix = np.load(self._vectors_path, mmap_mode="r")
+            return self._matrix[:count]
+
+    def append(self, names: list[str], vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype="<f4")
+        if vectors.ndim != 2 or vectors.shape[0] != len(names):
+            raise ValueError("Expected one vector per name")
+        if not names:
+            return
+        with self._lock:
+            self._root.mkdir(parents=True, exist_ok=True)
+            count = self._sync()
+            rows, dim = (0, vectors.shape[1])
+            if self._vectors_path.exists():
+                rows, dim = _read_npy_shape(self._vectors_path)
+                if dim != vectors.shape[1]:
+                    raise ValueError(f"Embedding dimension changed from {dim} to {vectors.shape[1]}")
+            else:
+                self._vectors_path.write_bytes(_npy_header(0, dim))
+            self._matrix = None
+            with open(self._vectors_path, "r+b") as f:
+                f.seek(NPY_HEADER_BYTES + count * dim * 4)
+                f.write(vectors.tobytes())
+                if rows > count + len(names):
+                    f.truncate()
+                f.seek(0)
+                f.write(_npy_header(count + len(names), dim))
+            with open(self._names_path, "r+b" if self._names_path.exists() else "wb") as f:
+                f.seek(self._names_offset)
+                f.write(b"".join(_name_line(n) for n in names))
+                f.truncate()
+
+
+_STORES: dict[Path, EmbeddingStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def open_embedding_store(output_path: Path, model: str) -> EmbeddingStore:
+    root = (output_path / EMBEDDINGS_DIRNAME / model_namespace(model)).resolve()
+    with _STORES_LOCK:
+        store = _STORES.get(root)
+        if store is None:
+            store = EmbeddingStore(root)
+            _STORES[root] = store
+        return store
@@ -1,13 +1,21 @@
+import functools
+import random
+import time
 import typing
 
-from ollama import chat
-from openai import OpenAI
+import httpx
+from ollama import Client
+from openai import APIConnectionError, OpenAI
 
 from models import DocumentExtraction, DocumentExtractionAdapter, ExtractionFlat
 
 OLLAMA_MODEL = "qwen3:8b"
 OPENAI_MODEL = "gpt-5.4"
 
+RETRY_ATTEMPTS = 6
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+
 EXTRACTION_PROMPT = """You are extracting structured data from OCR text of a scanned document.
 If the text contains multiple pages (marked with --- Page N ---), treat as one document and extract from all pages.
 If a field is not present, corrupted or unreadable, use empty string.
@@ -102,9 +110,62 @@ def build_extraction_prompt(ocr_text: str, has_boxes: bool = False, custom_instr
     return base + FIELD_SOURCES_ADDENDUM if has_boxes else base
 
 
+def is_retryable(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(exc, (APIConnectionError, httpx.TransportError, ConnectionError))
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+def retry_delay(attempt: int, exc: BaseException) -> float:
+    hinted = _retry_after(exc)
+    ceiling = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt)
+    if hinted is not None:
+        return min(RETRY_MAX_DELAY, hinted) + random.uniform(0, RETRY_BASE_DELAY)
+    return random.uniform(0, ceiling)
+
+
+def with_retries(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, acquire: typing.Callable[[], None] | None = None, **kwargs):
+        for attempt in range(RETRY_ATTEMPTS):
+            if acquire is not None:
+                acquire()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt == RETRY_ATTEMPTS - 1 or not is_retryable(e):
+                    raise
+                time.sleep(retry_delay(attempt, e))
+
+    return wrapper
+
+
+@functools.cache
+def openai_client() -> OpenAI:
+    return OpenAI(max_retries=0)
+
+
+@functools.cache
+def ollama_client() -> Client:
+    return Client()
+
+
+@with_retries
 def extract_ollama(ocr_text: str, has_boxes: bool = False, custom_instruction: str = "") -> DocumentExtraction:
     prompt = build_extraction_prompt(ocr_text, has_boxes, custom_instruction=custom_instruction)
-    response = chat(
+    response = ollama_client().chat(
         model=OLLAMA_MODEL,
         messages=[{"role": "user", "content": prompt}],
         format=DocumentExtractionAdapter.json_schema(),
@@ -113,10 +174,10 @@ def extract_ollama(ocr_text: str, has_boxes: bool = False, custom_instruction: s
     return DocumentExtractionAdapter.validate_json(response.message.content)
 
 
+@with_retries
 def extract_openai(ocr_text: str, has_boxes: bool = False, custom_instruction: str = "") -> DocumentExtraction:
-    client = OpenAI()
     prompt = build_extraction_prompt(ocr_text, has_boxes, custom_instruction=custom_instruction)
-    response = client.chat.completions.parse(
+    response = openai_client().chat.completions.parse(
         model=OPENAI_MODEL,
         messages=[{"role": "user", "content": prompt}],
         response_format=ExtractionFlat,
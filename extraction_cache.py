@@ -0,0 +1,130 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from models import DocumentExtraction, DocumentExtractionAdapter, ExtractionFlat
+
+CACHE_DIRNAME = ".cache"
+CACHE_FILENAME = "extractions.sqlite"
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+SCHEMA_VERSION = hashlib.sha256(
+    json.dumps(
+        [DocumentExtractionAdapter.json_schema(), ExtractionFlat.model_json_schema()], sort_keys=True
+    ).encode("utf-8")
+).hexdigest()[:16]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used);
+"""
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+
+_counters = {"hits": 0, "misses": 0}
+_counters_lock = threading.Lock()
+
+
+def cache_path(output_path: Path) -> Path:
+    return output_path / CACHE_DIRNAME / CACHE_FILENAME
+
+
+@contextmanager
+def _cache(output_path: Path):
+    path = cache_path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def extraction_cache_key(model_id: str, prompt: str) -> str:
+    h = hashlib.sha256()
+    for part in (model_id, SCHEMA_VERSION, prompt):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _count(name: str) -> None:
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def get_cached_extraction(output_path: Path, model_id: str, prompt: str) -> DocumentExtraction | None:
+    key = extraction_cache_key(model_id, prompt)
+    with _cache(output_path) as conn:
+        row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+    if row is None:
+        _count("misses")
+        return None
+    _count("hits")
+    return DocumentExtractionAdapter.validate_json(row[0])
+
+
+def put_cached_extraction(
+    output_path: Path,
+    model_id: str,
+    prompt: str,
+    extraction: DocumentExtraction,
+    max_bytes: int = MAX_CACHE_BYTES,
+) -> None:
+    value = DocumentExtractionAdapter.dump_json(extraction).decode("utf-8")
+    size = len(value.encode("utf-8"))
+    with _cache(output_path) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+            (extraction_cache_key(model_id, prompt), value, size, time.time()),
+        )
+        conn.execute(
+            """
+            DELETE FROM entries WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS running FROM entries
+                ) WHERE running > ?
+            )
+            """,
+            (max_bytes,),
+        )
+
+
+def clear_extraction_cache(output_path: Path) -> None:
+    with _cache(output_path) as conn:
+        conn.execute("DELETE FROM entries")
+
+
+def extraction_cache_stats(output_path: Path) -> CacheStats:
+    with _cache(output_path) as conn:
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+    with _counters_lock:
+        return CacheStats(hits=_counters["hits"], misses=_counters["misses"], entries=entries, size_bytes=size)
+
+
+def reset_cache_counters() -> None:
+    with _counters_lock:
+        _counters["hits"] = 0
+        _counters["misses"] = 0
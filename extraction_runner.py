@@ -0,0 +1,126 @@
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from extraction import EXTRACTORS, build_extraction_prompt
+from extraction_cache import get_cached_extraction, put_cached_extraction
+from models import DocumentExtraction
+
+CHARS_PER_TOKEN = 4
+POLL_INTERVAL = 0.05
+
+PENDING = object()
+
+
+def estimate_tokens(prompt: str) -> int:
+    return len(prompt) // CHARS_PER_TOKEN + 1
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._rpm = requests_per_minute
+        self._tpm = tokens_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._last = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._last
+        self._last = now
+        if self._rpm:
+            self._requests = min(self._rpm, self._requests + elapsed * self._rpm / 60)
+        if self._tpm:
+            self._tokens = min(self._tpm, self._tokens + elapsed * self._tpm / 60)
+
+    def acquire(self, tokens: int = 0) -> None:
+        if not self._rpm and not self._tpm:
+            return
+        tokens = min(tokens, self._tpm) if self._tpm else 0
+        while True:
+            with self._lock:
+                self._refill()
+                wait_s = 0.0
+                if self._rpm and self._requests < 1:
+                    wait_s = (1 - self._requests) * 60 / self._rpm
+                if self._tpm and self._tokens < tokens:
+                    wait_s = max(wait_s, (tokens - self._tokens) * 60 / self._tpm)
+                if wait_s == 0:
+                    if self._rpm:
+                        self._requests -= 1
+                    self._tokens -= tokens
+                    return
+            self._sleep(wait_s)
+
+
+def iter_extractions(
+    extractor_name: str,
+    items: Iterable[tuple[str, str, bool]],
+    custom_instruction: str = "",
+    concurrency: int = 1,
+    limiter: RateLimiter | None = None,
+    cache_root: Path | None = None,
+) -> Iterator[tuple[str, DocumentExtraction | Exception]]:
+    extract = EXTRACTORS[extractor_name]
+    limit = max(1, concurrency)
+    remaining = iter(items)
+    pending: dict[Future, str] = {}
+
+    def run(ocr_text: str, has_boxes: bool) -> DocumentExtraction:
+        prompt = build_extraction_prompt(ocr_text, has_boxes, custom_instruction=custom_instruction)
+        if cache_root is not None:
+            cached = get_cached_extraction(cache_root, extractor_name, prompt)
+            if cached is not None:
+                return cached
+        if limiter is None:
+            result = extract(ocr_text, has_boxes=has_boxes, custom_instruction=custom_instruction)
+        else:
+            tokens = estimate_tokens(prompt)
+            result = extract(
+                ocr_text,
+                has_boxes=has_boxes,
+                custom_instruction=custom_instruction,
+                acquire=lambda: limiter.acquire(tokens),
+            )
+        if cache_root is not None:
+            put_cached_extraction(cache_root, extractor_name, prompt, result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=limit, thread_name_prefix="extract") as pool:
+        exhausted = False
+
+        def fill() -> None:
+            nonlocal exhausted
+            while not exhausted and len(pending) < limit:
+                item = next(remaining, None)
+                if item is None:
+                    exhausted = True
+                elif item is PENDING:
+                    return
+                else:
+                    key, ocr_text, has_boxes = item
+                    pending[pool.submit(run, ocr_text, has_boxes)] = key
+
+        try:
+            fill()
+            while pending or not exhausted:
+                done, _ = wait(pending, timeout=None if exhausted else POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    error = future.exception()
+                    yield key, error if error is not None else future.result()
+                fill()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from archive_catalog import catalog_version, load_catalog_state
+from settings import IMAGE_EXTENSIONS
+
+HASH_FILENAME = "image_hashes.sqlite"
+HASH_SIZE = 8
+HASH_WORKERS = os.cpu_count() or 1
+CHUNK_BITS = 16
+CHUNKS = 64 // CHUNK_BITS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    data_path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    dhash INTEGER NOT NULL
+);
+"""
+
+_duplicates_cache: dict[Path, tuple[int, int, list[tuple[str, str, int]]]] = {}
+_duplicates_lock = threading.Lock()
+
+
+@contextmanager
+def _hash_db(output_path: Path):
+    conn = sqlite3.connect(output_path / HASH_FILENAME, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def dhash(path: Path) -> int:
+    with Image.open(path) as img:
+        img.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+        small = ImageOps.exif_transpose(img).convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = np.packbits(pixels[:, 1:] > pixels[:, :-1])
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _to_signed(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def _hash_or_none(path: Path) -> int | None:
+    try:
+        return dhash(path)
+    except Exception:
+        return None
+
+
+def refresh_image_hashes(output_path: Path, data_paths: list[str]) -> dict[str, int]:
+    with _hash_db(output_path) as conn:
+        known = {
+            rel: (mtime_ns, size, value)
+            for rel, mtime_ns, size, value in conn.execute("SELECT data_path, mtime_ns, size, dhash FROM hashes")
+        }
+        hashes: dict[str, int] = {}
+        stale: list[tuple[str, os.stat_result]] = []
+        for rel in data_paths:
+            if Path(rel).suffix.lower() not in IMAGE_EXTENSIONS:
+                continue
+            try:
+                st = (output_path / rel).stat()
+            except FileNotFoundError:
+                continue
+            prior = known.get(rel)
+            if prior is not None and prior[0] == st.st_mtime_ns and prior[1] == st.st_size:
+                hashes[rel] = _to_unsigned(prior[2])
+            else:
+                stale.append((rel, st))
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(HASH_WORKERS, len(stale)), thread_name_prefix="dhash") as pool:
+                computed = list(pool.map(lambda item: _hash_or_none(output_path / item[0]), stale))
+            rows = []
+            for (rel, st), value in zip(stale, computed):
+                if value is not None:
+                    hashes[rel] = value
+                    rows.append((rel, st.st_mtime_ns, st.st_size, _to_signed(value)))
+            conn.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?)", rows)
+        gone = [(rel,) for rel in known if rel not in hashes]
+        conn.executemany("DELETE FROM hashes WHERE data_path = ?", gone)
+    return hashes
+
+
+def _probe_masks(radius: int) -> np.ndarray:
+    masks = np.arange(1 << CHUNK_BITS, dtype=np.int64)
+    return masks[np.bitwise_count(masks) <= radius]
+
+
+def find_near_duplicates(hashes: dict[str, int], max_distance: int) -> list[tuple[str, str, int]]:
+    keys = list(hashes)
+    n = len(keys)
+    if n < 2:
+        return []
+    values = np.array([hashes[k] for k in keys], dtype=np.uint64)
+    positions = np.arange(n, dtype=np.int64)
+    found: list[np.ndarray] = []
+    for chunk_idx in range(CHUNKS):
+        chunk = ((values >> np.uint64(chunk_idx * CHUNK_BITS)) & np.uint64((1 << CHUNK_BITS) - 1)).astype(np.int64)
+        order = np.argsort(chunk, kind="stable")
+        starts = np.zeros((1 << CHUNK_BITS) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(chunk, minlength=1 << CHUNK_BITS), out=starts[1:])
+        for mask in _probe_masks(max_distance // CHUNKS):
+            probe = chunk ^ mask
+            lo = starts[probe]
+            counts = starts[probe + 1] - lo
+            total = int(counts.sum())
+            if not total:
+                continue
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            left = np.repeat(positions, counts)
+            right = order[np.repeat(lo, counts) + offsets]
+            keep = (left < right) & (np.bitwise_count(values[left] ^ values[right]) <= max_distance)
+            found.append(left[keep] * n + right[keep])
+    if not found:
+        return []
+    codes = np.unique(np.concatenate(found))
+    left, right = codes // n, codes % n
+    distances = np.bitwise_count(values[left] ^ values[right])
+    pairs = [(keys[a], keys[b], int(d)) for a, b, d in zip(left.tolist(), right.tolist(), distances.tolist())]
+    pairs.sort(key=lambda p: (p[2], p[0], p[1]))
+    return pairs
+
+
+def archived_near_duplicates(output_path: Path, max_distance: int) -> list[tuple[str, str, int]]:
+    version = catalog_version(output_path)
+    key = output_path.resolve()
+    with _duplicates_lock:
+        cached = _duplicates_cache.get(key)
+    if cached is not None and cached[:2] == (version, max_distance):
+        return cached[2]
+    state = load_catalog_state(output_path)
+    by_path = {rel: fn for fn, (_sidecar, rel) in state.items() if rel}
+    hashes = refresh_image_hashes(output_path, list(by_path))
+    pairs = [(by_path[a], by_path[b], d) for a, b, d in find_near_duplicates(hashes, max_distance)]
+    with _duplicates_lock:
+        _duplicates_cache[key] = (version, max_distance, pairs)
+    return pairs
@@ -2,7 +2,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Callable
 
-from models import ScanBatch
+from models import ScanBatch, ScanIndex
 
 IndexingScheme = Callable[[list[str]], tuple[list[ScanBatch], list[str], list[str]]]
 
@@ -80,3 +80,29 @@ SCHEMES: dict[str, IndexingScheme] = {
     "Canon ImageFormula": canon_imageformula,
     "Single batch (by filename)": single_batch_by_filename,
 }
+
+
+def plan_new_batches(
+    scheme_name: str,
+    unindexed_filenames: list[str],
+    existing_index: ScanIndex | None,
+) -> tuple[list[ScanBatch], list[str], list[str], list[str]]:
+    new_batches_rel, skipped, warnings = SCHEMES[scheme_name](unindexed_filenames)
+
+    before_last: list[str] = []
+    if scheme_name == "Canon ImageFormula" and existing_index and existing_index.batches and new_batches_rel:
+        last_end = datetime.strptime(existing_index.batches[-1].end_datetime, "%Y-%m-%d %H:%M:%S")
+        unindexed_parsed = [(parse_canon_filename(fn), fn) for fn in unindexed_filenames if fn not in skipped]
+        before_last = [fn for (p, fn) in unindexed_parsed if p and p[0] < last_end]
+
+    start_batch_id = existing_index.batches[-1].batch_id + 1 if existing_index and existing_index.batches else 1
+    new_batches = [
+        ScanBatch(
+            batch_id=start_batch_id + i,
+            start_datetime=b.start_datetime,
+            end_datetime=b.end_datetime,
+            files=b.files,
+        )
+        for i, b in enumerate(new_batches_rel)
+    ]
+    return new_batches, skipped, warnings, before_last
@@ -3,6 +3,8 @@ from typing import Annotated, Literal, TypeVar, Union
 
 from pydantic import BaseModel, Field, TypeAdapter
 
+from working_set import cached, stored
+
 T = TypeVar("T")
 
 
@@ -133,12 +135,26 @@ class ReviewDecision(BaseModel):
     comment: str = ""
 
 
+ReviewDecisionsAdapter = TypeAdapter(dict[str, ReviewDecision])
+
+
 class SmartMatchHistoryRow(BaseModel):
     extracted: str
     extracted_phone: str
     confirmed: str
 
 
+class SmartMatchEntry(BaseModel):
+    extracted: str
+    extracted_phone: str
+    confirmed: str
+    count: int = 1
+    last_seen: str = ""
+
+
+SmartMatchEntriesAdapter = TypeAdapter(list[SmartMatchEntry])
+
+
 class SmartMatchCandidate(BaseModel):
     confirmed_name: str
     name_score: float
@@ -147,6 +163,15 @@ class SmartMatchCandidate(BaseModel):
     quick_apply: bool
 
 
+class DedupePair(BaseModel):
+    first: str
+    second: str
+    seconds_apart: int
+    cost_delta: float
+    name_score: float
+    score: float
+
+
 class Sidecar(BaseModel):
     original_filename: str
     batch_id: int | None = None
@@ -169,8 +194,24 @@ class ScanIndex(BaseModel):
     batches: list[ScanBatch]
 
 
+def _deep_copy_scan_index(index: "ScanIndex") -> "ScanIndex":
+    return index.model_copy(deep=True)
+
+
 def load_scan_index(output_path: Path) -> "ScanIndex":
-    return ScanIndex.model_validate_json((output_path / "batches.json").read_text(encoding="utf-8"))
+    f = output_path / "batches.json"
+    return cached(
+        "scan_index",
+        f,
+        lambda: ScanIndex.model_validate_json(f.read_text(encoding="utf-8")),
+        copy=_deep_copy_scan_index,
+    )
+
+
+def save_scan_index(output_path: Path, index: "ScanIndex") -> None:
+    f = output_path / "batches.json"
+    f.write_text(index.model_dump_json(indent=2), encoding="utf-8")
+    stored("scan_index", f, index.model_copy(deep=True))
 
 
 def iter_indexed_files(index: "ScanIndex", include_archived: bool = True) -> list[tuple[int, int, str]]:
@@ -1,14 +1,36 @@
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+import httpx
 import numpy as np
 from ollama import embed
+from ollama import list as list_ollama_models
+from rapidfuzz import process
 from rapidfuzz.distance import Levenshtein
+from sklearn.feature_extraction.text import HashingVectorizer
 from sklearn.metrics.pairwise import cosine_distances
 
-from data import load_embeddings_cache, save_embeddings_cache
+from data import (
+    MIGRATED_SUFFIX,
+    SMART_MATCH_HISTORY,
+    SMART_MATCH_INDEX,
+    load_smart_match_entries,
+    smart_match_entry_rows,
+)
+from embedding_store import EmbeddingStore, open_embedding_store
 from models import SmartMatchCandidate, SmartMatchHistoryRow
+from working_set import cached
 
 EMBED_MODEL = "nomic-embed-text"
+OFFLINE_EMBED_MODEL = "char-ngram-hash-512"
+EMBED_CHUNK_SIZE = 64
+EMBED_CONCURRENCY = 4
+EMBED_PROBE_TTL = 30.0
+LEGACY_EMBEDDINGS_FILE = "name_embeddings.npz"
 DEFAULT_THRESHOLD = 0.05
 
 SMART_MATCH_THRESHOLD = 0.25
@@ -16,6 +38,7 @@ PHONE_BOOST_MIN = 0.90
 PHONE_WEIGHT = 0.35
 QUICK_APPLY_THRESHOLD = 0.85
 MIN_PHONE_DIGITS = 7
+QUICK_APPLY_BLOCK_BYTES = 32 * 1024 * 1024
 
 
 def levenshtein_similarity(a: str, b: str) -> float:
@@ -30,58 +53,220 @@ def phone_matchable(s: str) -> bool:
     return len(normalize_phone_for_match(s)) >= MIN_PHONE_DIGITS
 
 
-def _row_scores(query_name: str, query_phone: str, row: SmartMatchHistoryRow) -> tuple[float, float]:
-    name_score = levenshtein_similarity(query_name, row.extracted) if query_name else 0.0
-    if (
-        phone_matchable(query_phone)
-        and phone_matchable(row.extracted_phone)
-    ):
-        phone_score = levenshtein_similarity(
-            normalize_phone_for_match(query_phone),
-            normalize_phone_for_match(row.extracted_phone),
-        )
-    else:
-        phone_score = 0.0
-    return name_score, phone_score
+def _phone_variants(phone: str) -> set[str]:
+    variants = {phone}
+    frontier = {phone}
+    for _ in range(int(len(phone) / 9 + 1e-9)):
+        frontier = {v[:i] + v[i + 1 :] for v in frontier for i in range(len(v))}
+        variants |= frontier
+    return variants
 
 
-def get_smart_match_candidates(
-    query_name: str,
-    query_phone: str,
-    history: list[SmartMatchHistoryRow],
-) -> list[SmartMatchCandidate]:
-    if not history or (not query_name and not phone_matchable(query_phone)):
-        return []
-    best_name: dict[str, float] = {}
-    best_phone: dict[str, float] = {}
-    for row in history:
-        ns, ps = _row_scores(query_name, query_phone, row)
-        c = row.confirmed
-        if c not in best_name or ns > best_name[c]:
-            best_name[c] = ns
-        if c not in best_phone or ps > best_phone[c]:
-            best_phone[c] = ps
-    out: list[SmartMatchCandidate] = []
-    for confirmed in best_name:
-        name_score = best_name[confirmed]
-        phone_score = best_phone.get(confirmed, 0.0)
-        included = name_score >= SMART_MATCH_THRESHOLD or phone_score >= PHONE_BOOST_MIN
-        if not included:
-            continue
-        phone_contrib = phone_score if phone_score >= PHONE_BOOST_MIN else 0.0
-        combined_score = name_score + PHONE_WEIGHT * phone_contrib
-        quick_apply = max(name_score, phone_score) >= QUICK_APPLY_THRESHOLD
-        out.append(
-            SmartMatchCandidate(
-                confirmed_name=confirmed,
-                name_score=name_score,
-                phone_score=phone_score,
-                combined_score=combined_score,
-                quick_apply=quick_apply,
+class SmartMatchIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tuples: Counter[tuple[str, str, str]] = Counter()
+        self._pending: Counter[tuple[str, str, str]] = Counter()
+        self._by_extracted: dict[str, Counter[str]] = {}
+        self._by_phone: dict[str, Counter[str]] = {}
+        self._by_variant: dict[str, set[str]] = {}
+        self._extracted_of: dict[str, Counter[str]] = {}
+        self._phones_of: dict[str, Counter[str]] = {}
+        self._extracted_list: list[str] | None = None
+        self._quick: dict[tuple[str, str], bool] = {}
+        self._added: list[tuple[str, str, str]] = []
+
+    @staticmethod
+    def _key(row: SmartMatchHistoryRow) -> tuple[str, str, str]:
+        phone = normalize_phone_for_match(row.extracted_phone)
+        return row.extracted, phone if len(phone) >= MIN_PHONE_DIGITS else "", row.confirmed
+
+    @staticmethod
+    def _bump(table: dict[str, Counter[str]], key: str, value: str, delta: int) -> None:
+        counts = table.setdefault(key, Counter())
+        counts[value] += delta
+        if counts[value] <= 0:
+            del counts[value]
+            if not counts:
+                del table[key]
+
+    def _index_phone(self, phone: str, present: bool) -> None:
+        for variant in _phone_variants(phone):
+            if present:
+                self._by_variant.setdefault(variant, set()).add(phone)
+                continue
+            phones = self._by_variant[variant]
+            phones.discard(phone)
+            if not phones:
+                del self._by_variant[variant]
+
+    def _change(self, key: tuple[str, str, str], delta: int) -> None:
+        extracted, phone, confirmed = key
+        before = self._tuples[key]
+        self._tuples[key] += delta
+        if self._tuples[key] <= 0:
+            del self._tuples[key]
+        if not before:
+            self._added.append(key)
+        elif key not in self._tuples:
+            self._quick.clear()
+        if extracted not in self._by_extracted or key not in self._tuples:
+            self._extracted_list = None
+        self._bump(self._by_extracted, extracted, confirmed, delta)
+        self._bump(self._extracted_of, confirmed, extracted, delta)
+        if phone:
+            known = phone in self._by_phone
+            self._bump(self._by_phone, phone, confirmed, delta)
+            if known != (phone in self._by_phone):
+                self._index_phone(phone, not known)
+            self._bump(self._phones_of, confirmed, phone, delta)
+
+    def apply(
+        self, added: list[SmartMatchHistoryRow], removed: list[SmartMatchHistoryRow] | None = None
+    ) -> "SmartMatchIndex":
+        with self._lock:
+            for row in removed or []:
+                if self._tuples[self._key(row)]:
+                    self._change(self._key(row), -1)
+            for row in added:
+                self._change(self._key(row), 1)
+        return self
+
+    def sync(self, pending: list[SmartMatchHistoryRow]) -> "SmartMatchIndex":
+        target = Counter(self._key(row) for row in pending)
+        with self._lock:
+            if target == self._pending:
+                return self
+            for key in self._pending.keys() | target.keys():
+                delta = target[key] - self._pending[key]
+                if delta:
+                    self._change(key, delta)
+            self._pending = target
+        return self
+
+    def confirmed_names(self) -> set[str]:
+        with self._lock:
+            return set(self._extracted_of)
+
+    @staticmethod
+    def _best_per_confirmed(
+        queries: list[str], table: dict[str, Counter[str]], confirmed: list[str]
+    ) -> np.ndarray:
+        best = np.zeros((len(queries), len(confirmed)), dtype=np.float64)
+        choices = list(dict.fromkeys(value for c in confirmed for value in table.get(c, ())))
+        if not queries or not choices:
+            return best
+        position = {value: i for i, value in enumerate(choices)}
+        columns = [(j, position[value]) for j, c in enumerate(confirmed) for value in table.get(c, ())]
+        owner = np.array([j for j, _ in columns], dtype=np.int64)
+        source = np.array([i for _, i in columns], dtype=np.int64)
+        owners, starts = np.unique(owner, return_index=True)
+        rows = max(1, QUICK_APPLY_BLOCK_BYTES // (8 * max(len(choices), len(columns))))
+        for start in range(0, len(queries), rows):
+            scores = process.cdist(
+                queries[start : start + rows],
+                choices,
+                scorer=Levenshtein.normalized_similarity,
+                dtype=np.float64,
+                workers=-1,
             )
+            best[start : start + rows, owners] = np.maximum.reduceat(scores[:, source], starts, axis=1)
+        return best
+
+    def _quick_flags(self, queries: list[tuple[str, str]], confirmed: list[str]) -> np.ndarray:
+        flags = np.zeros(len(queries), dtype=bool)
+        named = [i for i, (name, _) in enumerate(queries) if name]
+        dialled = [i for i, (_, phone) in enumerate(queries) if phone_matchable(phone)]
+        if not confirmed or (not named and not dialled):
+            return flags
+        name_scores = np.zeros((len(queries), len(confirmed)), dtype=np.float64)
+        phone_scores = np.zeros_like(name_scores)
+        name_scores[named] = self._best_per_confirmed([queries[i][0] for i in named], self._extracted_of, confirmed)
+        phone_scores[dialled] = self._best_per_confirmed(
+            [normalize_phone_for_match(queries[i][1]) for i in dialled], self._phones_of, confirmed
         )
-    out.sort(key=lambda x: (-x.combined_score, -max(x.name_score, x.phone_score), x.confirmed_name))
-    return out
+        included = (name_scores >= SMART_MATCH_THRESHOLD) | (phone_scores >= PHONE_BOOST_MIN)
+        quick = np.maximum(name_scores, phone_scores) >= QUICK_APPLY_THRESHOLD
+        return (included & quick).any(axis=1)
+
+    def quick_apply_flags(self, queries: list[tuple[str, str]]) -> np.ndarray:
+        with self._lock:
+            if self._added and self._quick:
+                stale = [q for q, hit in self._quick.items() if not hit]
+                touched = list(dict.fromkeys(k[2] for k in self._added))
+                for q, hit in zip(stale, self._quick_flags(stale, touched)):
+                    self._quick[q] = bool(hit)
+            self._added = []
+            missing = [q for q in dict.fromkeys(queries) if q not in self._quick]
+            if missing:
+                for q, hit in zip(missing, self._quick_flags(missing, list(self._extracted_of))):
+                    self._quick[q] = bool(hit)
+            return np.array([self._quick[q] for q in queries], dtype=bool)
+
+    def candidates(self, query_name: str, query_phone: str) -> list[SmartMatchCandidate]:
+        query_digits = normalize_phone_for_match(query_phone)
+        phone_ok = len(query_digits) >= MIN_PHONE_DIGITS
+        with self._lock:
+            if not self._tuples or (not query_name and not phone_ok):
+                return []
+            if self._extracted_list is None:
+                self._extracted_list = list(self._by_extracted)
+            best_name: dict[str, float] = {}
+            if query_name:
+                for extracted, score, _ in process.extract(
+                    query_name,
+                    self._extracted_list,
+                    scorer=Levenshtein.normalized_similarity,
+                    score_cutoff=SMART_MATCH_THRESHOLD,
+                    limit=None,
+                ):
+                    for confirmed in self._by_extracted[extracted]:
+                        if score > best_name.get(confirmed, -1.0):
+                            best_name[confirmed] = score
+            included = set(best_name)
+            if phone_ok:
+                near = {phone for v in _phone_variants(query_digits) for phone in self._by_variant.get(v, ())}
+                for phone in near:
+                    if levenshtein_similarity(query_digits, phone) >= PHONE_BOOST_MIN:
+                        included.update(self._by_phone[phone])
+            best_phone: dict[str, float] = {}
+            if phone_ok:
+                for confirmed in included & self._phones_of.keys():
+                    best_phone[confirmed] = max(
+                        levenshtein_similarity(query_digits, phone) for phone in self._phones_of[confirmed]
+                    )
+            for confirmed in included - best_name.keys():
+                best_name[confirmed] = (
+                    max(levenshtein_similarity(query_name, e) for e in self._extracted_of[confirmed])
+                    if query_name
+                    else 0.0
+                )
+
+        out: list[SmartMatchCandidate] = []
+        for confirmed in included:
+            name_score = best_name[confirmed]
+            phone_score = best_phone.get(confirmed, 0.0)
+            phone_contrib = phone_score if phone_score >= PHONE_BOOST_MIN else 0.0
+            out.append(
+                SmartMatchCandidate(
+                    confirmed_name=confirmed,
+                    name_score=name_score,
+                    phone_score=phone_score,
+                    combined_score=name_score + PHONE_WEIGHT * phone_contrib,
+                    quick_apply=max(name_score, phone_score) >= QUICK_APPLY_THRESHOLD,
+                )
+            )
+        out.sort(key=lambda x: (-x.combined_score, -max(x.name_score, x.phone_score), x.confirmed_name))
+        return out
+
+
+def smart_match_index(output_path: Path, pending: list[SmartMatchHistoryRow]) -> SmartMatchIndex:
+    index = cached(
+        SMART_MATCH_INDEX,
+        output_path / SMART_MATCH_HISTORY,
+        lambda: SmartMatchIndex().apply(smart_match_entry_rows(load_smart_match_entries(output_path))),
+    )
+    return index.sync(pending)
 
 
 def quick_apply_label(c: SmartMatchCandidate) -> str:
@@ -94,29 +279,86 @@ def quick_apply_label(c: SmartMatchCandidate) -> str:
     return f"{c.confirmed_name} — {suffix}" if suffix else c.confirmed_name
 
 
+_offline_vectorizer = HashingVectorizer(
+    analyzer="char_wb", ngram_range=(2, 4), n_features=512, alternate_sign=False, norm="l2", lowercase=True
+)
+_probe: dict[str, float | bool] = {"at": 0.0, "ok": False}
+
+
+def offline_embed(names: list[str]) -> np.ndarray:
+    return _offline_vectorizer.transform(names).toarray().astype(np.float32)
+
+
+def embedding_server_available() -> bool:
+    now = time.monotonic()
+    if now - _probe["at"] < EMBED_PROBE_TTL:
+        return bool(_probe["ok"])
+    try:
+        list_ollama_models()
+        ok = True
+    except (ConnectionError, httpx.HTTPError):
+        ok = False
+    _probe.update(at=now, ok=ok)
+    return ok
+
+
+def active_embedding_model() -> str:
+    return EMBED_MODEL if embedding_server_available() else OFFLINE_EMBED_MODEL
+
+
+def embedding_store(output_path: Path, model: str = EMBED_MODEL) -> EmbeddingStore:
+    return open_embedding_store(output_path, model)
+
+
+def migrate_legacy_embeddings(output_path: Path) -> int:
+    legacy = output_path / LEGACY_EMBEDDINGS_FILE
+    store = embedding_store(output_path, EMBED_MODEL)
+    with np.load(legacy, allow_pickle=True) as data:
+        legacy_names = data["names"].tolist()
+        legacy_matrix = data["matrix"]
+    known = store.lookup()
+    keep = [i for i, n in enumerate(legacy_names) if n not in known]
+    store.append([legacy_names[i] for i in keep], legacy_matrix[keep])
+    legacy.rename(legacy.with_name(legacy.name + MIGRATED_SUFFIX))
+    return len(keep)
+
+
+def missing_embeddings(output_path: Path, names: list[str], model: str = EMBED_MODEL) -> list[str]:
+    known = embedding_store(output_path, model).lookup()
+    return list(dict.fromkeys(n for n in names if n not in known))
+
+
+def _embed_chunk(model: str, chunk: list[str]) -> np.ndarray:
+    if model == OFFLINE_EMBED_MODEL:
+        return offline_embed(chunk)
+    return np.array(embed(model=model, input=chunk).embeddings, dtype=np.float32)
+
+
 def ensure_embeddings(
     output_path: Path,
     names: list[str],
+    model: str = EMBED_MODEL,
+    progress: Callable[[int, int], None] | None = None,
 ) -> tuple[list[str], np.ndarray]:
-    cached_names, cached_matrix = load_embeddings_cache(output_path)
-    cached_lookup = {n: i for i, n in enumerate(cached_names)}
-
-    new_names = [n for n in names if n not in cached_lookup]
-    if not new_names:
-        return cached_names, cached_matrix
-
-    response = embed(model=EMBED_MODEL, input=new_names)
-    new_vectors = np.array(response.embeddings, dtype=np.float32)
-
-    if cached_matrix is not None:
-        updated_names = cached_names + new_names
-        updated_matrix = np.vstack([cached_matrix, new_vectors])
-    else:
-        updated_names = new_names
-        updated_matrix = new_vectors
+    store = embedding_store(output_path, model)
+    new_names = missing_embeddings(output_path, names, model)
+    if new_names:
+        chunks = [new_names[i : i + EMBED_CHUNK_SIZE] for i in range(0, len(new_names), EMBED_CHUNK_SIZE)]
+        done = 0
+        with ThreadPoolExecutor(max_workers=min(EMBED_CONCURRENCY, len(chunks)), thread_name_prefix="embed") as pool:
+            futures = {pool.submit(_embed_chunk, model, chunk): chunk for chunk in chunks}
+            try:
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    store.append(chunk, future.result())
+                    done += len(chunk)
+                    if progress is not None:
+                        progress(done, len(new_names))
+            finally:
+                for future in futures:
+                    future.cancel()
 
-    save_embeddings_cache(output_path, updated_names, updated_matrix)
-    return updated_names, updated_matrix
+    return store.names(), store.matrix()
 
 
 def find_similar_names(
@@ -1,17 +1,63 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
 from pathlib import Path
 
 import numpy as np
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
+from scipy.sparse import csr_matrix
 from sklearn.cluster import DBSCAN
-from sklearn.metrics.pairwise import cosine_distances
 
-from name_similarity import DEFAULT_THRESHOLD, ensure_embeddings, levenshtein_similarity
+from name_similarity import DEFAULT_THRESHOLD, active_embedding_model, ensure_embeddings
+
+BLOCK_BYTES = 64 * 1024 * 1024
+GRAPH_CACHE_SIZE = 4
+CLUSTER_CACHE_SIZE = 32
+DISTANCE_TOLERANCE = 1e-5
+
+_graph_cache: OrderedDict[tuple, tuple[float, csr_matrix]] = OrderedDict()
+_cluster_cache: OrderedDict[tuple, dict[int, list[str]]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _block_rows(n: int) -> int:
+    return max(1, BLOCK_BYTES // (4 * max(n, 1)))
+
+
+def names_fingerprint(sorted_names: list[str]) -> str:
+    h = hashlib.sha256()
+    for name in sorted_names:
+        h.update(name.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _remember(cache: OrderedDict, key: tuple, value, size: int) -> None:
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > size:
+        cache.popitem(last=False)
+
+
+def _restrict_graph(graph: csr_matrix, eps: float) -> csr_matrix:
+    coo = graph.tocoo()
+    keep = coo.data <= eps
+    return csr_matrix((coo.data[keep], (coo.row[keep], coo.col[keep])), shape=graph.shape, dtype=np.float32)
+
+
+def clear_normalize_cache() -> None:
+    with _cache_lock:
+        _graph_cache.clear()
+        _cluster_cache.clear()
 
 
 class NormalizeEngine:
     label: str = ""
 
     def _cluster(
-        self, dist_matrix: np.ndarray, eps: float, names: list[str]
+        self, dist_matrix: np.ndarray | csr_matrix, eps: float, names: list[str]
     ) -> dict[int, list[str]]:
         labels = DBSCAN(eps=eps, min_samples=2, metric="precomputed").fit(dist_matrix).labels_
         cluster_map: dict[int, list[str]] = {}
@@ -21,25 +67,95 @@ class NormalizeEngine:
             cluster_map.setdefault(label, []).append(names[i])
         return cluster_map
 
-    def _dist_matrix(self, output_path: Path, all_names: list[str]) -> np.ndarray:
+    def _distance_blocks(
+        self, output_path: Path, all_names: list[str], max_distance: float | None = None
+    ) -> Iterator[tuple[int, np.ndarray]]:
         raise NotImplementedError
 
+    def _dist_matrix(
+        self, output_path: Path, all_names: list[str], max_distance: float | None = None
+    ) -> np.ndarray:
+        blocks = [block for _, block in self._distance_blocks(output_path, all_names, max_distance)]
+        return np.vstack(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+
+    def _radius_graph(self, output_path: Path, all_names: list[str], eps: float) -> csr_matrix:
+        n = len(all_names)
+        rows: list[np.ndarray] = []
+        cols: list[np.ndarray] = []
+        values: list[np.ndarray] = []
+        for start, block in self._distance_blocks(output_path, all_names, eps):
+            r, c = np.nonzero(block <= eps)
+            rows.append(r + start)
+            cols.append(c)
+            values.append(block[r, c])
+        if not rows:
+            return csr_matrix((n, n), dtype=np.float32)
+        return csr_matrix(
+            (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n, n),
+            dtype=np.float32,
+        )
+
+    def cache_key(self, output_path: Path, sorted_names: list[str]) -> tuple:
+        return (type(self).__name__, str(output_path), names_fingerprint(sorted_names))
+
+    def _cached_radius_graph(self, output_path: Path, names: list[str], eps: float, key: tuple) -> csr_matrix:
+        with _cache_lock:
+            cached = _graph_cache.get(key)
+            if cached is not None:
+                _graph_cache.move_to_end(key)
+        if cached is not None and cached[0] >= eps:
+            radius, graph = cached
+            return graph if radius == eps else _restrict_graph(graph, eps)
+        graph = self._radius_graph(output_path, names, eps)
+        with _cache_lock:
+            _remember(_graph_cache, key, (eps, graph), GRAPH_CACHE_SIZE)
+        return graph
+
     def run(
         self, output_path: Path, all_names: list[str], eps: float
     ) -> dict[int, list[str]]:
-        dist_matrix = self._dist_matrix(output_path, all_names)
-        return self._cluster(dist_matrix, eps, all_names)
+        names = sorted(all_names)
+        key = self.cache_key(output_path, names)
+        cluster_key = (*key, float(eps))
+        with _cache_lock:
+            cached = _cluster_cache.get(cluster_key)
+            if cached is not None:
+                _cluster_cache.move_to_end(cluster_key)
+        if cached is None:
+            radius = float(eps) + DISTANCE_TOLERANCE
+            graph = self._cached_radius_graph(output_path, names, radius, key)
+            cached = self._cluster(graph, radius, names)
+            with _cache_lock:
+                _remember(_cluster_cache, cluster_key, cached, CLUSTER_CACHE_SIZE)
+        return {label: list(members) for label, members in cached.items()}
 
 
 class EmbeddingEngine(NormalizeEngine):
     label = "Embedding (cosine)"
 
-    def _dist_matrix(self, output_path: Path, all_names: list[str]) -> np.ndarray:
-        cached_names, cached_matrix = ensure_embeddings(output_path, all_names)
+    def cache_key(self, output_path: Path, sorted_names: list[str]) -> tuple:
+        return (*super().cache_key(output_path, sorted_names), active_embedding_model())
+
+    def _distance_blocks(
+        self, output_path: Path, all_names: list[str], max_distance: float | None = None
+    ) -> Iterator[tuple[int, np.ndarray]]:
+        if not all_names:
+            return
+        cached_names, cached_matrix = ensure_embeddings(output_path, all_names, active_embedding_model())
         cached_lookup = {n: i for i, n in enumerate(cached_names)}
         indices = [cached_lookup[n] for n in all_names]
-        embedding_matrix = cached_matrix[indices]
-        return cosine_distances(embedding_matrix)
+        vectors = np.asarray(cached_matrix[indices], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        n = len(all_names)
+        step = _block_rows(n)
+        for start in range(0, n, step):
+            block = 1.0 - vectors[start : start + step] @ vectors.T
+            np.clip(block, 0.0, 2.0, out=block)
+            local = np.arange(block.shape[0])
+            block[local, start + local] = 0.0
+            yield start, block
 
     def render_slider(self, st, key: str, default: float = DEFAULT_THRESHOLD, on_change=None) -> float:
         step = DEFAULT_THRESHOLD / 20
@@ -59,15 +175,21 @@ class EmbeddingEngine(NormalizeEngine):
 class StringEngine(NormalizeEngine):
     label = "String similarity (Levenshtein)"
 
-    def _dist_matrix(self, output_path: Path, all_names: list[str]) -> np.ndarray:
-        n = len(all_names)
-        dist_matrix = np.zeros((n, n), dtype=np.float64)
-        for i in range(n):
-            for j in range(i + 1, n):
-                d = 1.0 - levenshtein_similarity(all_names[i], all_names[j])
-                dist_matrix[i, j] = d
-                dist_matrix[j, i] = d
-        return dist_matrix
+    def _distance_blocks(
+        self, output_path: Path, all_names: list[str], max_distance: float | None = None
+    ) -> Iterator[tuple[int, np.ndarray]]:
+        step = _block_rows(len(all_names))
+        score_cutoff = None if max_distance is None else max(0.0, 1.0 - max_distance - DISTANCE_TOLERANCE)
+        for start in range(0, len(all_names), step):
+            similarity = process.cdist(
+                all_names[start : start + step],
+                all_names,
+                scorer=Levenshtein.normalized_similarity,
+                dtype=np.float32,
+                workers=-1,
+                score_cutoff=score_cutoff,
+            )
+            yield start, 1.0 - similarity
 
     def render_slider(self, st, key: str, default: int = 80, on_change=None) -> float:
         pct = st.slider(
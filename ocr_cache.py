@@ -0,0 +1,65 @@
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+from extraction_cache import CACHE_DIRNAME
+from models import OcrResult
+
+CACHE_FILENAME = "ocr.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    content_hash TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    structured INTEGER NOT NULL,
+    variant TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (content_hash, provider, structured, variant)
+);
+"""
+
+
+def image_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@contextmanager
+def _cache(output_path: Path):
+    path = output_path / CACHE_DIRNAME / CACHE_FILENAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def get_cached_ocr(
+    output_path: Path, content_hash: str, provider: str, structured: bool, variant: str = ""
+) -> OcrResult | None:
+    with _cache(output_path) as conn:
+        row = conn.execute(
+            "SELECT value FROM results WHERE content_hash = ? AND provider = ? AND structured = ? AND variant = ?",
+            (content_hash, provider, int(structured), variant),
+        ).fetchone()
+    return OcrResult.model_validate_json(row[0]) if row else None
+
+
+def put_cached_ocr(
+    output_path: Path, content_hash: str, provider: str, structured: bool, result: OcrResult, variant: str = ""
+) -> None:
+    if not result.succeeded:
+        return
+    with _cache(output_path) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO results (content_hash, provider, structured, variant, value) VALUES (?, ?, ?, ?, ?)",
+            (content_hash, provider, int(structured), variant, result.model_dump_json(exclude_none=True)),
+        )
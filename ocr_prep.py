@@ -0,0 +1,166 @@
+import hashlib
+import math
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageOps
+from pydantic import BaseModel
+
+from blank_pages import BLANK_MARGIN, INK_DELTA
+from extraction_cache import CACHE_DIRNAME
+from models import DetectedBox
+
+PREP_DIRNAME = "ocr_ready"
+PREP_VERSION = 1
+DEFAULT_MAX_EDGE = 1600
+PREP_QUALITY = 90
+ANALYSIS_SIZE = 512
+CROP_PADDING = 0.02
+MIN_INK_LINE = 0.005
+MAX_SKEW = 5.0
+SKEW_STEPS = (1.0, 0.25)
+
+
+class PreparedImage(BaseModel):
+    path: Path
+    source_size: tuple[int, int]
+    crop: tuple[int, int, int, int]
+    angle: float
+    rotated_size: tuple[int, int]
+    size: tuple[int, int]
+
+
+def prep_variant(max_edge: int) -> str:
+    return f"prep-v{PREP_VERSION}-{max_edge}"
+
+
+def prepared_path(cache_root: Path, source: Path, max_edge: int) -> Path:
+    digest = hashlib.sha1(str(source.resolve()).encode("utf-8")).hexdigest()[:20]
+    return cache_root / CACHE_DIRNAME / PREP_DIRNAME / f"{digest}_{prep_variant(max_edge)}.jpg"
+
+
+def _ink_mask(gray: Image.Image) -> np.ndarray:
+    pixels = np.asarray(gray, dtype=np.int16)
+    mask = np.abs(pixels - np.median(pixels)) > INK_DELTA
+    h, w = mask.shape
+    dy, dx = int(h * BLANK_MARGIN), int(w * BLANK_MARGIN)
+    mask[:dy], mask[h - dy:], mask[:, :dx], mask[:, w - dx:] = False, False, False, False
+    return mask
+
+
+def _ink_bounds(mask: np.ndarray) -> tuple[int, int, int, int] | None:
+    h, w = mask.shape
+    rows = np.flatnonzero(mask.sum(axis=1) > MIN_INK_LINE * w)
+    cols = np.flatnonzero(mask.sum(axis=0) > MIN_INK_LINE * h)
+    if not len(rows) or not len(cols):
+        return None
+    pad_y, pad_x = int(h * CROP_PADDING), int(w * CROP_PADDING)
+    return max(0, cols[0] - pad_x), max(0, rows[0] - pad_y), min(w, cols[-1] + 1 + pad_x), min(h, rows[-1] + 1 + pad_y)
+
+
+def _profile_score(mask: Image.Image, angle: float) -> float:
+    rotated = np.asarray(mask.rotate(angle, resample=Image.Resampling.NEAREST, expand=True), dtype=np.float32)
+    return float(np.var(rotated.sum(axis=1)))
+
+
+def estimate_skew(mask: np.ndarray) -> float:
+    if not mask.any():
+        return 0.0
+    image = Image.fromarray(mask.astype(np.uint8) * 255)
+    best, best_score = 0.0, _profile_score(image, 0.0)
+    center, span = 0.0, MAX_SKEW
+    for step in SKEW_STEPS:
+        for angle in np.arange(center - span, center + span + step / 2, step):
+            angle = round(float(angle), 4)
+            score = _profile_score(image, angle)
+            if score > best_score:
+                best, best_score = angle, score
+        center, span = best, step
+    return best
+
+
+def _render(source: Path, target: Path, max_edge: int) -> PreparedImage:
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img).convert("RGB")
+    width, height = img.size
+    gray = img.convert("L")
+    gray.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE))
+    scale = width / gray.width
+    mask = _ink_mask(gray)
+    bounds = _ink_bounds(mask)
+    if bounds is None:
+        crop = (0, 0, width, height)
+    else:
+        left, top, right, bottom = bounds
+        mask = mask[top:bottom, left:right]
+        crop = (
+            int(left * scale),
+            int(top * scale),
+            min(width, math.ceil(right * scale)),
+            min(height, math.ceil(bottom * scale)),
+        )
+    angle = estimate_skew(mask)
+    page = img.crop(crop)
+    if angle:
+        page = page.rotate(angle, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=(255, 255, 255))
+    rotated_size = page.size
+    page.thumbnail((max_edge, max_edge))
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    page.save(tmp, "JPEG", quality=PREP_QUALITY)
+    prepared = PreparedImage(
+        path=target,
+        source_size=(width, height),
+        crop=crop,
+        angle=angle,
+        rotated_size=rotated_size,
+        size=page.size,
+    )
+    meta = target.with_suffix(".json")
+    meta_tmp = meta.with_name(f"{meta.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    meta_tmp.write_text(prepared.model_dump_json(), encoding="utf-8")
+    os.replace(tmp, target)
+    os.replace(meta_tmp, meta)
+    return prepared
+
+
+def prepare_ocr_image(cache_root: Path, source: Path, max_edge: int = DEFAULT_MAX_EDGE) -> PreparedImage:
+    target = prepared_path(cache_root, source, max_edge)
+    meta = target.with_suffix(".json")
+    try:
+        if meta.stat().st_mtime_ns >= source.stat().st_mtime_ns and target.exists():
+            return PreparedImage.model_validate_json(meta.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        pass
+    return _render(source, target, max_edge)
+
+
+def _to_source_point(x: float, y: float, prepared: PreparedImage) -> tuple[float, float]:
+    rot_w, rot_h = prepared.rotated_size
+    px = x / 1000 * rot_w - rot_w / 2
+    py = y / 1000 * rot_h - rot_h / 2
+    left, top, right, bottom = prepared.crop
+    theta = math.radians(prepared.angle)
+    cx = px * math.cos(theta) - py * math.sin(theta) + (right - left) / 2
+    cy = px * math.sin(theta) + py * math.cos(theta) + (bottom - top) / 2
+    width, height = prepared.source_size
+    return (left + cx) / width * 1000, (top + cy) / height * 1000
+
+
+def _clamp(value: float) -> int:
+    return int(round(min(1000.0, max(0.0, value))))
+
+
+def to_source_boxes(boxes: list[DetectedBox], prepared: PreparedImage) -> list[DetectedBox]:
+    mapped = []
+    for box in boxes:
+        coords = []
+        for coord in box.coords:
+            x1, y1, x2, y2 = coord[:4]
+            corners = [_to_source_point(x, y, prepared) for x, y in ((x1, y1), (x2, y1), (x1, y2), (x2, y2))]
+            xs, ys = [c[0] for c in corners], [c[1] for c in corners]
+            coords.append([_clamp(min(xs)), _clamp(min(ys)), _clamp(max(xs)), _clamp(max(ys))])
+        mapped.append(box.model_copy(update={"coords": coords}))
+    return mapped
@@ -50,6 +50,9 @@ PROMPT_PLAIN = "<image>\nFree OCR. "
 
 
 class DeepseekOcrProvider:
+    MAX_CONCURRENCY = 1
+    INPUT_MAX_EDGE = 2048
+
     def run(self, path: Path, structured: bool = True) -> str:
         model, tokenizer = _load_model()
         return model.infer(
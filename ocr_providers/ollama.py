@@ -5,6 +5,8 @@ from ollama import chat, generate
 
 class OllamaOcrProvider:
     MODEL = "glm-ocr:latest"
+    MAX_CONCURRENCY = None
+    INPUT_MAX_EDGE = 1600
     PROMPT = "Extract all text from this image exactly as shown, preserving layout."
 
     def run(self, path: Path, structured: bool = False) -> str:
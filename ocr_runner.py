@@ -0,0 +1,126 @@
+import traceback
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from models import OcrResult
+from ocr_cache import get_cached_ocr, image_hash, put_cached_ocr
+from ocr_prep import DEFAULT_MAX_EDGE, PreparedImage, prep_variant, prepare_ocr_image, to_source_boxes
+from ocr_providers import OCR_PROVIDERS
+from ocr_providers.deepseek import parse_grounding_output
+
+
+def _provider_cap(provider: str) -> int | None:
+    return getattr(OCR_PROVIDERS[provider], "MAX_CONCURRENCY", None)
+
+
+def effective_concurrency(provider: str, requested: int) -> int:
+    cap = _provider_cap(provider)
+    limit = max(1, requested)
+    return min(limit, cap) if cap else limit
+
+
+def input_max_edge(provider: str, requested: int = 0) -> int:
+    return requested or getattr(OCR_PROVIDERS[provider], "INPUT_MAX_EDGE", DEFAULT_MAX_EDGE)
+
+
+def _to_result(outcome: dict[bool, str | BaseException], prepared: PreparedImage | None = None) -> OcrResult:
+    for value in outcome.values():
+        if isinstance(value, BaseException):
+            return OcrResult(markdown="".join(traceback.format_exception(value)), succeeded=False)
+    boxes = parse_grounding_output(outcome[True]) if True in outcome else None
+    if boxes and prepared is not None:
+        boxes = to_source_boxes(boxes, prepared)
+    return OcrResult(markdown=outcome[False], boxes=boxes)
+
+
+def iter_ocr_results(
+    provider: str,
+    items: Iterable[tuple[str, Path]],
+    structured: bool,
+    concurrency: int = 1,
+    cache_root: Path | None = None,
+    prep_root: Path | None = None,
+    max_edge: int = 0,
+) -> Iterator[tuple[str, OcrResult]]:
+    ocr = OCR_PROVIDERS[provider]
+    limit = effective_concurrency(provider, concurrency)
+    passes = (False, True) if structured else (False,)
+    remaining = iter(items)
+    pending: dict[Future, tuple[str, bool | None]] = {}
+    partial: dict[str, dict[bool, str | BaseException]] = {}
+    paths: dict[str, Path] = {}
+    digests: dict[str, str] = {}
+    prepared: dict[str, PreparedImage | None] = {}
+    edge = input_max_edge(provider, max_edge)
+    variant = prep_variant(edge) if prep_root is not None else ""
+
+    def prepare(path: Path) -> PreparedImage | None:
+        try:
+            return prepare_ocr_image(prep_root, path, edge)
+        except Exception:
+            return None
+
+    def lookup(path: Path) -> tuple[str, OcrResult | None, PreparedImage | None]:
+        digest, cached = "", None
+        if cache_root is not None:
+            digest = image_hash(path)
+            cached = get_cached_ocr(cache_root, digest, provider, structured, variant)
+        return digest, cached, prepare(path) if cached is None and prep_root is not None else None
+
+    cap = _provider_cap(provider)
+    n_workers = min(limit * len(passes), cap) if cap else limit * len(passes)
+
+    with ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="ocr") as pool:
+
+        def submit_passes(key: str, path: Path) -> None:
+            partial[key] = {}
+            ready = prepared.get(key)
+            for structured_pass in passes:
+                pending[pool.submit(ocr.run, ready.path if ready else path, structured=structured_pass)] = (key, structured_pass)
+
+        def submit_next() -> bool:
+            item = next(remaining, None)
+            if item is None:
+                return False
+            key, path = item
+            if cache_root is None and prep_root is None:
+                submit_passes(key, path)
+            else:
+                paths[key] = path
+                pending[pool.submit(lookup, path)] = (key, None)
+            return True
+
+        for _ in range(limit):
+            if not submit_next():
+                break
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key, structured_pass = pending.pop(future)
+                    error = future.exception()
+                    if structured_pass is None:
+                        digest, cached, ready = future.result() if error is None else ("", None, None)
+                        if cached is None:
+                            digests[key] = digest
+                            prepared[key] = ready
+                            submit_passes(key, paths.pop(key))
+                            continue
+                        paths.pop(key)
+                        yield key, cached
+                        submit_next()
+                        continue
+                    partial[key][structured_pass] = error if error is not None else future.result()
+                    if len(partial[key]) < len(passes):
+                        continue
+                    ready = prepared.pop(key, None)
+                    result = _to_result(partial.pop(key), ready)
+                    digest = digests.pop(key, "")
+                    if digest:
+                        put_cached_ocr(cache_root, digest, provider, structured, result, variant if ready else "")
+                    yield key, result
+                    submit_next()
+        finally:
+            for future in pending:
+                future.cancel()
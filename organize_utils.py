@@ -2,8 +2,9 @@ import shutil
 from collections import defaultdict
 from pathlib import Path
 
-from data import delete_sidecar
-from models import ReviewDecision, Sidecar
+from archive_catalog import record_move
+from data import delete_sidecar, load_reorganized_state
+from models import ReviewDecision
 
 FULLWIDTH_COLON = "\uff1a"
 WINDOWS_FORBIDDEN = str.maketrans({
@@ -111,27 +112,7 @@ def plan_accepted_destinations(
 
 
 def apply_reorganize(output_path: Path) -> list[tuple[str, str, str]]:
-    accepted: dict[str, tuple[Sidecar, str]] = {}
-    for year_dir in output_path.iterdir():
-        if not year_dir.is_dir() or not year_dir.name.isdigit():
-            continue
-        for month_dir in year_dir.iterdir():
-            if not month_dir.is_dir() or not (month_dir.name.isdigit() or month_dir.name == "undated"):
-                continue
-            sidecar_paths: list[Path] = []
-            stem_to_datafile: dict[str, Path] = {}
-            for p in month_dir.iterdir():
-                if not p.is_file():
-                    continue
-                if p.suffix == ".json":
-                    sidecar_paths.append(p)
-                else:
-                    stem_to_datafile[p.stem] = p
-            for sidecar_path in sidecar_paths:
-                sidecar = Sidecar.model_validate_json(sidecar_path.read_text(encoding="utf-8"))
-                data_file = stem_to_datafile.get(sidecar_path.stem)
-                rel_path = data_file.relative_to(output_path).as_posix() if data_file else ""
-                accepted[sidecar.original_filename] = (sidecar, rel_path)
+    _, accepted = load_reorganized_state(output_path)
 
     stale: dict[str, ReviewDecision] = {}
     stable_stems: dict[str, set[str]] = defaultdict(set)
@@ -174,6 +155,7 @@ def apply_reorganize(output_path: Path) -> list[tuple[str, str, str]]:
             old_sidecar = old_full.with_suffix(".json")
             if old_sidecar.exists():
                 shutil.move(str(old_sidecar), str(new_full.with_suffix(".json")))
+            record_move(output_path, old_path_str, new_dest)
 
         moves.append((fn, old_path_str, new_dest))
 
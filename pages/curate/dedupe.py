@@ -1,12 +1,14 @@
 import shutil
+from datetime import timedelta
 from pathlib import Path
 
 import streamlit as st
 
 from data import load_reorganized_state, sidecar_path_for
-from dedupe_candidates import find_dedupe_clusters
-from models import ReviewDecision
-from settings import get_config
+from dedupe_candidates import archived_dedupe_pairs
+from image_hash import archived_near_duplicates
+from settings import get_config, update_config
+from thumbnails import thumbnails
 
 st.title("Dedupe")
 
@@ -22,31 +24,115 @@ if not accepted_metadata and not tossed_fns:
     st.info("No organized files found. Run Archive first.")
     st.stop()
 
-records: dict[str, ReviewDecision] = {}
-for fn, (sidecar, _path) in accepted_metadata.items():
-    records[fn] = sidecar.review
+DEDUPE_MODES = ["Time & cost", "Image"]
 
-clusters = find_dedupe_clusters(records)
 
-st.metric("Clusters found", len(clusters))
+def _save_dedupe_mode():
+    update_config(dedupe_mode=st.session_state["dedupe_mode"])
 
-if not clusters:
+
+def _save_dedupe_time_tolerance():
+    update_config(dedupe_time_tolerance_minutes=st.session_state["dedupe_time_tolerance_minutes"])
+
+
+def _save_dedupe_cost_tolerance():
+    update_config(dedupe_cost_tolerance_pct=st.session_state["dedupe_cost_tolerance_pct"])
+
+
+def _save_dedupe_hash_distance():
+    update_config(dedupe_hash_distance=st.session_state["dedupe_hash_distance"])
+
+
+mode = st.radio(
+    "Match by", DEDUPE_MODES, horizontal=True,
+    index=DEDUPE_MODES.index(cfg.dedupe_mode) if cfg.dedupe_mode in DEDUPE_MODES else 0,
+    key="dedupe_mode", on_change=_save_dedupe_mode,
+)
+
+if mode == "Image":
+    max_distance = st.slider(
+        "Max Hamming distance", min_value=0, max_value=7, value=cfg.dedupe_hash_distance,
+        key="dedupe_hash_distance", on_change=_save_dedupe_hash_distance,
+    )
+    with st.spinner("Hashing new images..."):
+        pairs = [
+            (first, second, f"distance {distance}", f"{distance} of 64 hash bits differ")
+            for first, second, distance in archived_near_duplicates(output_path, max_distance)
+        ]
+else:
+    tol_cols = st.columns(2)
+    time_tolerance = tol_cols[0].number_input(
+        "Time window (minutes)", min_value=0, max_value=1440, value=cfg.dedupe_time_tolerance_minutes,
+        key="dedupe_time_tolerance_minutes", on_change=_save_dedupe_time_tolerance,
+    )
+    cost_tolerance = tol_cols[1].number_input(
+        "Cost tolerance (%)", min_value=0.0, max_value=50.0, value=float(cfg.dedupe_cost_tolerance_pct), step=0.5,
+        key="dedupe_cost_tolerance_pct", on_change=_save_dedupe_cost_tolerance,
+    )
+    pairs = [
+        (
+            pair.first,
+            pair.second,
+            f"score {pair.score:.2f}",
+            f"{pair.seconds_apart // 60} min apart · cost Δ {pair.cost_delta:,.2f} · name similarity {pair.name_score:.0%}",
+        )
+        for pair in archived_dedupe_pairs(output_path, timedelta(minutes=time_tolerance), cost_tolerance / 100)
+    ]
+
+st.metric("Candidate pairs", len(pairs))
+
+if not pairs:
     st.success("No potential duplicates found.")
     st.stop()
 
-for idx, cluster in enumerate(clusters):
-    decs = [(fn, records[fn]) for fn in cluster]
-    first = decs[0][1]
-    st.subheader(f"Cluster {idx + 1} — {first.date} ~{first.time}")
-    cols = st.columns(6)
-    for i, (fn, decision) in enumerate(decs):
-        col = cols[i % 6]
+per_page = 10
+total_pages = max(1, (len(pairs) + per_page - 1) // per_page)
+page = min(max(0, st.session_state.get("dedupe_page", 0)), total_pages - 1)
+st.session_state["dedupe_page"] = page
+start = page * per_page
+page_pairs = pairs[start : start + per_page]
+end = start + len(page_pairs)
+
+
+def pagination_ui(suffix: str):
+    col_prev, col_info, col_next = st.columns([1, 3, 1])
+    with col_prev:
+        if st.button("← Prev", key=f"dedupe_prev_{suffix}", disabled=(page == 0), width="stretch"):
+            st.session_state["dedupe_page"] = page - 1
+            st.rerun()
+    with col_info:
+        st.caption(f"Page {page + 1} of {total_pages} — {start + 1}–{end} of {len(pairs)}", text_alignment="center")
+    with col_next:
+        if st.button("Next →", key=f"dedupe_next_{suffix}", disabled=(page >= total_pages - 1), width="stretch"):
+            st.session_state["dedupe_page"] = page + 1
+            st.rerun()
+
+
+def _image_path(fn: str) -> Path | None:
+    path_str = accepted_metadata[fn][1] if fn in accepted_metadata else ""
+    if path_str and (output_path / path_str).exists():
+        return output_path / path_str
+    return None
+
+
+pair_thumbs = thumbnails(
+    output_path,
+    [p for first, second, _, _ in page_pairs for p in (_image_path(first), _image_path(second)) if p],
+)
+
+pagination_ui("top")
+for idx, (first, second, title, detail) in enumerate(page_pairs, start=start):
+    st.subheader(f"Pair {idx + 1} — {title}")
+    st.caption(detail)
+    cols = st.columns(2)
+    for col, fn in zip(cols, (first, second)):
+        decision = accepted_metadata[fn][0].review
         is_tossed = fn in tossed_fns
         with col:
-            label = f"~~{fn}~~\n\n~~{decision.name} — {decision.cost} {decision.currency}~~" if is_tossed else f"**{fn}**\n\n{decision.name} — {decision.cost} {decision.currency}"
+            label = f"~~{fn}~~\n\n~~{decision.name} — {decision.cost} {decision.currency}~~" if is_tossed else f"**{fn}**\n\n{decision.date} {decision.time} · {decision.name} — {decision.cost} {decision.currency}"
             st.markdown(label)
-            if not is_tossed and st.button("Toss", key=f"toss_{fn}", width="stretch"):
-                path_str = accepted_metadata[fn][1] if fn in accepted_metadata else ""
+            if not is_tossed and st.button("Toss", key=f"toss_{idx}_{fn}", width="stretch"):
+                path_str = accepted_metadata[fn][1]
                 if path_str:
                     src = output_path / path_str
                     dst = output_path / "tossed" / fn
@@ -57,9 +143,7 @@ for idx, cluster in enumerate(clusters):
                     if src_sidecar.exists():
                         shutil.move(str(src_sidecar), str(sidecar_path_for(dst)))
                 st.rerun()
-            if not is_tossed:
-                path_str = accepted_metadata[fn][1] if fn in accepted_metadata else ""
-                if path_str:
-                    src = output_path / path_str
-                    if src.exists():
-                        st.image(str(src), width="stretch")
+            img_path = _image_path(fn)
+            if not is_tossed and img_path:
+                st.image(str(pair_thumbs.get(img_path, img_path)), width="stretch")
+pagination_ui("bottom")
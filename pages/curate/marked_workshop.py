@@ -10,16 +10,16 @@ from PIL import Image, ImageEnhance
 
 from box_drawing import draw_all_boxes, draw_field_boxes
 from data import (
-    build_smart_match_history,
+    decision_smart_match_rows,
     load_decisions,
     load_extractions,
     load_reorganized_state,
-    load_smart_match_cache,
     read_sidecar,
-    save_smart_match_cache,
+    smart_match_row,
+    update_smart_match_entries,
     write_sidecar,
 )
-from dedupe_candidates import get_receipts_in_week
+from dedupe_candidates import archived_receipt_index, get_receipts_in_week
 from extraction import EXTRACTORS
 from models import (
     VERDICT_COLORS,
@@ -29,19 +29,20 @@ from models import (
     ReceiptResult,
     ReviewDecision,
     Sidecar,
-    batch_serial_key,
     filename_to_batch_serial,
     load_scan_index,
 )
-from name_similarity import get_smart_match_candidates, quick_apply_label
+from name_similarity import quick_apply_label, smart_match_index
 from ocr_providers import OCR_PROVIDERS, run_ocr
 from ocr_providers.deepseek import parse_grounding_output
 from organize_utils import move_to_accepted_destination
+from review_prefetch import PREFETCH_AHEAD, page_image, prefetch_pages, prefetch_previews, preview_image
 from rules.cost_large_check import cost_large_check
 from rules.cost_zero_check import cost_zero_check
 from rules.currency_uncommon_check import currency_uncommon_check
 from rules.date_check import date_check
 from settings import get_config, update_config
+from thumbnails import thumbnails
 from validation import HintRule, is_date_time_safe_for_archive
 
 HINT_RULES: list[HintRule] = [date_check, cost_zero_check, cost_large_check, currency_uncommon_check]
@@ -110,7 +111,7 @@ workshop_state = st.session_state[workshop_state_key]
 # --- Load and transform image ---
 
 img_path = marked_dir / selected
-original = Image.open(str(img_path)).convert("RGB")
+original = preview_image(output_path, img_path)
 
 ROTATION_MAP = {
     90: Image.Transpose.ROTATE_90,
@@ -135,15 +136,12 @@ extraction_phone = extraction.phone if isinstance(extraction, ReceiptResult) els
 
 batch_extractions = load_extractions(output_path)
 batch_decisions = load_decisions(output_path)
-smart_cache_data = load_smart_match_cache(output_path)
-workshop_smart_history = build_smart_match_history(
-    batch_extractions, batch_decisions, smart_cache_data
-)
-workshop_candidates = get_smart_match_candidates(
-    extraction_name, extraction_phone, workshop_smart_history
+workshop_smart_index = smart_match_index(
+    output_path, decision_smart_match_rows(batch_extractions, batch_decisions)
 )
+workshop_candidates = workshop_smart_index.candidates(extraction_name, extraction_phone)
 workshop_quick = [c for c in workshop_candidates if c.quick_apply]
-workshop_confirmed_names = {r.confirmed for r in workshop_smart_history}
+workshop_confirmed_names = workshop_smart_index.confirmed_names()
 workshop_best_name_sim = max(
     (c.name_score for c in workshop_candidates), default=None
 )
@@ -208,30 +206,37 @@ orig_col, work_col, ocr_col, review_col = st.columns([1, 1, 1, 1])
 # Column 1: Original image
 with orig_col:
     st.markdown("**Original**")
-    st.image(original, width="stretch")
-    working_image = original
+    st.image(page_image(output_path, (img_path, 1, None, {})), width="stretch")
 
     orientation = st.radio("Orientation", ["↑", "←", "→", "↓"], horizontal=True, key=f"ori_{selected}")
+    enhance = st.radio("Enhance", ["None", "CLAHE", "Contrast + Gamma", "Whiten background"], horizontal=True, key=f"enh_{selected}")
+    if enhance == "CLAHE":
+        clip = st.slider("Clip", 1.0, 10.0, 3.0, 0.5, key=f"clip_{selected}")
+        grid = st.slider("Grid", 2, 16, 8, 1, key=f"grid_{selected}")
+    elif enhance == "Whiten background":
+        l_min = st.slider("Lightness (min)", 128, 255, 200, 1, key=f"wb_L_{selected}")
+        chroma_min = st.slider("Chroma (min)", 1, 80, 10, 1, key=f"wb_chroma_{selected}")
+    elif enhance == "Contrast + Gamma":
+        contrast_val = st.slider("Contrast", 0.5, 3.0, 2.5, 0.1, key=f"ctr_{selected}")
+        gamma_val = st.slider("Gamma", 0.2, 3.0, 0.5, 0.1, key=f"gam_{selected}")
+
+
+def apply_workshop_edits(image: Image.Image) -> Image.Image:
     if orientation == "←":
-        working_image = original.transpose(ROTATION_MAP[270])
+        image = image.transpose(ROTATION_MAP[270])
     elif orientation == "→":
-        working_image = original.transpose(ROTATION_MAP[90])
+        image = image.transpose(ROTATION_MAP[90])
     elif orientation == "↓":
-        working_image = original.transpose(ROTATION_MAP[180])
+        image = image.transpose(ROTATION_MAP[180])
 
-    enhance = st.radio("Enhance", ["None", "CLAHE", "Contrast + Gamma", "Whiten background"], horizontal=True, key=f"enh_{selected}")
     if enhance == "CLAHE":
-        clip = st.slider("Clip", 1.0, 10.0, 3.0, 0.5, key=f"clip_{selected}")
-        grid = st.slider("Grid", 2, 16, 8, 1, key=f"grid_{selected}")
-        work_arr = np.array(working_image)
+        work_arr = np.array(image)
         lab = cv2.cvtColor(work_arr, cv2.COLOR_RGB2LAB)
         clahe = cv2.createCLAHE(clipLimit=clip, tileGridSize=(grid, grid))
         lab[:, :, 0] = clahe.apply(lab[:, :, 0])
-        working_image = Image.fromarray(cv2.cvtColor(lab, cv2.COLOR_LAB2RGB))
+        image = Image.fromarray(cv2.cvtColor(lab, cv2.COLOR_LAB2RGB))
     elif enhance == "Whiten background":
-        l_min = st.slider("Lightness (min)", 128, 255, 200, 1, key=f"wb_L_{selected}")
-        chroma_min = st.slider("Chroma (min)", 1, 80, 10, 1, key=f"wb_chroma_{selected}")
-        work_arr = np.array(working_image)
+        work_arr = np.array(image)
         lab = cv2.cvtColor(work_arr, cv2.COLOR_RGB2LAB)
         L, a, b = lab[:, :, 0], lab[:, :, 1], lab[:, :, 2]
         light = L >= l_min
@@ -241,28 +246,42 @@ with orig_col:
         lab[mask, 0] = 255
         lab[mask, 1] = 128
         lab[mask, 2] = 128
-        working_image = Image.fromarray(cv2.cvtColor(lab, cv2.COLOR_LAB2RGB))
+        image = Image.fromarray(cv2.cvtColor(lab, cv2.COLOR_LAB2RGB))
     elif enhance == "Contrast + Gamma":
-        contrast_val = st.slider("Contrast", 0.5, 3.0, 2.5, 0.1, key=f"ctr_{selected}")
-        gamma_val = st.slider("Gamma", 0.2, 3.0, 0.5, 0.1, key=f"gam_{selected}")
-        working_image = ImageEnhance.Contrast(working_image).enhance(contrast_val)
+        image = ImageEnhance.Contrast(image).enhance(contrast_val)
         if gamma_val != 1.0:
             lut = [int(((i / 255.0) ** (1.0 / gamma_val)) * 255) for i in range(256)]
-            working_image = working_image.point(lut * 3)
+            image = image.point(lut * 3)
+    return image
+
+
+working_image = apply_workshop_edits(original)
 
 # Column 2: Working image + rotate/enhance/reprocess
 with work_col:
     st.markdown("**Working Image**")
     active_boxes = workshop_state.get("ocr_boxes") or (sidecar_ocr.boxes if sidecar_ocr else None)
     field_sources = getattr(extraction, "field_sources", {}) if extraction else {}
-    if active_boxes:
-        if field_sources:
-            st.image(draw_field_boxes(working_image, 1, active_boxes, field_sources), width="stretch")
-        else:
-            st.image(draw_all_boxes(working_image, active_boxes), width="stretch")
+    unedited = orientation == "↑" and enhance == "None"
+    if unedited and (field_sources or not active_boxes):
+        st.image(page_image(output_path, (img_path, 1, active_boxes, field_sources)), width="stretch")
+    elif active_boxes and field_sources:
+        st.image(draw_field_boxes(working_image, 1, active_boxes, field_sources), width="stretch")
+    elif active_boxes:
+        st.image(draw_all_boxes(working_image, active_boxes), width="stretch")
     else:
         st.image(working_image, width="stretch")
 
+    upcoming = marked_files[st.session_state.workshop_idx + 1 : st.session_state.workshop_idx + 1 + PREFETCH_AHEAD]
+    prefetch_previews(output_path, [marked_dir / fn for fn in upcoming])
+    upcoming_specs = []
+    for fn in upcoming:
+        upcoming_sidecar = read_sidecar(marked_dir / fn)
+        upcoming_boxes = upcoming_sidecar.ocr.boxes if upcoming_sidecar and upcoming_sidecar.ocr else None
+        upcoming_sources = getattr(upcoming_sidecar.extraction, "field_sources", {}) if upcoming_sidecar else {}
+        upcoming_specs += [(marked_dir / fn, 1, None, {}), (marked_dir / fn, 1, upcoming_boxes, upcoming_sources)]
+    prefetch_pages(output_path, upcoming_specs)
+
     ocr_providers = list(OCR_PROVIDERS.keys())
     default_workshop_ocr_idx = ocr_providers.index(cfg.workshop_ocr_model) if cfg.workshop_ocr_model in ocr_providers else 0
 
@@ -282,7 +301,7 @@ with work_col:
         fd, tmp_str = tempfile.mkstemp(suffix=".png")
         os.close(fd)
         tmp_path = Path(tmp_str)
-        working_image.save(tmp_path)
+        apply_workshop_edits(Image.open(str(img_path)).convert("RGB")).save(tmp_path)
         extract_structured = cfg.extract_structured
         with st.spinner("Running OCR..."):
             plain_raw = run_ocr(tmp_path, provider=ocr_provider, structured=False)
@@ -320,9 +339,7 @@ with work_col:
             else "Corrupted"
         )
         reprocess_phone = new_ext.phone if isinstance(new_ext, ReceiptResult) else ""
-        new_candidates = get_smart_match_candidates(
-            reprocess_name, reprocess_phone, workshop_smart_history
-        )
+        new_candidates = workshop_smart_index.candidates(reprocess_name, reprocess_phone)
         _init_form_widgets(selected, new_ext, new_candidates)
         st.rerun()
 
@@ -504,24 +521,11 @@ with review_col:
                     extraction=final_ext,
                 )
                 write_sidecar(dst, new_sidecar)
-                smart_match_cache = load_smart_match_cache(output_path)
-                if isinstance(final_ext, ReceiptResult):
-                    extracted_name = final_ext.name
-                    extracted_phone = final_ext.phone
-                elif isinstance(final_ext, OtherResult):
-                    extracted_name = final_ext.title
-                    extracted_phone = ""
-                else:
-                    extracted_name = ""
-                    extracted_phone = ""
-                batch_id, serial = new_sidecar.batch_id, new_sidecar.serial
-                cache_key = batch_serial_key(batch_id, serial) if batch_id is not None and serial is not None else selected
-                smart_match_cache[cache_key] = {
-                    "extracted": extracted_name,
-                    "confirmed": decision.name,
-                    "extracted_phone": extracted_phone,
-                }
-                save_smart_match_cache(output_path, smart_match_cache)
+                update_smart_match_entries(
+                    output_path,
+                    [smart_match_row(final_ext, decision.name)],
+                    removed=[smart_match_row(sidecar.extraction, sidecar.review.name)] if sidecar else None,
+                )
                 st.session_state.pop(workshop_state_key, None)
                 st.success(f"Accepted → {dest_rel}")
                 st.rerun()
@@ -545,6 +549,7 @@ if doc_type == "receipt" and date_val and time_val:
     week_receipts = get_receipts_in_week(
         date_val, time_val, decisions,
         include_fn=selected, include_date=date_val, include_time=time_val,
+        index=archived_receipt_index(output_path),
     )
 
 if week_receipts:
@@ -569,6 +574,8 @@ if week_receipts:
         st.rerun()
     ctx_nav[2].caption(f"Week around this receipt — {ctx_start + 1}–{ctx_end} of {len(week_receipts)}")
 
+    adj_found = {fn: _find_image(fn) for fn in adj_window}
+    adj_thumbs = thumbnails(output_path, [p for p in adj_found.values() if p])
     img_cols = st.columns(window_size)
     for i, adj_fn in enumerate(adj_window):
         with img_cols[i]:
@@ -588,9 +595,9 @@ if week_receipts:
                 st.markdown(f'**► {adj_fn}** <span style="color:{verdict_color};font-weight:600;">{verdict_label}</span>{detail}', unsafe_allow_html=True)
             else:
                 st.markdown(f'{adj_fn} <span style="color:{verdict_color};">{verdict_label}</span>{detail}', unsafe_allow_html=True)
-            found = _find_image(adj_fn)
+            found = adj_found[adj_fn]
             if found:
-                st.image(str(found), width="stretch")
+                st.image(str(adj_thumbs[found]), width="stretch")
             else:
                 st.caption("(not found)")
 else:
@@ -635,6 +642,8 @@ if batch_id is not None and batch_id in batch_files_map:
         st.rerun()
     batch_nav[2].caption(f"Batch {batch_id} — showing {window_start + 1}–{window_end} of {len(batch_filenames)}")
 
+    window_found = {fn: _find_image(fn) for fn in window}
+    window_thumbs = thumbnails(output_path, [p for p in window_found.values() if p])
     img_cols = st.columns(5)
     for i, bfn in enumerate(window):
         with img_cols[i]:
@@ -652,10 +661,10 @@ if batch_id is not None and batch_id in batch_files_map:
                 st.markdown(f'**► {bfn}** <span style="color:{verdict_color};font-weight:600;">{verdict_label}</span>', unsafe_allow_html=True)
             else:
                 st.markdown(f'{bfn} <span style="color:{verdict_color};">{verdict_label}</span>', unsafe_allow_html=True)
-            found = _find_image(bfn)
+            found = window_found[bfn]
 
             if found:
-                st.image(str(found), width="stretch")
+                st.image(str(window_thumbs[found]), width="stretch")
             else:
                 st.caption("(not found)")
 else:
@@ -8,14 +8,14 @@ from data import (
     load_distinct_pairs,
     load_name_normalizations,
     load_reorganized_state,
-    load_smart_match_cache,
     read_sidecar,
+    rename_smart_match_confirmed,
     save_decisions,
     save_distinct_pairs,
     save_name_normalizations,
-    save_smart_match_cache,
     write_sidecar,
 )
+from name_similarity import OFFLINE_EMBED_MODEL, active_embedding_model, ensure_embeddings, missing_embeddings
 from normalize_engines import ENGINES
 from organize_utils import apply_reorganize
 from settings import get_config, update_config
@@ -74,6 +74,20 @@ else:
     def _save_string_similarity():
         update_config(normalize_string_similarity=st.session_state[threshold_key])
     eps = engine.render_slider(st, threshold_key, default=cfg.normalize_string_similarity, on_change=_save_string_similarity)
+if selected_engine_id == "embedding":
+    embed_model = active_embedding_model()
+    if embed_model == OFFLINE_EMBED_MODEL:
+        st.caption("Ollama is not reachable; using offline character n-gram embeddings.")
+    n_missing = len(missing_embeddings(output_path, all_names, embed_model))
+    if n_missing:
+        embed_bar = st.progress(0.0, text=f"Embedding {n_missing} new names...")
+        ensure_embeddings(
+            output_path,
+            all_names,
+            embed_model,
+            progress=lambda done, total: embed_bar.progress(done / total, text=f"Embedding names {done}/{total}"),
+        )
+        embed_bar.empty()
 with st.spinner("Running..."):
     cluster_map = engine.run(output_path, all_names, eps)
 
@@ -163,14 +177,7 @@ else:
                 if decisions:
                     save_decisions(output_path, decisions)
 
-                smart_match_cache = load_smart_match_cache(output_path)
-                for fn, entry in smart_match_cache.items():
-                    conf = entry.get("confirmed", "")
-                    new_conf = normalizations.get(conf, conf)
-                    if new_conf != conf:
-                        smart_match_cache[fn] = {**entry, "confirmed": new_conf}
-                if smart_match_cache:
-                    save_smart_match_cache(output_path, smart_match_cache)
+                rename_smart_match_confirmed(output_path, normalizations)
 
                 moves = apply_reorganize(output_path)
                 if moves:
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import streamlit as st
+
+from data import (
+    LEGACY_EXTRACTIONS_FILE,
+    LEGACY_OCR_FILE,
+    LEGACY_SMART_MATCH_FILE,
+    MIGRATED_SUFFIX,
+    SMART_MATCH_HISTORY,
+    migrate_legacy_extractions,
+    migrate_legacy_ocr_results,
+    migrate_legacy_smart_match_cache,
+)
+from name_similarity import EMBED_MODEL, LEGACY_EMBEDDINGS_FILE, migrate_legacy_embeddings
+from settings import get_config
+
+st.title("Migrations")
+
+cfg = get_config()
+batch_dir = cfg.batch_output_path
+
+if not batch_dir:
+    st.info("Set batch output path in Config first.")
+    st.stop()
+
+output_path = Path(batch_dir)
+if not output_path.exists():
+    st.info("Batch output path does not exist.")
+    st.stop()
+
+MIGRATIONS = [
+    ("OCR results", LEGACY_OCR_FILE, "`ocr.log`", migrate_legacy_ocr_results),
+    ("Extractions", LEGACY_EXTRACTIONS_FILE, "`extractions.log`", migrate_legacy_extractions),
+    ("Smart match history", LEGACY_SMART_MATCH_FILE, f"`{SMART_MATCH_HISTORY}`", migrate_legacy_smart_match_cache),
+    ("Name embeddings", LEGACY_EMBEDDINGS_FILE, f"the `{EMBED_MODEL}` embedding store", migrate_legacy_embeddings),
+]
+
+pending = 0
+for label, legacy_name, target_name, migrate in MIGRATIONS:
+    legacy = output_path / legacy_name
+    st.subheader(label)
+    if not legacy.exists():
+        st.success(f"No {legacy_name} to migrate.")
+        continue
+    pending += 1
+    st.write(
+        f"`{legacy_name}` ({legacy.stat().st_size:,} bytes) will be copied into {target_name}. "
+        f"Existing entries are kept and the original is renamed to `{legacy_name}{MIGRATED_SUFFIX}`."
+    )
+    if st.button(f"Migrate {legacy_name}", key=f"migrate_{legacy_name}"):
+        added = migrate(output_path)
+        st.success(f"Migrated {added:,} entries from {legacy_name}.")
+
+if not pending:
+    st.caption("All data is on the current storage format.")
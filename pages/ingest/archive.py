@@ -4,25 +4,28 @@ from pathlib import Path
 import streamlit as st
 
 from data import (
+    EXTRACTIONS_LOG,
+    OCR_LOG,
     build_document_index,
+    clear_extractions,
+    clear_ocr_results,
     load_decisions,
     load_extractions,
     load_ocr_results,
-    load_smart_match_cache,
-    save_smart_match_cache,
     scan_organized_filenames,
+    smart_match_row,
+    update_smart_match_entries,
     write_sidecar,
 )
 from models import (
     DocumentKey,
     OcrResult,
-    OtherResult,
-    ReceiptResult,
     Sidecar,
     batch_serial_key,
     iter_indexed_files,
     load_scan_index,
     parse_batch_serial_key,
+    save_scan_index,
 )
 from organize_utils import plan_accepted_destinations, scan_existing_names
 from settings import get_config
@@ -140,7 +143,7 @@ preview_data = [
 ]
 st.dataframe(preview_data, hide_index=True, width="stretch")
 
-CLEANUP_ARTIFACTS = ["ocr.json", "extractions.json", "decisions.json"]
+CLEANUP_ARTIFACTS = ["decisions.json"]
 
 if st.button("Archive", width="stretch", type="primary"):
     for key, dest in file_destinations.items():
@@ -165,30 +168,20 @@ if st.button("Archive", width="stretch", type="primary"):
         )
         write_sidecar(dst, sidecar)
 
-    smart_match_cache = load_smart_match_cache(output_path)
-    for doc_key in doc_keys_to_archive:
-        extraction = extractions.get(doc_key)
-        decision = decisions_to_archive[doc_key]
-        extracted_phone = ""
-        if isinstance(extraction, ReceiptResult):
-            extracted = extraction.name
-            extracted_phone = extraction.phone
-        elif isinstance(extraction, OtherResult):
-            extracted = extraction.title
-        else:
-            extracted = ""
-        smart_match_cache[doc_key] = {
-            "extracted": extracted,
-            "confirmed": decision.name,
-            "extracted_phone": extracted_phone,
-        }
-    save_smart_match_cache(output_path, smart_match_cache)
+    update_smart_match_entries(
+        output_path,
+        [smart_match_row(extractions.get(doc_key), decisions_to_archive[doc_key].name) for doc_key in doc_keys_to_archive],
+    )
 
     for batch in complete_batches:
         batch.archived = True
-    (output_path / "batches.json").write_text(scan_index.model_dump_json(indent=2), encoding="utf-8")
+    save_scan_index(output_path, scan_index)
 
     cleaned = []
+    for log_name, clear_log in ((OCR_LOG, clear_ocr_results), (EXTRACTIONS_LOG, clear_extractions)):
+        if (output_path / log_name).exists():
+            clear_log(output_path)
+            cleaned.append(log_name)
     for artifact in CLEANUP_ARTIFACTS:
         p = output_path / artifact
         if p.exists():
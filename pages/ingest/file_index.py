@@ -1,4 +1,3 @@
-from datetime import datetime
 from pathlib import Path
 
 import streamlit as st
@@ -12,17 +11,18 @@ from data import (
     replace_groups_for_batch,
     save_decisions,
 )
-from indexing_schemes import SCHEMES, parse_canon_filename
+from indexing_schemes import SCHEMES, plan_new_batches
 from models import (
     DocumentKey,
     ReviewDecision,
-    ScanBatch,
     ScanIndex,
     batch_serial_key,
     filename_to_batch_serial,
     load_scan_index,
+    save_scan_index,
 )
 from settings import IMAGE_EXTENSIONS, get_config, update_config
+from thumbnails import thumbnails
 
 st.title("File Index")
 
@@ -78,25 +78,20 @@ if unindexed_filenames:
         on_change=_save_indexing_scheme,
         help="Only unindexed files are passed to the scheme. Already-indexed files are never reassigned.",
     )
-    scheme = SCHEMES[scheme_name]
-    new_batches_rel, scheme_skipped, warnings = scheme(unindexed_filenames)
+    new_batches, scheme_skipped, warnings, before_last = plan_new_batches(scheme_name, unindexed_filenames, existing_index)
 
     has_error = False
-    if scheme_name == "Canon ImageFormula" and existing_index and existing_index.batches and new_batches_rel:
+    if before_last:
+        has_error = True
         last_batch = existing_index.batches[-1]
-        last_end = datetime.strptime(last_batch.end_datetime, "%Y-%m-%d %H:%M:%S")
-        unindexed_parsed = [(parse_canon_filename(fn), fn) for fn in unindexed_filenames if fn not in scheme_skipped]
-        before_last = [fn for (p, fn) in unindexed_parsed if p and p[0] < last_end]
-        if before_last:
-            has_error = True
-            st.error(
-                f"{len(before_last)} unindexed file(s) have timestamps before the last batch's end "
-                f"({last_batch.end_datetime}). This indicates files were missed. "
-                f"Delete batches.json and rebuild from scratch to fix."
-            )
-            with st.expander("Offending files"):
-                for fn in before_last:
-                    st.text(f"  {fn}")
+        st.error(
+            f"{len(before_last)} unindexed file(s) have timestamps before the last batch's end "
+            f"({last_batch.end_datetime}). This indicates files were missed. "
+            f"Delete batches.json and rebuild from scratch to fix."
+        )
+        with st.expander("Offending files"):
+            for fn in before_last:
+                st.text(f"  {fn}")
 
     if scheme_skipped:
         with st.expander(f"{len(scheme_skipped)} skipped by scheme (not assigned)"):
@@ -110,16 +105,6 @@ if unindexed_filenames:
     if has_error:
         st.stop()
 
-    start_batch_id = existing_index.batches[-1].batch_id + 1 if existing_index and existing_index.batches else 1
-    new_batches: list[ScanBatch] = []
-    for i, b in enumerate(new_batches_rel):
-        new_batches.append(ScanBatch(
-            batch_id=start_batch_id + i,
-            start_datetime=b.start_datetime,
-            end_datetime=b.end_datetime,
-            files=b.files,
-        ))
-
     if new_batches:
         st.subheader("Confirm batches")
         for b in new_batches:
@@ -130,8 +115,7 @@ if unindexed_filenames:
         if st.button("Confirm Batches", width="stretch", type="primary"):
             output_path.mkdir(parents=True, exist_ok=True)
             final_batches = (existing_index.batches + new_batches) if existing_index else new_batches
-            index = ScanIndex(batches=final_batches)
-            (output_path / "batches.json").write_text(index.model_dump_json(indent=2), encoding="utf-8")
+            save_scan_index(output_path, ScanIndex(batches=final_batches))
             st.success(f"Added {len(new_batches)} batch(es). Configure document grouping below.")
             st.rerun()
 
@@ -324,6 +308,10 @@ if non_archived:
     st.session_state[page_key] = page
     _render_pagination(page, n_pages, page_key, selected_batch_id, "top")
     row_start_page = page * ROWS_PER_PAGE * 6
+    page_thumbs = thumbnails(
+        output_path,
+        [input_path / key_to_item[k][2] for k in keys[row_start_page:row_start_page + ROWS_PER_PAGE * 6] if (input_path / key_to_item[k][2]).exists()],
+    )
     for row_idx in range(ROWS_PER_PAGE):
         row_start = row_start_page + row_idx * 6
         if row_start >= len(keys):
@@ -336,11 +324,10 @@ if non_archived:
             with cols[2 * j]:
                 if img_path.exists():
                     try:
-                        img = Image.open(str(img_path)).convert("RGB")
                         img_btn_cols = st.columns(4)
                         for oi, orient in enumerate(["←", "→", "↓"]):
                             if img_btn_cols[oi].button(orient, key=f"dir_{selected_batch_id}_{key}_{orient}"):
-                                corrected = _apply_orientation(img, orient)
+                                corrected = _apply_orientation(Image.open(str(img_path)).convert("RGB"), orient)
                                 corrected.save(str(img_path))
                                 rerun = True
 
@@ -371,7 +358,7 @@ if non_archived:
                                     st.session_state.doc_grouping_links_by_batch.pop(selected_batch_id, None)
                                 rerun = True
 
-                        st.image(img, caption=f"{key} {fn}", width="stretch")
+                        st.image(str(page_thumbs.get(img_path, img_path)), caption=f"{key} {fn}", width="stretch")
                     except Exception:
                         st.caption(f"{key} {fn}")
                 else:
@@ -1,14 +1,27 @@
 import random
-import traceback
 from pathlib import Path
 
 import streamlit as st
 
-from data import load_ocr_results, save_ocr_results
+from blank_pages import skip_blank_pages
+from data import (
+    OCR_LOG,
+    append_extraction,
+    append_ocr_result,
+    build_document_index,
+    clear_ocr_results,
+    load_decisions,
+    load_extractions,
+    load_ocr_results,
+    save_ocr_results,
+)
+from extraction import EXTRACTORS
+from extraction_runner import RateLimiter
 from models import OcrResult, batch_serial_key, iter_indexed_files, load_scan_index
 from ocr_providers import OCR_PROVIDERS, teardown_ocr
-from ocr_providers.deepseek import parse_grounding_output
+from ocr_runner import effective_concurrency, input_max_edge, iter_ocr_results
 from settings import get_config, update_config
+from stream_runner import iter_overlapped, streamable_doc_keys
 from streamlit_progress import ProgressBar
 
 st.title("OCR")
@@ -31,7 +44,7 @@ if not index_file.exists():
 scan_index = load_scan_index(output_path)
 indexed_items = iter_indexed_files(scan_index, include_archived=False)
 loaded = load_ocr_results(output_path)
-results_file = output_path / "ocr.json"
+results_file = output_path / OCR_LOG
 non_archived_batches = [batch for batch in scan_index.batches if not batch.archived]
 
 providers = list(OCR_PROVIDERS.keys())
@@ -41,12 +54,67 @@ def _save_ocr_model():
     update_config(ocr_model=st.session_state["ocr_provider"])
 
 ocr_provider = st.selectbox("OCR Model", providers, index=default_ocr_idx, key="ocr_provider", on_change=_save_ocr_model)
+
+
+def _save_ocr_concurrency():
+    update_config(ocr_concurrency=int(st.session_state["ocr_concurrency"]))
+
+
+ocr_concurrency = st.number_input(
+    "Concurrent images",
+    min_value=1,
+    max_value=32,
+    value=cfg.ocr_concurrency,
+    step=1,
+    key="ocr_concurrency",
+    on_change=_save_ocr_concurrency,
+    help="Images kept in flight at once. Match OLLAMA_NUM_PARALLEL on the server. DeepSeek always runs one at a time.",
+)
+
+extractors = list(EXTRACTORS.keys())
+extractor_name = cfg.extractor_model if cfg.extractor_model in extractors else extractors[0]
+overlap_parse = st.checkbox(
+    "Parse documents as their pages finish",
+    help=f"Runs {extractor_name} (from the Parse page) alongside OCR. Documents already parsed or tossed are skipped.",
+)
 mode = st.radio(
     "Mode",
     ["Process all", "Clear results and reprocess", "Process by batch"],
     horizontal=True,
 )
 
+use_cache = st.checkbox(
+    "Reuse cached OCR for identical images",
+    value=mode != "Clear results and reprocess",
+    help="Images are matched by content hash per OCR model and structured setting, so re-indexed or re-scanned copies skip OCR. Rotating an image invalidates its entry.",
+)
+
+
+def _save_ocr_prepare_images():
+    update_config(ocr_prepare_images=st.session_state["ocr_prepare_images"])
+
+
+prepare_images = st.checkbox(
+    "Send OCR-ready copies",
+    value=cfg.ocr_prepare_images,
+    key="ocr_prepare_images",
+    on_change=_save_ocr_prepare_images,
+    help=f"Crops margins, deskews and caps the long edge at {input_max_edge(ocr_provider, cfg.ocr_max_edge)} px before OCR. Copies are cached under .cache/ocr_ready; boxes are mapped back to the original scan.",
+)
+
+
+def _save_ocr_skip_blank_pages():
+    update_config(ocr_skip_blank_pages=st.session_state["ocr_skip_blank_pages"])
+
+
+skip_blank = st.checkbox(
+    "Skip blank pages",
+    value=cfg.ocr_skip_blank_pages,
+    key="ocr_skip_blank_pages",
+    on_change=_save_ocr_skip_blank_pages,
+    help="Checks each image for ink before OCR. Blank pages get an empty OCR result, and documents whose pages are all blank are tossed unless they already have a review decision.",
+)
+
 if mode == "Process by batch":
     if not non_archived_batches:
         st.info("No non-archived batches available.")
@@ -111,25 +179,81 @@ if not to_process:
     st.info("No images to process.")
     st.stop()
 
+if mode == "Clear results and reprocess":
+    clear_ocr_results(output_path)
+
+if skip_blank:
+    with st.spinner("Checking for blank pages..."):
+        n_before = len(to_process)
+        to_process, blank_results, blank_docs = skip_blank_pages(
+            output_path, to_process, {batch_serial_key(b, s) for b, s, _ in scoped_items}
+        )
+    if len(to_process) < n_before:
+        existing.update(blank_results)
+        st.info(f"Skipped {n_before - len(to_process)} blank page(s): tossed {len(blank_docs)} blank document(s).")
+    if not to_process:
+        save_ocr_results(output_path, existing)
+        st.success("All remaining images were blank.")
+        st.stop()
+
 random.shuffle(to_process)
-st.info(f"Processing {len(to_process)} images...")
+n_workers = effective_concurrency(ocr_provider, int(ocr_concurrency))
+st.info(f"Processing {len(to_process)} images ({n_workers} in flight)...")
 
 new_results: dict[str, OcrResult] = {}
-bar = ProgressBar(len(to_process))
-for key, img_path in to_process:
-    try:
-        markdown = OCR_PROVIDERS[ocr_provider].run(img_path, structured=False)
-        boxes = None
-        if cfg.extract_structured:
-            structured_raw = OCR_PROVIDERS[ocr_provider].run(img_path, structured=True)
-            boxes = parse_grounding_output(structured_raw)
-        new_results[key] = OcrResult(markdown=markdown, boxes=boxes)
-        bar.tick(True)
-    except Exception:
-        new_results[key] = OcrResult(markdown=traceback.format_exc(), succeeded=False)
-        bar.tick(False)
-    merged = existing | new_results
-    save_ocr_results(output_path, merged)
+n_parsed = 0
+if overlap_parse:
+    decisions = load_decisions(output_path)
+    skip_docs = set(load_extractions(output_path)) | {k for k, d in decisions.items() if d.verdict == "tossed"}
+    index = build_document_index(output_path, {batch_serial_key(b, s) for b, s, _ in scoped_items})
+    parse_docs = streamable_doc_keys(index, set(existing), {k for k, _ in to_process}, skip_docs)
+    st.caption("OCR")
+    bar = ProgressBar(len(to_process))
+    st.caption(f"Parse ({extractor_name})")
+    parse_bar = ProgressBar(max(1, len(parse_docs)))
+    events = iter_overlapped(
+        ocr_provider,
+        to_process,
+        cfg.extract_structured,
+        n_workers,
+        index,
+        existing,
+        extractor_name,
+        cfg.parse_custom_instruction,
+        skip_docs,
+        parse_concurrency=cfg.parse_concurrency,
+        limiter=RateLimiter(cfg.parse_requests_per_minute, cfg.parse_tokens_per_minute),
+        cache_root=output_path if use_cache else None,
+        prep_root=output_path if prepare_images else None,
+        max_edge=cfg.ocr_max_edge,
+    )
+    for stage, key, payload in events:
+        if stage == "ocr":
+            new_results[key] = payload
+            append_ocr_result(output_path, key, payload)
+            bar.tick(payload.succeeded)
+        elif isinstance(payload, Exception):
+            parse_bar.tick(False)
+        else:
+            append_extraction(output_path, key, payload)
+            n_parsed += 1
+            parse_bar.tick(True)
+else:
+    bar = ProgressBar(len(to_process))
+    for key, result in iter_ocr_results(
+        ocr_provider,
+        to_process,
+        cfg.extract_structured,
+        n_workers,
+        output_path if use_cache else None,
+        output_path if prepare_images else None,
+        cfg.ocr_max_edge,
+    ):
+        new_results[key] = result
+        append_ocr_result(output_path, key, result)
+        bar.tick(result.succeeded)
+
+save_ocr_results(output_path, existing | new_results)
 
 teardown_ocr(ocr_provider)
 
@@ -137,4 +261,5 @@ n_fails_total = sum(1 for r in new_results.values() if not r.succeeded)
 st.success(
     f"Done! Ran OCR on {len(new_results)} image(s) "
     f"({len(existing) + len(new_results)} in merged results, {n_fails_total} failed this run). Saved to {results_file}"
+    + (f" Parsed {n_parsed} document(s)." if overlap_parse else "")
 )
@@ -1,17 +1,20 @@
 import random
-import time
 from pathlib import Path
 
 import streamlit as st
 
 from data import (
+    append_extraction,
     build_document_index,
+    clear_extractions,
     load_decisions,
     load_extractions,
     load_ocr_results,
     save_extractions,
 )
 from extraction import EXTRACTORS
+from extraction_cache import extraction_cache_stats
+from extraction_runner import RateLimiter, iter_extractions
 from models import OcrResult, batch_serial_key, iter_indexed_files, load_scan_index
 from settings import get_config, update_config
 from streamlit_progress import ProgressBar
@@ -67,6 +70,48 @@ st.text_area(
     on_change=_save_parse_custom_instruction,
 )
 
+
+def _save_parse_limits():
+    update_config(
+        parse_concurrency=int(st.session_state["parse_concurrency"]),
+        parse_requests_per_minute=int(st.session_state["parse_requests_per_minute"]),
+        parse_tokens_per_minute=int(st.session_state["parse_tokens_per_minute"]),
+    )
+
+
+col_k, col_rpm, col_tpm = st.columns(3)
+parse_concurrency = col_k.number_input(
+    "Concurrent requests",
+    min_value=1,
+    max_value=64,
+    value=cfg.parse_concurrency,
+    step=1,
+    key="parse_concurrency",
+    on_change=_save_parse_limits,
+)
+requests_per_minute = col_rpm.number_input(
+    "Requests per minute (0 = unlimited)",
+    min_value=0,
+    value=cfg.parse_requests_per_minute,
+    step=10,
+    key="parse_requests_per_minute",
+    on_change=_save_parse_limits,
+)
+tokens_per_minute = col_tpm.number_input(
+    "Tokens per minute (0 = unlimited)",
+    min_value=0,
+    value=cfg.parse_tokens_per_minute,
+    step=10000,
+    key="parse_tokens_per_minute",
+    on_change=_save_parse_limits,
+)
+
+use_cache = st.checkbox(
+    "Reuse cached extractions",
+    value=True,
+    help="Skip the model call when the same model has already seen the exact same prompt.",
+)
+
 mode = st.radio("Mode", ["Process all", "Clear results and reprocess"], horizontal=True)
 if mode == "Clear results and reprocess":
     to_process = list(doc_keys_with_ocr)
@@ -100,6 +145,7 @@ else:
 if run_clicked and to_process:
     if mode == "Clear results and reprocess":
         extractions.clear()
+        clear_extractions(output_path)
 
     parse_custom_instruction = st.session_state.get(
         "parse_custom_instruction", cfg.parse_custom_instruction
@@ -107,23 +153,27 @@ if run_clicked and to_process:
     random.shuffle(to_process)
     bar = ProgressBar(len(to_process))
     failed: list[str] = []
-    last_save = time.time()
-
-    for doc_key in to_process:
-        ocr_text, has_boxes = index.concat_ocr_with_boxes(doc_key, ocr_results_by_key)
-        try:
-            extractions[str(doc_key)] = EXTRACTORS[extractor_name](
-                ocr_text,
-                has_boxes=has_boxes,
-                custom_instruction=parse_custom_instruction,
-            )
-            bar.tick(True)
-        except Exception:
-            failed.append(str(doc_key))
+
+    items = (
+        (str(doc_key), *index.concat_ocr_with_boxes(doc_key, ocr_results_by_key))
+        for doc_key in to_process
+    )
+    limiter = RateLimiter(int(requests_per_minute), int(tokens_per_minute))
+    for key, result in iter_extractions(
+        extractor_name,
+        items,
+        parse_custom_instruction,
+        int(parse_concurrency),
+        limiter,
+        output_path if use_cache else None,
+    ):
+        if isinstance(result, Exception):
+            failed.append(key)
             bar.tick(False)
-        if time.time() - last_save > 15:
-            save_extractions(output_path, extractions)
-            last_save = time.time()
+            continue
+        extractions[key] = result
+        append_extraction(output_path, key, result)
+        bar.tick(True)
     save_extractions(output_path, extractions)
 
     if failed:
@@ -133,5 +183,11 @@ if run_clicked and to_process:
 if run_clicked and not to_process:
     st.info("No items to process.")
 
+cache_stats = extraction_cache_stats(output_path)
+st.caption(
+    f"Extraction cache: {cache_stats.entries} entries ({cache_stats.size_bytes / 1024 / 1024:.1f} MB), "
+    f"{cache_stats.hits} hits / {cache_stats.misses} misses since startup"
+)
+
 if not raw_doc_keys_with_ocr:
     st.info("No OCR results. Run OCR first.")
@@ -6,11 +6,10 @@ from PIL import Image
 from box_drawing import draw_field_boxes
 from data import (
     build_document_index,
-    build_smart_match_history,
+    decision_smart_match_rows,
     load_decisions,
     load_extractions,
     load_ocr_results,
-    load_smart_match_cache,
     save_decisions,
 )
 from models import (
@@ -25,13 +24,14 @@ from models import (
     iter_indexed_files,
     load_scan_index,
 )
-from name_similarity import get_smart_match_candidates, quick_apply_label
+from name_similarity import quick_apply_label, smart_match_index
+from review_prefetch import PREFETCH_AHEAD, PageSpec, page_image, prefetch_pages
 from rules.cost_large_check import cost_large_check
 from rules.cost_zero_check import cost_zero_check
 from rules.currency_uncommon_check import currency_uncommon_check
 from rules.date_check import date_check
 from settings import get_config, update_config
-from validation import HintRule, is_date_time_safe_for_archive
+from validation import HintRule, evaluate_hints, is_date_time_safe_for_archive
 
 st.title("Review")
 
@@ -69,9 +69,8 @@ def _save_parse_custom_instruction():
     update_config(parse_custom_instruction=st.session_state["parse_custom_instruction"])
 
 
-smart_cache = load_smart_match_cache(output_path)
-smart_history = build_smart_match_history(extractions, decisions, smart_cache)
-confirmed_names = {r.confirmed for r in smart_history}
+smart_index = smart_match_index(output_path, decision_smart_match_rows(extractions, decisions))
+confirmed_names = smart_index.confirmed_names()
 
 
 def _review_sort_key(doc_key: str):
@@ -83,8 +82,44 @@ def _review_sort_key(doc_key: str):
     return (0, "")
 
 
+def _smart_query(extraction) -> tuple[str, str]:
+    if isinstance(extraction, ReceiptResult):
+        return extraction.name or "Receipt", extraction.phone
+    if isinstance(extraction, OtherResult):
+        return extraction.title or "Document", ""
+    return "Corrupted", ""
+
+
+QUEUE_ORDERS = ["Name", "Clean first", "Issues first"]
+
 to_review = sorted((doc_key for doc_key in extracted_doc_keys if doc_key not in decisions), key=_review_sort_key)
 total = len(extracted_doc_keys)
+hint_table = evaluate_hints({k: extractions[k] for k in to_review}, HINT_RULES)
+quick_flags = dict(zip(to_review, smart_index.quick_apply_flags([_smart_query(extractions[k]) for k in to_review])))
+severity = hint_table["severity"].to_dict()
+
+
+def _save_review_queue_order():
+    update_config(review_queue_order=st.session_state["review_queue_order"])
+
+
+queue_order = st.radio(
+    "Queue order",
+    QUEUE_ORDERS,
+    index=QUEUE_ORDERS.index(cfg.review_queue_order) if cfg.review_queue_order in QUEUE_ORDERS else 0,
+    horizontal=True,
+    key="review_queue_order",
+    on_change=_save_review_queue_order,
+)
+if queue_order == "Clean first":
+    to_review.sort(key=lambda k: (severity[k], not quick_flags[k]))
+elif queue_order == "Issues first":
+    to_review.sort(key=lambda k: -severity[k])
+severity_counts = hint_table["severity"].value_counts()
+st.caption(
+    f"{severity_counts.get(0, 0)} clean ({sum(quick_flags[k] for k in to_review if severity[k] == 0)} quick-apply) · "
+    f"{severity_counts.get(1, 0)} with warnings · {severity_counts.get(2, 0)} with errors"
+)
 
 verdict_counts = {v: 0 for v in VERDICT_LABELS}
 for d in decisions.values():
@@ -134,6 +169,19 @@ doc_key = DocumentKey.parse(selected) or DocumentKey.from_group([selected])
 selected_keys = index.keys_for_doc(doc_key)
 img_dir = Path(image_dir) if image_dir else None
 
+
+def _page_specs(doc_keys: list[str]) -> list[PageSpec]:
+    specs: list[PageSpec] = []
+    for k in doc_keys:
+        field_sources = getattr(extractions[k], "field_sources", {})
+        for i, file_key in enumerate(index.keys_for_doc(DocumentKey.parse(k) or DocumentKey.from_group([k]))):
+            img_path = img_dir / key_to_filename.get(file_key, file_key)
+            ocr_r = loaded.get(file_key)
+            if img_path.exists():
+                specs.append((img_path, i + 1, ocr_r.boxes if ocr_r else None, field_sources))
+    return specs
+
+
 nav_cols = st.columns([1, 1, 6])
 if nav_cols[0].button("← Prev", disabled=(st.session_state.review_idx == 0)):
     st.session_state.review_idx -= 1
@@ -168,7 +216,7 @@ else:
     default_currency = ""
 
 default_query_phone = extraction.phone if isinstance(extraction, ReceiptResult) else ""
-smart_match_candidates = get_smart_match_candidates(default_name, default_query_phone, smart_history)
+smart_match_candidates = smart_index.candidates(default_name, default_query_phone)
 quick_apply_list = [c for c in smart_match_candidates if c.quick_apply]
 best_name_sim = max((c.name_score for c in smart_match_candidates), default=None)
 
@@ -182,6 +230,7 @@ with ocr_col:
 with image_col:
     field_sources = getattr(extraction, "field_sources", {})
     if img_dir:
+        full_res = st.toggle("Full resolution", key="review_full_res")
         for i, k in enumerate(selected_keys):
             fn = key_to_filename.get(k, k)
             img_path = img_dir / fn
@@ -189,12 +238,16 @@ with image_col:
                 continue
             page_num = i + 1
             ocr_r = loaded.get(k)
-            if field_sources and ocr_r and ocr_r.boxes:
+            boxes = ocr_r.boxes if ocr_r else None
+            if not full_res:
+                st.image(page_image(output_path, (img_path, page_num, boxes, field_sources)), caption=f"Page {page_num}: {fn}", width="stretch")
+            elif field_sources and boxes:
                 pil_img = Image.open(str(img_path)).convert("RGB")
-                annotated = draw_field_boxes(pil_img, page_num, ocr_r.boxes, field_sources)
+                annotated = draw_field_boxes(pil_img, page_num, boxes, field_sources)
                 st.image(annotated, caption=f"Page {page_num}: {fn}", width="stretch")
             else:
                 st.image(str(img_path), caption=f"Page {page_num}: {fn}", width="stretch")
+        prefetch_pages(output_path, _page_specs(to_review[st.session_state.review_idx + 1 : st.session_state.review_idx + 1 + PREFETCH_AHEAD]))
 
 with result_col:
     name_widget_key = f"review_name_{selected}"
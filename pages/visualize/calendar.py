@@ -6,7 +6,9 @@ import streamlit as st
 from PIL import Image
 
 from settings import get_config, update_config
-from viz_data import get_output_path, load_viz_records, receipt_url
+from thumbnails import thumbnails
+from temporal_index import TemporalIndex
+from viz_data import get_output_path, load_viz_records, load_viz_timeline, receipt_url
 
 WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
 
@@ -27,16 +29,12 @@ def first_of_next_month(d: date) -> date:
 
 
 def records_in_range(
-    dated: pd.DataFrame, range_start: date, range_end: date
+    df: pd.DataFrame, timeline: TemporalIndex, range_start: date, range_end: date
 ) -> dict[date, list]:
-    mask = (dated["parsed_date"].dt.date >= range_start) & (
-        dated["parsed_date"].dt.date < range_end
-    )
-    subset = dated.loc[mask]
     out: dict[date, list] = {}
-    for val in subset["parsed_date"].dt.date.unique():
-        d_py = val if isinstance(val, date) else date(val.year, val.month, val.day)
-        out[d_py] = subset[subset["parsed_date"].dt.date == val].to_dict("records")
+    for record in df.iloc[timeline.window(range_start, range_end, closed=False)].to_dict("records"):
+        parsed = record["parsed_date"]
+        out.setdefault(date(parsed.year, parsed.month, parsed.day), []).append(record)
     return out
 
 
@@ -71,11 +69,11 @@ def assign_to_columns(records: list[dict], output_path: Path) -> tuple[list, lis
     return col1, col2
 
 
-def render_receipt_card(row: dict, output_path: Path) -> None:
+def render_receipt_card(row: dict, output_path: Path, thumbs: dict[Path, Path]) -> None:
     if row.get("path"):
         img_path = output_path / row["path"]
         if img_path.exists():
-            st.image(str(img_path))
+            st.image(str(thumbs.get(img_path, img_path)))
     st.markdown(f"**{row['name']}**")
     st.caption(f"{row['cost']:,.0f} {row['currency']}")
     st.markdown(f"[View]({receipt_url(row['filename'])})")
@@ -93,8 +91,8 @@ if df.empty:
     st.info("No archived documents found.")
     st.stop()
 
-dated = df[df["parsed_date"].notna()].copy()
-if dated.empty:
+timeline = load_viz_timeline(str(output_path))
+if not len(timeline):
     st.info("No dated documents found.")
     st.stop()
 
@@ -111,8 +109,8 @@ if "cal_view_date" not in st.session_state:
     st.session_state["cal_view_period"] = saved_period
     st.session_state["cal_view_date"] = anchor.isoformat()
 
-data_min = date(dated["parsed_date"].min().year, dated["parsed_date"].min().month, dated["parsed_date"].min().day)
-data_max = date(dated["parsed_date"].max().year, dated["parsed_date"].max().month, dated["parsed_date"].max().day)
+data_min = timeline.first().date()
+data_max = timeline.last().date()
 
 current_date = min(max(date.fromisoformat(st.session_state["cal_view_date"]), data_min), data_max)
 if st.session_state["cal_view_date"] != current_date.isoformat():
@@ -155,7 +153,11 @@ else:
     range_end = first_of_next_month(current_date)
     period_label = current_date.strftime("%B %Y")
 
-by_date = records_in_range(dated, range_start, range_end)
+by_date = records_in_range(df, timeline, range_start, range_end)
+card_thumbs = thumbnails(
+    output_path,
+    [output_path / r["path"] for rs in by_date.values() for r in rs if r.get("path") and (output_path / r["path"]).exists()],
+)
 
 if period == "week":
     prev_date = current_date - timedelta(days=7)
@@ -196,7 +198,7 @@ if period == "week":
             st.markdown(f"**{WEEKDAYS[i]} {d.day}**")
             day_records = by_date.get(d, [])
             for row in day_records:
-                render_receipt_card(row, output_path)
+                render_receipt_card(row, output_path, card_thumbs)
             if not day_records:
                 st.caption("—")
 else:
@@ -217,12 +219,12 @@ else:
                         sub_cols = st.columns(2)
                         with sub_cols[0]:
                             for row in col1_items:
-                                render_receipt_card(row, output_path)
+                                render_receipt_card(row, output_path, card_thumbs)
                         with sub_cols[1]:
                             for row in col2_items:
-                                render_receipt_card(row, output_path)
+                                render_receipt_card(row, output_path, card_thumbs)
                     elif day_records:
-                        render_receipt_card(day_records[0], output_path)
+                        render_receipt_card(day_records[0], output_path, card_thumbs)
                     else:
                         st.caption("—")
                 else:
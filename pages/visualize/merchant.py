@@ -4,6 +4,7 @@ import plotly.express as px
 import streamlit as st
 
 from brand_registry import load_brand_directory
+from thumbnails import thumbnails
 from viz_data import (
     get_output_path,
     load_viz_items,
@@ -170,6 +171,7 @@ def pagination_ui(suffix: str):
 pagination_ui("top")
 cols_per_row = 5
 gallery_rows = list(gallery_df.iterrows())
+gallery_thumbs = thumbnails(output_path, [output_path / row["path"] for _, row in gallery_rows if row["path"]])
 for i in range(0, len(gallery_rows), cols_per_row):
     cols = st.columns(cols_per_row)
     for j, (_, row) in enumerate(gallery_rows[i:i + cols_per_row]):
@@ -177,7 +179,7 @@ for i in range(0, len(gallery_rows), cols_per_row):
             if row["path"]:
                 img_path = output_path / row["path"]
                 if img_path.exists():
-                    st.image(str(img_path))
+                    st.image(str(gallery_thumbs[img_path]))
             cap = f"{row['date']} — {row['cost']:,.0f} {currency}"
             if match_mode == "Brand" and str(row.get("brand_location") or "").strip():
                 cap += f"\n{row['brand_location']}"
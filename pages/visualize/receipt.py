@@ -3,13 +3,14 @@ import pandas as pd
 import streamlit as st
 
 from data import (
-    load_smart_match_cache,
     read_sidecar,
-    save_smart_match_cache,
+    smart_match_row,
+    update_smart_match_entries,
     write_sidecar,
 )
-from models import ReceiptResult, ReviewDecision, batch_serial_key
+from models import ReceiptResult, ReviewDecision
 from organize_utils import move_to_accepted_destination
+from thumbnails import DISPLAY_SIZE, thumbnails
 from validation import is_date_time_safe_for_archive
 from viz_data import (
     get_output_path,
@@ -64,11 +65,13 @@ col_img, col_meta = st.columns([1, 1])
 
 with col_img:
     paths = record.get("paths", [record["path"]] if record["path"] else [])
+    full_res = st.toggle("Full resolution", key="receipt_full_res")
+    display = {} if full_res else thumbnails(output_path, [output_path / p for p in paths if p and (output_path / p).exists()], DISPLAY_SIZE)
     for i, p in enumerate(paths):
         if p:
             image_path = output_path / p
             if image_path.exists():
-                st.image(str(image_path), caption=f"Page {i + 1}" if len(paths) > 1 else None, width="stretch")
+                st.image(str(display.get(image_path, image_path)), caption=f"Page {i + 1}" if len(paths) > 1 else None, width="stretch")
 
 with col_meta:
     if edit_mode:
@@ -159,16 +162,11 @@ with col_meta:
                         })
                     updated_sc = sidecar.model_copy(update={"review": decision, "extraction": updated_ext})
                     write_sidecar(target_path, updated_sc)
-                    smart_match_cache = load_smart_match_cache(output_path)
-                    ext_name = getattr(updated_ext, "name", "")
-                    ext_phone = getattr(updated_ext, "phone", "") if isinstance(updated_ext, ReceiptResult) else ""
-                    cache_key = sidecar.document_key or (batch_serial_key(batch_id, serial) if (batch_id := sidecar.batch_id) is not None and (serial := sidecar.serial) is not None else selected)
-                    smart_match_cache[cache_key] = {
-                        "extracted": ext_name,
-                        "confirmed": name,
-                        "extracted_phone": ext_phone,
-                    }
-                    save_smart_match_cache(output_path, smart_match_cache)
+                    update_smart_match_entries(
+                        output_path,
+                        [smart_match_row(updated_ext, name)],
+                        removed=[smart_match_row(sidecar.extraction, sidecar.review.name)],
+                    )
                     load_viz_records.clear()
                     st.session_state.receipt_edit_file = None
                     st.rerun()
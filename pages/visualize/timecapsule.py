@@ -2,7 +2,8 @@ from datetime import date
 
 import streamlit as st
 
-from viz_data import get_output_path, load_viz_records, receipt_url
+from thumbnails import thumbnails
+from viz_data import get_output_path, load_viz_records, load_viz_timeline, receipt_url
 
 st.title("Time Capsule")
 
@@ -16,18 +17,15 @@ if df.empty:
     st.info("No archived documents found.")
     st.stop()
 
-dated = df[df["parsed_date"].notna()].copy()
-if dated.empty:
+timeline = load_viz_timeline(str(output_path))
+if not len(timeline):
     st.info("No dated documents found.")
     st.stop()
 
 today = date.today()
 selected_date = st.date_input("On this day...", value=today)
 
-matches = dated[
-    (dated["parsed_date"].dt.month == selected_date.month) &
-    (dated["parsed_date"].dt.day == selected_date.day)
-].sort_values("parsed_date", ascending=False)
+matches = df.iloc[timeline.on_day(selected_date.month, selected_date.day)[::-1]]
 
 if matches.empty:
     st.info(f"No documents found on {selected_date.strftime('%B %d')} in any year.")
@@ -42,6 +40,7 @@ for year_val, group in matches.groupby("year", sort=False):
     st.subheader(str(int(year_val)))
     cols_per_row = 4
     group_rows = list(group.iterrows())
+    group_thumbs = thumbnails(output_path, [output_path / row["path"] for _, row in group_rows if row["path"]])
     for i in range(0, len(group_rows), cols_per_row):
         cols = st.columns(cols_per_row)
         for j, (_, row) in enumerate(group_rows[i:i + cols_per_row]):
@@ -49,7 +48,7 @@ for year_val, group in matches.groupby("year", sort=False):
                 if row["path"]:
                     img_path = output_path / row["path"]
                     if img_path.exists():
-                        st.image(str(img_path))
+                        st.image(str(group_thumbs[img_path]))
                 st.markdown(f"**{row['name']}**")
                 st.caption(f"{row['cost']:,.0f} {row['currency']}")
                 st.markdown(f"[View]({receipt_url(row['filename'])})")
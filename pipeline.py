@@ -0,0 +1,473 @@
+import argparse
+import random
+import sys
+import time
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from blank_pages import skip_blank_pages
+from data import (
+    append_extraction,
+    append_ocr_result,
+    build_document_index,
+    load_decisions,
+    load_extractions,
+    load_ocr_results,
+)
+from extraction import EXTRACTORS
+from extraction_cache import extraction_cache_stats
+from extraction_runner import RateLimiter, iter_extractions
+from indexing_schemes import SCHEMES, plan_new_batches
+from models import (
+    OcrResult,
+    ScanIndex,
+    batch_serial_key,
+    filename_to_batch_serial,
+    iter_indexed_files,
+    load_scan_index,
+    save_scan_index,
+)
+from ocr_providers import OCR_PROVIDERS, teardown_ocr
+from ocr_runner import effective_concurrency, iter_ocr_results
+from settings import IMAGE_EXTENSIONS, AppConfig, get_config
+from stream_runner import iter_overlapped, streamable_doc_keys
+
+STAGES = ("index", "ocr", "parse")
+
+
+def parse_deadline(value: str, now: datetime | None = None) -> datetime:
+    now = now or datetime.now()
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    t = datetime.strptime(value, "%H:%M").time()
+    candidate = datetime.combine(now.date(), t)
+    return candidate if candidate > now else candidate + timedelta(days=1)
+
+
+def deadline_arg(value: str) -> datetime:
+    try:
+        return parse_deadline(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid deadline {value!r}, expected HH:MM or an ISO datetime") from None
+
+
+def _expired(deadline: datetime | None) -> bool:
+    return deadline is not None and datetime.now() >= deadline
+
+
+def _log(stage: str, message: str) -> None:
+    print(f"[{datetime.now():%H:%M:%S}] {stage}: {message}", flush=True)
+
+
+class _Progress:
+    def __init__(self, stage: str, total: int):
+        self._stage = stage
+        self._total = total
+        self._done = 0
+        self._failed = 0
+        self._start = time.time()
+
+    @property
+    def done(self) -> int:
+        return self._done
+
+    @property
+    def failed(self) -> int:
+        return self._failed
+
+    def tick(self, key: str, succeeded: bool) -> None:
+        self._done += 1
+        if not succeeded:
+            self._failed += 1
+        avg = (time.time() - self._start) / self._done
+        mins, secs = divmod(int((self._total - self._done) * avg), 60)
+        status = "ok" if succeeded else "FAILED"
+        _log(self._stage, f"{self._done}/{self._total} {key} {status} — {avg:.1f}s/item — ETA {mins}m {secs}s")
+
+
+def run_index(input_path: Path, output_path: Path, scheme_name: str) -> None:
+    image_files = sorted(f.name for f in input_path.iterdir() if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS)
+    existing = load_scan_index(output_path) if (output_path / "batches.json").exists() else None
+    indexed = set(filename_to_batch_serial(existing)) if existing else set()
+    unindexed = [fn for fn in image_files if fn not in indexed]
+    if not unindexed:
+        _log("index", "no unindexed files")
+        return
+
+    new_batches, skipped, warnings, before_last = plan_new_batches(scheme_name, unindexed, existing)
+    for w in warnings:
+        _log("index", f"warning: {w}")
+    if skipped:
+        _log("index", f"{len(skipped)} file(s) skipped by scheme {scheme_name!r}")
+    if before_last:
+        _log(
+            "index",
+            f"error: {len(before_last)} unindexed file(s) predate the last batch's end. "
+            "Delete batches.json and rebuild from scratch to fix. Skipping indexing.",
+        )
+        return
+    if not new_batches:
+        return
+
+    output_path.mkdir(parents=True, exist_ok=True)
+    save_scan_index(output_path, ScanIndex(batches=(existing.batches if existing else []) + new_batches))
+    _log("index", f"added {len(new_batches)} batch(es): {', '.join(str(b.batch_id) for b in new_batches)}")
+
+
+def _scoped_items(output_path: Path, batch_ids: set[int] | None) -> list[tuple[int, int, str]]:
+    items = iter_indexed_files(load_scan_index(output_path), include_archived=False)
+    return [item for item in items if batch_ids is None or item[0] in batch_ids]
+
+
+def _until(items: list, deadline: datetime | None, stage: str) -> Iterator:
+    for item in items:
+        if _expired(deadline):
+            _log(stage, "deadline reached, not starting new work")
+            return
+        yield item
+
+
+def _ocr_todo(
+    input_path: Path, output_path: Path, batch_ids: set[int] | None, limit: int
+) -> tuple[dict[str, OcrResult], list[tuple[str, Path]]]:
+    loaded = load_ocr_results(output_path)
+    to_process: list[tuple[str, Path]] = []
+    for batch_id, serial, fn in _scoped_items(output_path, batch_ids):
+        key = batch_serial_key(batch_id, serial)
+        r = loaded.get(key)
+        if (r is None or not r.succeeded) and (input_path / fn).exists():
+            to_process.append((key, input_path / fn))
+    random.shuffle(to_process)
+    if limit > 0:
+        to_process = to_process[:limit]
+    return loaded, to_process
+
+
+def _skip_blank(
+    output_path: Path, to_process: list[tuple[str, Path]], batch_ids: set[int] | None
+) -> tuple[list[tuple[str, Path]], dict[str, OcrResult]]:
+    indexed_keys = {batch_serial_key(batch_id, serial) for batch_id, serial, _ in _scoped_items(output_path, batch_ids)}
+    remaining, empty, tossed = skip_blank_pages(output_path, to_process, indexed_keys)
+    if len(remaining) < len(to_process):
+        _log("ocr", f"skipped {len(to_process) - len(remaining)} blank page(s), tossed {len(tossed)} blank document(s)")
+    return remaining, empty
+
+
+def run_ocr_stage(
+    input_path: Path,
+    output_path: Path,
+    provider: str,
+    structured: bool,
+    batch_ids: set[int] | None,
+    limit: int,
+    workers: int,
+    use_cache: bool,
+    deadline: datetime | None,
+    prepare: bool = True,
+    max_edge: int = 0,
+    skip_blank: bool = True,
+) -> None:
+    _, to_process = _ocr_todo(input_path, output_path, batch_ids, limit)
+    if skip_blank and to_process:
+        to_process, _ = _skip_blank(output_path, to_process, batch_ids)
+    if not to_process:
+        _log("ocr", "nothing to process")
+        return
+
+    n_workers = effective_concurrency(provider, workers)
+    _log("ocr", f"{len(to_process)} image(s) with {provider} ({n_workers} in flight)")
+    progress = _Progress("ocr", len(to_process))
+    try:
+        results = iter_ocr_results(
+            provider,
+            _until(to_process, deadline, "ocr"),
+            structured,
+            n_workers,
+            output_path if use_cache else None,
+            output_path if prepare else None,
+            max_edge,
+        )
+        for key, result in results:
+            append_ocr_result(output_path, key, result)
+            progress.tick(key, result.succeeded)
+    finally:
+        teardown_ocr(provider)
+    _log("ocr", f"done: {progress.done} processed, {progress.failed} failed")
+
+
+def run_parse_stage(
+    output_path: Path,
+    extractor_name: str,
+    custom_instruction: str,
+    batch_ids: set[int] | None,
+    limit: int,
+    parse_workers: int,
+    limiter: RateLimiter,
+    use_cache: bool,
+    deadline: datetime | None,
+) -> None:
+    indexed_keys = {batch_serial_key(batch_id, serial) for batch_id, serial, _ in _scoped_items(output_path, batch_ids)}
+    ocr_results_by_key: dict[str, OcrResult] = {
+        k: r for k, r in load_ocr_results(output_path).items() if r.succeeded and k in indexed_keys
+    }
+    ocr_by_key = {k: r.markdown for k, r in ocr_results_by_key.items()}
+    index = build_document_index(output_path, indexed_keys, ocr_keys=set(ocr_by_key))
+    decisions = load_decisions(output_path)
+    extractions = load_extractions(output_path)
+    to_process = [
+        doc_key
+        for doc_key in index.doc_keys_with_ocr(ocr_by_key)
+        if str(doc_key) not in extractions
+        and not (decisions.get(str(doc_key)) and decisions[str(doc_key)].verdict == "tossed")
+    ]
+    random.shuffle(to_process)
+    if limit > 0:
+        to_process = to_process[:limit]
+    if not to_process:
+        _log("parse", "nothing to process")
+        return
+
+    _log("parse", f"{len(to_process)} document(s) with {extractor_name} ({parse_workers} concurrent)")
+    progress = _Progress("parse", len(to_process))
+    items = (
+        (str(doc_key), *index.concat_ocr_with_boxes(doc_key, ocr_results_by_key))
+        for doc_key in _until(to_process, deadline, "parse")
+    )
+    for key, result in iter_extractions(
+        extractor_name, items, custom_instruction, parse_workers, limiter, output_path if use_cache else None
+    ):
+        if isinstance(result, Exception):
+            _log("parse", f"{key}: {type(result).__name__}: {result}")
+            progress.tick(key, False)
+            continue
+        append_extraction(output_path, key, result)
+        progress.tick(key, True)
+    _log("parse", f"done: {progress.done} processed, {progress.failed} failed")
+    if use_cache:
+        stats = extraction_cache_stats(output_path)
+        _log("parse", f"cache: {stats.hits} hits, {stats.misses} misses, {stats.entries} entries")
+
+
+def run_overlapped_stages(
+    input_path: Path,
+    output_path: Path,
+    provider: str,
+    structured: bool,
+    extractor_name: str,
+    custom_instruction: str,
+    batch_ids: set[int] | None,
+    limit: int,
+    workers: int,
+    parse_workers: int,
+    limiter: RateLimiter,
+    use_cache: bool,
+    deadline: datetime | None,
+    prepare: bool = True,
+    max_edge: int = 0,
+    skip_blank: bool = True,
+) -> None:
+    loaded, to_process = _ocr_todo(input_path, output_path, batch_ids, limit)
+    ready = {k: r for k, r in loaded.items() if r.succeeded}
+    if skip_blank and to_process:
+        to_process, empty = _skip_blank(output_path, to_process, batch_ids)
+        ready.update(empty)
+    indexed_keys = {batch_serial_key(batch_id, serial) for batch_id, serial, _ in _scoped_items(output_path, batch_ids)}
+    index = build_document_index(output_path, indexed_keys)
+    decisions = load_decisions(output_path)
+    skip = set(load_extractions(output_path)) | {k for k, d in decisions.items() if d.verdict == "tossed"}
+    parse_docs = streamable_doc_keys(index, set(ready), {k for k, _ in to_process}, skip)
+    if limit > 0:
+        skip |= {str(doc_key) for doc_key in parse_docs[limit:]}
+        parse_docs = parse_docs[:limit]
+    if not to_process and not parse_docs:
+        _log("pipeline", "nothing to process")
+        return
+
+    n_workers = effective_concurrency(provider, workers)
+    _log(
+        "pipeline",
+        f"{len(to_process)} image(s) with {provider} ({n_workers} in flight), "
+        f"up to {len(parse_docs)} document(s) with {extractor_name} as pages finish",
+    )
+    ocr_progress = _Progress("ocr", len(to_process))
+    parse_progress = _Progress("parse", len(parse_docs))
+    events = iter_overlapped(
+        provider,
+        _until(to_process, deadline, "ocr"),
+        structured,
+        n_workers,
+        index,
+        ready,
+        extractor_name,
+        custom_instruction,
+        skip,
+        parse_concurrency=parse_workers,
+        limiter=limiter,
+        cache_root=output_path if use_cache else None,
+        prep_root=output_path if prepare else None,
+        max_edge=max_edge,
+    )
+    try:
+        for stage, key, payload in events:
+            if stage == "ocr":
+                append_ocr_result(output_path, key, payload)
+                ocr_progress.tick(key, payload.succeeded)
+            elif isinstance(payload, Exception):
+                _log("parse", f"{key}: {type(payload).__name__}: {payload}")
+                parse_progress.tick(key, False)
+            else:
+                append_extraction(output_path, key, payload)
+                parse_progress.tick(key, True)
+    finally:
+        teardown_ocr(provider)
+    _log("ocr", f"done: {ocr_progress.done} processed, {ocr_progress.failed} failed")
+    _log("parse", f"done: {parse_progress.done} processed, {parse_progress.failed} failed")
+
+
+def _pick(options: list[str], configured: str, override: str | None, what: str) -> str:
+    if override:
+        if override not in options:
+            raise SystemExit(f"Unknown {what} {override!r}. Available: {', '.join(options)}")
+        return override
+    return configured if configured in options else options[0]
+
+
+def build_parser(cfg: AppConfig) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Run the ingest pipeline (index -> OCR -> parse) without the Streamlit UI. "
+        "Results are checkpointed after every image/document, so re-running resumes where it stopped.",
+    )
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--batch", type=int, action="append", help="restrict OCR/parse to this batch id (repeatable)")
+    parser.add_argument("--limit", type=int, default=0, help="max images/documents per stage (0 = all)")
+    parser.add_argument("--workers", type=int, default=cfg.ocr_concurrency, help="concurrent OCR images")
+    parser.add_argument(
+        "--parse-workers", type=int, default=cfg.parse_concurrency, help="concurrent extraction requests"
+    )
+    parser.add_argument(
+        "--deadline", type=deadline_arg, help="stop starting new work at this time (HH:MM or ISO datetime)"
+    )
+    parser.add_argument("--input", default=cfg.input_image_path, help="input image folder")
+    parser.add_argument("--output", default=cfg.batch_output_path, help="batch output folder")
+    parser.add_argument("--scheme", help="indexing scheme")
+    parser.add_argument("--ocr-model", help="OCR provider")
+    parser.add_argument("--extractor", help="extraction model")
+    parser.add_argument(
+        "--overlap",
+        action="store_true",
+        help="parse each document as soon as all its pages finish OCR instead of after the whole OCR stage",
+    )
+    parser.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="reuse cached OCR for identical images and cached extractions for identical prompts",
+    )
+    parser.add_argument(
+        "--structured",
+        action=argparse.BooleanOptionalAction,
+        default=cfg.extract_structured,
+        help="run the structured (grounding) OCR pass",
+    )
+    parser.add_argument(
+        "--prepare",
+        action=argparse.BooleanOptionalAction,
+        default=cfg.ocr_prepare_images,
+        help="send OCR a cached, cropped, deskewed and downscaled copy of each image",
+    )
+    parser.add_argument(
+        "--max-edge",
+        type=int,
+        default=cfg.ocr_max_edge,
+        help="long-edge cap for prepared OCR images (0 = the OCR model's preferred size)",
+    )
+    parser.add_argument(
+        "--skip-blank-pages",
+        action=argparse.BooleanOptionalAction,
+        default=cfg.ocr_skip_blank_pages,
+        help="skip OCR for blank pages, tossing documents whose pages are all blank",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    cfg = get_config()
+    args = build_parser(cfg).parse_args(argv)
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(unknown)}")
+    if not args.input or not args.output:
+        raise SystemExit("Set input and output paths in Config or pass --input/--output.")
+
+    input_path = Path(args.input)
+    output_path = Path(args.output)
+    deadline = args.deadline
+    batch_ids = set(args.batch) if args.batch else None
+    if deadline:
+        _log("pipeline", f"deadline {deadline:%Y-%m-%d %H:%M}")
+
+    if "index" in stages:
+        run_index(input_path, output_path, _pick(list(SCHEMES), cfg.indexing_scheme, args.scheme, "scheme"))
+    if not (output_path / "batches.json").exists():
+        _log("pipeline", "no batches.json; nothing to OCR or parse")
+        return 0
+    ocr_model = _pick(list(OCR_PROVIDERS), cfg.ocr_model, args.ocr_model, "OCR model")
+    extractor_name = _pick(list(EXTRACTORS), cfg.extractor_model, args.extractor, "extractor")
+    limiter = RateLimiter(cfg.parse_requests_per_minute, cfg.parse_tokens_per_minute)
+    if args.overlap and "ocr" in stages and "parse" in stages:
+        if not _expired(deadline):
+            run_overlapped_stages(
+                input_path,
+                output_path,
+                ocr_model,
+                args.structured,
+                extractor_name,
+                cfg.parse_custom_instruction,
+                batch_ids,
+                args.limit,
+                args.workers,
+                args.parse_workers,
+                limiter,
+                args.cache,
+                deadline,
+                args.prepare,
+                args.max_edge,
+                args.skip_blank_pages,
+            )
+        return 0
+    if "ocr" in stages and not _expired(deadline):
+        run_ocr_stage(
+            input_path,
+            output_path,
+            ocr_model,
+            args.structured,
+            batch_ids,
+            args.limit,
+            args.workers,
+            args.cache,
+            deadline,
+            args.prepare,
+            args.max_edge,
+            args.skip_blank_pages,
+        )
+    if "parse" in stages and not _expired(deadline):
+        run_parse_stage(
+            output_path,
+            extractor_name,
+            cfg.parse_custom_instruction,
+            batch_ids,
+            args.limit,
+            args.parse_workers,
+            limiter,
+            args.cache,
+            deadline,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+import fcntl
+import os
+import shutil
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+SEGMENT_SUFFIX = ".jsonl"
+COMPACTED_HEADER = b"\tcompacted\n"
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+COMPACT_MIN_BYTES = 4 * 1024 * 1024
+COMPACT_DEAD_RATIO = 0.5
+
+IndexEntry = tuple[int, int, int, int]
+
+
+def _line_bytes(key: bytes, value_len: int) -> int:
+    return len(key) + value_len + 2
+
+
+class RecordLog:
+    def __init__(self, root: Path):
+        self._root = root
+        self._lock = threading.RLock()
+        self._index: dict[str, IndexEntry] = {}
+        self._segments: dict[int, int] = {}
+        self._live_bytes = 0
+        self._generation = 0
+        self._compacting = False
+        self._lock_fd: int | None = None
+        self._lock_depth = 0
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    @contextmanager
+    def _file_lock(self):
+        with self._lock:
+            if self._lock_depth == 0:
+                self._root.mkdir(parents=True, exist_ok=True)
+                self._lock_fd = os.open(self._root, os.O_RDONLY)
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                    os.close(self._lock_fd)
+                    self._lock_fd = None
+
+    def _segment_path(self, seg_id: int) -> Path:
+        return self._root / f"{seg_id:08d}{SEGMENT_SUFFIX}"
+
+    def _list_segments(self) -> dict[int, int]:
+        if not self._root.exists():
+            return {}
+        out: dict[int, int] = {}
+        for p in self._root.iterdir():
+            if p.suffix == SEGMENT_SUFFIX and p.stem.isdigit():
+                out[int(p.stem)] = p.stat().st_size
+        return out
+
+    def _drop_superseded_segments(self, on_disk: dict[int, int]) -> dict[int, int]:
+        base = None
+        for seg_id in sorted(on_disk, reverse=True):
+            with open(self._segment_path(seg_id), "rb") as f:
+                if f.read(len(COMPACTED_HEADER)) == COMPACTED_HEADER:
+                    base = seg_id
+                    break
+        if base is None:
+            return on_disk
+        for seg_id in [s for s in on_disk if s < base]:
+            self._segment_path(seg_id).unlink(missing_ok=True)
+        return {s: size for s, size in on_disk.items() if s >= base}
+
+    def _load(self) -> None:
+        with self._file_lock():
+            self._load_segments()
+
+    def _load_segments(self) -> None:
+        self._index = {}
+        self._segments = {}
+        self._live_bytes = 0
+        self._generation += 1
+        on_disk = self._drop_superseded_segments(self._list_segments())
+        last = max(on_disk, default=None)
+        for seg_id in sorted(on_disk):
+            self._segments[seg_id] = 0
+            self._scan(seg_id, 0, repair=seg_id == last)
+
+    def _scan(self, seg_id: int, start: int, repair: bool = False) -> None:
+        path = self._segment_path(seg_id)
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read()
+        pos = 0
+        while True:
+            nl = data.find(b"\n", pos)
+            if nl == -1:
+                break
+            line = data[pos:nl]
+            tab = line.find(b"\t")
+            if tab > 0:
+                self._apply(line[:tab].decode("utf-8"), seg_id, start + pos + tab + 1, line[tab + 1 :])
+            pos = nl + 1
+        if pos < len(data) and repair:
+            with open(path, "r+b") as f:
+                f.truncate(start + pos)
+        self._segments[seg_id] = start + pos
+
+    def _apply(self, key: str, seg_id: int, value_offset: int, value: bytes) -> None:
+        key_b = key.encode("utf-8")
+        old = self._index.pop(key, None)
+        if old is not None:
+            self._live_bytes -= _line_bytes(key_b, old[2])
+        if not value:
+            return
+        self._index[key] = (seg_id, value_offset, len(value), zlib.crc32(value))
+        self._live_bytes += _line_bytes(key_b, len(value))
+
+    def _sync(self) -> None:
+        on_disk = self._list_segments()
+        if set(on_disk) != set(self._segments):
+            self._load()
+            return
+        for seg_id, size in on_disk.items():
+            known = self._segments[seg_id]
+            if size < known:
+                self._load()
+                return
+            if size > known:
+                self._scan(seg_id, known)
+
+    def _active_segment(self) -> int:
+        if not self._segments:
+            self._segment_path(1).touch()
+            self._segments[1] = 0
+            return 1
+        active = max(self._segments)
+        if self._segments[active] >= MAX_SEGMENT_BYTES:
+            active += 1
+            self._segment_path(active).touch()
+            self._segments[active] = 0
+        return active
+
+    def _append(self, records: list[tuple[str, bytes]]) -> None:
+        if not records:
+            return
+        buf = bytearray()
+        placed: list[tuple[str, int, bytes]] = []
+        for key, value in records:
+            if not key or "\t" in key or "\n" in key:
+                raise ValueError(f"Invalid record key: {key!r}")
+            if b"\n" in value:
+                raise ValueError(f"Record value for {key!r} must be a single line")
+            buf += key.encode("utf-8") + b"\t"
+            placed.append((key, len(buf), value))
+            buf += value + b"\n"
+        with self._file_lock():
+            self._sync()
+            seg_id = self._active_segment()
+            with open(self._segment_path(seg_id), "ab") as f:
+                base = os.fstat(f.fileno()).st_size
+                if base != self._segments[seg_id]:
+                    self._scan(seg_id, self._segments[seg_id], repair=True)
+                    base = os.fstat(f.fileno()).st_size
+                f.write(buf)
+            self._segments[seg_id] = base + len(buf)
+            for key, offset, value in placed:
+                self._apply(key, seg_id, base + offset, value)
+            self._maybe_compact()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            self._sync()
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            seg_id, offset, length, crc = entry
+            with open(self._segment_path(seg_id), "rb") as f:
+                f.seek(offset)
+                value = f.read(length)
+            return value if zlib.crc32(value) == crc else None
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            self._sync()
+            return list(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._sync()
+            return key in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return len(self._index)
+
+    def read_all(self) -> dict[str, bytes]:
+        with self._lock:
+            self._sync()
+            by_segment: dict[int, list[tuple[str, int, int, int]]] = {}
+            for key, (seg_id, offset, length, crc) in self._index.items():
+                by_segment.setdefault(seg_id, []).append((key, offset, length, crc))
+            out: dict[str, bytes] = {}
+            for seg_id, entries in by_segment.items():
+                data = self._segment_path(seg_id).read_bytes()
+                for key, offset, length, crc in entries:
+                    value = data[offset : offset + length]
+                    if zlib.crc32(value) == crc:
+                        out[key] = value
+            return out
+
+    def put(self, key: str, value: bytes) -> None:
+        self._append([(key, value)])
+
+    def put_many(self, items: dict[str, bytes]) -> None:
+        self._append(list(items.items()))
+
+    def delete_many(self, keys: list[str]) -> None:
+        with self._lock:
+            self._sync()
+            self._append([(k, b"") for k in keys if k in self._index])
+
+    def replace_all(self, items: dict[str, bytes]) -> None:
+        with self._lock:
+            self._sync()
+            records = [(k, b"") for k in self._index if k not in items]
+            for key, value in items.items():
+                entry = self._index.get(key)
+                if entry is None or entry[2] != len(value) or entry[3] != zlib.crc32(value):
+                    records.append((key, value))
+            self._append(records)
+
+    def clear(self) -> None:
+        with self._file_lock():
+            for seg_id in list(self._segments):
+                self._segment_path(seg_id).unlink(missing_ok=True)
+            self._segments = {}
+            self._index = {}
+            self._live_bytes = 0
+            self._generation += 1
+
+    def _maybe_compact(self) -> None:
+        total = sum(self._segments.values())
+        if self._compacting or total < COMPACT_MIN_BYTES:
+            return
+        if total - self._live_bytes < total * COMPACT_DEAD_RATIO:
+            return
+        sealed_upto = max(self._segments)
+        self._segment_path(sealed_upto + 1).touch()
+        self._segments[sealed_upto + 1] = 0
+        self._compacting = True
+        threading.Thread(
+            target=self._compact, args=(sealed_upto, self._generation), daemon=True
+        ).start()
+
+    def compact(self) -> None:
+        with self._lock:
+            self._sync()
+            if self._compacting or not self._segments:
+                return
+            sealed_upto = max(self._segments)
+            self._segment_path(sealed_upto + 1).touch()
+            self._segments[sealed_upto + 1] = 0
+            self._compacting = True
+            generation = self._generation
+        self._compact(sealed_upto, generation)
+
+    def _compact(self, sealed_upto: int, generation: int) -> None:
+        tmp = self._root / f"{sealed_upto:08d}.compact"
+        try:
+            with self._lock:
+                sealed = sorted(s for s in self._segments if s <= sealed_upto)
+                by_segment: dict[int, list[tuple[str, IndexEntry]]] = {}
+                for key, entry in self._index.items():
+                    if entry[0] <= sealed_upto:
+                        by_segment.setdefault(entry[0], []).append((key, entry))
+            moved: dict[str, IndexEntry] = {}
+            with open(tmp, "wb") as out:
+                out.write(COMPACTED_HEADER)
+                for seg_id in sealed:
+                    entries = sorted(by_segment.get(seg_id, []), key=lambda x: x[1][1])
+                    if not entries:
+                        continue
+                    data = self._segment_path(seg_id).read_bytes()
+                    for key, (_, offset, length, crc) in entries:
+                        prefix = key.encode("utf-8") + b"\t"
+                        value_offset = out.tell() + len(prefix)
+                        out.write(prefix + data[offset : offset + length] + b"\n")
+                        moved[key] = (sealed_upto, value_offset, length, crc)
+                out.flush()
+                os.fsync(out.fileno())
+                compacted_size = out.tell()
+            with self._file_lock():
+                if self._generation != generation:
+                    tmp.unlink(missing_ok=True)
+                    return
+                os.replace(tmp, self._segment_path(sealed_upto))
+                for seg_id in sealed:
+                    if seg_id != sealed_upto:
+                        self._segment_path(seg_id).unlink(missing_ok=True)
+                        self._segments.pop(seg_id, None)
+                self._segments[sealed_upto] = compacted_size
+                for key, entry in moved.items():
+                    current = self._index.get(key)
+                    if current is not None and current[0] <= sealed_upto:
+                        self._index[key] = entry
+        finally:
+            tmp.unlink(missing_ok=True)
+            with self._lock:
+                self._compacting = False
+
+
+_LOGS: dict[Path, RecordLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+
+def open_record_log(root: Path) -> RecordLog:
+    resolved = root.resolve()
+    with _LOGS_LOCK:
+        log = _LOGS.get(resolved)
+        if log is None:
+            log = RecordLog(resolved)
+            _LOGS[resolved] = log
+        return log
+
+
+def delete_record_log(root: Path) -> None:
+    resolved = root.resolve()
+    with _LOGS_LOCK:
+        log = _LOGS.pop(resolved, None)
+    if log is not None:
+        log.clear()
+    shutil.rmtree(resolved, ignore_errors=True)
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+from PIL import Image
+
+from box_drawing import draw_field_boxes
+from models import DetectedBox
+from thumbnails import DISPLAY_SIZE, THUMB_QUALITY, thumbnail
+
+PREFETCH_AHEAD = 3
+PREFETCH_CACHE_ITEMS = 32
+PREFETCH_WORKERS = 2
+
+PageSpec = tuple[Path, int, list[DetectedBox] | None, dict[str, list[str]]]
+
+
+class _Prefetcher:
+    def __init__(self, capacity: int, workers: int):
+        self._capacity = capacity
+        self._workers = workers
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, Future] = OrderedDict()
+        self._pool: ThreadPoolExecutor | None = None
+
+    def _future(self, key: tuple, build: Callable[[], Any]) -> Future:
+        with self._lock:
+            future = self._entries.get(key)
+            if future is not None:
+                self._entries.move_to_end(key)
+                return future
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="prefetch")
+            future = self._pool.submit(build)
+            self._entries[key] = future
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+            return future
+
+    def get(self, key: tuple, build: Callable[[], Any]) -> Any:
+        future = self._future(key, build)
+        if future.cancel():
+            future = Future()
+            try:
+                future.set_result(build())
+            except Exception as exc:
+                future.set_exception(exc)
+            with self._lock:
+                self._entries[key] = future
+        try:
+            return future.result()
+        except Exception:
+            with self._lock:
+                if self._entries.get(key) is future:
+                    del self._entries[key]
+            raise
+
+    def warm(self, key: tuple, build: Callable[[], Any]) -> None:
+        self._future(key, build)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_PREFETCHER = _Prefetcher(PREFETCH_CACHE_ITEMS, PREFETCH_WORKERS)
+
+
+def _source_key(source: Path) -> tuple:
+    try:
+        st = source.stat()
+    except FileNotFoundError:
+        return str(source), None, None
+    return str(source.resolve()), st.st_mtime_ns, st.st_size
+
+
+def _display_path(cache_root: Path, source: Path) -> Path:
+    try:
+        return thumbnail(cache_root, source, DISPLAY_SIZE)
+    except Exception:
+        return source
+
+
+def _overlay_fingerprint(page_num: int, boxes: list[DetectedBox] | None, field_sources: dict[str, list[str]]) -> str:
+    if not boxes or not field_sources:
+        return ""
+    payload = json.dumps(
+        [page_num, field_sources, [b.model_dump() for b in boxes]], sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _render_page(cache_root: Path, spec: PageSpec) -> bytes:
+    source, page_num, boxes, field_sources = spec
+    display = _display_path(cache_root, source)
+    if not boxes or not field_sources:
+        return display.read_bytes()
+    with Image.open(display) as img:
+        annotated = draw_field_boxes(img.convert("RGB"), page_num, boxes, field_sources)
+    buf = BytesIO()
+    annotated.convert("RGB").save(buf, "WEBP", quality=THUMB_QUALITY)
+    return buf.getvalue()
+
+
+def _page_key(spec: PageSpec) -> tuple:
+    source, page_num, boxes, field_sources = spec
+    return ("page", *_source_key(source), _overlay_fingerprint(page_num, boxes, field_sources))
+
+
+def page_image(cache_root: Path, spec: PageSpec) -> bytes:
+    return _PREFETCHER.get(_page_key(spec), lambda: _render_page(cache_root, spec))
+
+
+def prefetch_pages(cache_root: Path, specs: Iterable[PageSpec]) -> None:
+    for spec in specs:
+        _PREFETCHER.warm(_page_key(spec), lambda spec=spec: _render_page(cache_root, spec))
+
+
+def _decode_preview(cache_root: Path, source: Path) -> Image.Image:
+    with Image.open(_display_path(cache_root, source)) as img:
+        return img.convert("RGB")
+
+
+def preview_image(cache_root: Path, source: Path) -> Image.Image:
+    return _PREFETCHER.get(("preview", *_source_key(source)), lambda: _decode_preview(cache_root, source))
+
+
+def prefetch_previews(cache_root: Path, sources: Iterable[Path]) -> None:
+    for source in sources:
+        _PREFETCHER.warm(("preview", *_source_key(source)), lambda source=source: _decode_preview(cache_root, source))
+
+
+def clear_prefetch_cache() -> None:
+    _PREFETCHER.clear()
@@ -1,5 +1,9 @@
+from datetime import datetime
+
+import pandas as pd
+
 from models import DocumentExtraction, ReceiptResult
-from validation import Hint
+from validation import Hint, batch_rule
 
 
 def cost_check(extraction: DocumentExtraction) -> list[Hint]:
@@ -17,3 +21,9 @@ def cost_check(extraction: DocumentExtraction) -> list[Hint]:
         return [Hint(message=f"Items sum {fmt(items_sum)} = Total {fmt(extraction.cost)}", color="#28a745")]
     diff = extraction.cost - items_sum
     return [Hint(message=f"Items sum {fmt(items_sum)} ≠ Total {fmt(extraction.cost)} (diff: {fmt(diff)})", color="#dc3545")]
+
+
+@batch_rule(cost_check)
+def cost_batch(table: pd.DataFrame, now: datetime) -> pd.Series:
+    mismatch = (table["items_sum"] - table["cost"]).abs() >= 0.01
+    return ((table["document_type"] == "receipt") & table["items_sum"].notna() & mismatch) * 2
@@ -1,5 +1,9 @@
+from datetime import datetime
+
+import pandas as pd
+
 from models import DocumentExtraction, ReceiptResult
-from validation import Hint
+from validation import Hint, batch_rule
 
 LARGE_COST_THRESHOLDS: dict[str, float] = {
     "JPY": 10_000,
@@ -21,3 +25,10 @@ def cost_large_check(extraction: DocumentExtraction) -> list[Hint]:
         fmt = f"¥{extraction.cost:,.0f}" if is_jpy else f"{extraction.cost:,.2f} {extraction.currency}"
         return [Hint(message=f"Large cost: {fmt} (≥ {threshold:,.0f} {currency})", color="#b8860b")]
     return []
+
+
+@batch_rule(cost_large_check)
+def cost_large_batch(table: pd.DataFrame, now: datetime) -> pd.Series:
+    threshold = table["currency"].str.upper().map(LARGE_COST_THRESHOLDS)
+    large = (table["document_type"] == "receipt") & threshold.notna() & (table["cost"] >= threshold)
+    return large
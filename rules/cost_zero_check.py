@@ -1,5 +1,9 @@
+from datetime import datetime
+
+import pandas as pd
+
 from models import DocumentExtraction, ReceiptResult
-from validation import Hint
+from validation import Hint, batch_rule
 
 
 def cost_zero_check(extraction: DocumentExtraction) -> list[Hint]:
@@ -8,3 +12,9 @@ def cost_zero_check(extraction: DocumentExtraction) -> list[Hint]:
     if extraction.cost is None or extraction.cost == 0:
         return [Hint(message="Receipt has no cost or cost is 0", color="#dc3545")]
     return []
+
+
+@batch_rule(cost_zero_check)
+def cost_zero_batch(table: pd.DataFrame, now: datetime) -> pd.Series:
+    receipt = table["document_type"] == "receipt"
+    return ((receipt & (table["cost"].isna() | (table["cost"] == 0))) * 2)
@@ -1,5 +1,9 @@
+from datetime import datetime
+
+import pandas as pd
+
 from models import DocumentExtraction, ReceiptResult
-from validation import Hint
+from validation import Hint, batch_rule
 
 COMMON_CURRENCIES = {"JPY", "CNY"}
 
@@ -13,3 +17,9 @@ def currency_uncommon_check(extraction: DocumentExtraction) -> list[Hint]:
     if extraction.currency.upper() not in COMMON_CURRENCIES:
         return [Hint(message=f"Uncommon currency: {extraction.currency}", color="#b8860b")]
     return []
+
+
+@batch_rule(currency_uncommon_check)
+def currency_uncommon_batch(table: pd.DataFrame, now: datetime) -> pd.Series:
+    uncommon = ~table["currency"].str.upper().isin(COMMON_CURRENCIES)
+    return (table["document_type"] == "receipt") & uncommon
@@ -1,9 +1,13 @@
 from datetime import datetime
 
 import humanize
+import numpy as np
+import pandas as pd
 
 from models import CorruptedResult, DocumentExtraction
-from validation import Hint
+from validation import Hint, batch_rule
+
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
 
 
 def date_check(extraction: DocumentExtraction) -> list[Hint]:
@@ -21,9 +25,32 @@ def date_check(extraction: DocumentExtraction) -> list[Hint]:
 
     now = datetime.now()
     humanized = humanize.naturaltime(doc_dt)
-    delta_years = (now - doc_dt).total_seconds() / (365.25 * 24 * 3600)
+    delta_years = (now - doc_dt).total_seconds() / SECONDS_PER_YEAR
     if doc_dt > now or delta_years >= 10:
         return [Hint(message=humanized, color="#dc3545")]
     elif delta_years > 3:
         return [Hint(message=humanized, color="#b8860b")]
     return [Hint(message=humanized, color="")]
+
+
+@batch_rule(date_check)
+def date_batch(table: pd.DataFrame, now: datetime) -> pd.Series:
+    dated = (table["document_type"] != "corrupted") & (table["date"] != "")
+    timed = table["time"] != ""
+    parsed = pd.Series(pd.NaT, index=table.index, dtype="datetime64[ns]")
+    formats = {
+        "%Y-%m-%d": dated & ~timed,
+        "%Y-%m-%d %H:%M": dated & timed & (table["time"].str.len() <= 5),
+        "%Y-%m-%d %H:%M:%S": dated & timed & (table["time"].str.len() > 5),
+    }
+    for fmt, mask in formats.items():
+        if mask.any():
+            text = table.loc[mask, "date"] + (" " + table.loc[mask, "time"] if "%H" in fmt else "")
+            parsed[mask] = pd.to_datetime(text, format=fmt, errors="coerce")
+    delta_years = (pd.Timestamp(now) - parsed).dt.total_seconds() / SECONDS_PER_YEAR
+    severity = np.select(
+        [parsed.isna(), (parsed > pd.Timestamp(now)) | (delta_years >= 10), delta_years > 3],
+        [2, 2, 1],
+        default=0,
+    )
+    return pd.Series(np.where(dated, severity, 0), index=table.index)
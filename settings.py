@@ -13,10 +13,17 @@ class AppConfig(BaseModel):
     batch_output_path: str = ""
     extract_structured: bool = True
     ocr_model: str = ""
+    ocr_concurrency: int = 1
+    ocr_skip_blank_pages: bool = True
+    ocr_prepare_images: bool = True
+    ocr_max_edge: int = 0
     workshop_ocr_model: str = ""
     extractor_model: str = ""
     workshop_extractor_model: str = ""
     parse_custom_instruction: str = ""
+    parse_concurrency: int = 1
+    parse_requests_per_minute: int = 0
+    parse_tokens_per_minute: int = 0
     normalize_engine: str = "embedding"
     normalize_embedding_threshold: float = 0.05
     normalize_string_similarity: int = 80
@@ -28,6 +35,11 @@ class AppConfig(BaseModel):
     prefix_suggestion_min_count: int = 2
     calendar_period: str = "week"
     calendar_date: str = ""
+    review_queue_order: str = "Name"
+    dedupe_time_tolerance_minutes: int = 5
+    dedupe_cost_tolerance_pct: float = 1.0
+    dedupe_mode: str = "Time & cost"
+    dedupe_hash_distance: int = 6
 
 
 def get_config() -> AppConfig:
@@ -0,0 +1,132 @@
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from extraction_runner import PENDING, RateLimiter, iter_extractions
+from models import DocumentExtraction, DocumentIndex, DocumentKey, OcrResult
+from ocr_runner import iter_ocr_results
+
+PARSE_QUEUE_SIZE = 8
+
+StageEvent = tuple[str, str, OcrResult | DocumentExtraction | Exception]
+
+_DONE = object()
+
+
+def streamable_doc_keys(
+    index: DocumentIndex,
+    ocr_ready: set[str],
+    ocr_pending: set[str],
+    skip: set[str],
+) -> list[DocumentKey]:
+    covered = ocr_ready | ocr_pending
+    return [
+        doc_key
+        for doc_key in index.doc_keys()
+        if str(doc_key) not in skip and all(k in covered for k in index.keys_for_doc(doc_key))
+    ]
+
+
+def iter_overlapped(
+    provider: str,
+    ocr_items: Iterable[tuple[str, Path]],
+    structured: bool,
+    concurrency: int,
+    index: DocumentIndex,
+    ocr_results: dict[str, OcrResult],
+    extractor_name: str,
+    custom_instruction: str,
+    skip: set[str],
+    queue_size: int = PARSE_QUEUE_SIZE,
+    parse_concurrency: int = 1,
+    limiter: RateLimiter | None = None,
+    cache_root: Path | None = None,
+    prep_root: Path | None = None,
+    max_edge: int = 0,
+) -> Iterator[StageEvent]:
+    succeeded = {k: r for k, r in ocr_results.items() if r.succeeded}
+    events: queue.Queue = queue.Queue()
+    ready: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def offer(item) -> bool:
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def enqueue_if_ready(doc_key: DocumentKey, queued: set[DocumentKey]) -> bool:
+        if doc_key in queued or str(doc_key) in skip:
+            return True
+        if not all(k in succeeded for k in index.keys_for_doc(doc_key)):
+            return True
+        queued.add(doc_key)
+        ocr_text, has_boxes = index.concat_ocr_with_boxes(doc_key, succeeded)
+        return offer((str(doc_key), ocr_text, has_boxes))
+
+    def run_ocr() -> None:
+        queued: set[DocumentKey] = set()
+        try:
+            for doc_key in index.doc_keys():
+                if not enqueue_if_ready(doc_key, queued):
+                    return
+            for key, result in iter_ocr_results(
+                provider, ocr_items, structured, concurrency, cache_root, prep_root, max_edge
+            ):
+                events.put(("ocr", key, result))
+                if not result.succeeded:
+                    continue
+                succeeded[key] = result
+                if not enqueue_if_ready(index.key_to_doc_key(key), queued):
+                    return
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            offer(_DONE)
+
+    def ready_docs() -> Iterator[tuple[str, str, bool] | object]:
+        while not stop.is_set():
+            try:
+                item = ready.get_nowait()
+            except queue.Empty:
+                yield PENDING
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    def run_parse() -> None:
+        try:
+            extractions = iter_extractions(
+                extractor_name, ready_docs(), custom_instruction, parse_concurrency, limiter, cache_root
+            )
+            for doc_key, payload in extractions:
+                events.put(("parse", doc_key, payload))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            events.put(_DONE)
+
+    threads = [
+        threading.Thread(target=run_ocr, name="overlap-ocr", daemon=True),
+        threading.Thread(target=run_parse, name="overlap-parse", daemon=True),
+    ]
+    for t in threads:
+        t.start()
+    try:
+        while True:
+            event = events.get()
+            if event is _DONE:
+                break
+            yield event
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,54 @@
+from collections.abc import Hashable, Sequence
+from datetime import date, datetime
+
+import numpy as np
+
+Moment = date | datetime | np.datetime64
+
+
+def epoch_seconds(moment: Moment) -> np.int64:
+    return np.datetime64(moment, "s").astype(np.int64)
+
+
+class TemporalIndex:
+    def __init__(self, keys: Sequence[Hashable], moments: Sequence[Moment] | np.ndarray):
+        stamps = np.asarray(moments, dtype="datetime64[s]")
+        order = np.argsort(stamps, kind="stable")
+        self.keys = [keys[i] for i in order]
+        self.ranks = order
+        self.epochs = stamps[order].astype(np.int64)
+        sorted_stamps = stamps[order]
+        month_starts = sorted_stamps.astype("datetime64[M]")
+        months = month_starts.astype(np.int64) % 12 + 1
+        days = (sorted_stamps.astype("datetime64[D]") - month_starts.astype("datetime64[D]")).astype(np.int64) + 1
+        codes = months * 32 + days
+        by_code = np.argsort(codes, kind="stable")
+        uniq, starts = np.unique(codes[by_code], return_index=True)
+        self._days = {
+            (int(c) // 32, int(c) % 32): positions
+            for c, positions in zip(uniq, np.split(by_code, starts[1:]))
+        }
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def first(self) -> datetime | None:
+        return self.epochs[0].astype("datetime64[s]").item() if len(self) else None
+
+    def last(self) -> datetime | None:
+        return self.epochs[-1].astype("datetime64[s]").item() if len(self) else None
+
+    def span(self, lo: Moment, hi: Moment, *, closed: bool = True) -> slice:
+        start = int(np.searchsorted(self.epochs, epoch_seconds(lo), "left"))
+        stop = int(np.searchsorted(self.epochs, epoch_seconds(hi), "right" if closed else "left"))
+        return slice(start, stop)
+
+    def window(self, lo: Moment, hi: Moment, *, closed: bool = True) -> list:
+        return self.keys[self.span(lo, hi, closed=closed)]
+
+    def insertion_point(self, moment: Moment) -> int:
+        return int(np.searchsorted(self.epochs, epoch_seconds(moment), "right"))
+
+    def on_day(self, month: int, day: int) -> list:
+        positions = self._days.get((month, day))
+        return [] if positions is None else [self.keys[i] for i in positions]
@@ -0,0 +1,38 @@
+from archive_catalog import catalog_version, reconcile_catalog
+from data import delete_sidecar, load_reorganized_state, write_sidecar
+from models import ReviewDecision, Sidecar
+
+
+def _sidecar(original: str, name: str) -> Sidecar:
+    review = ReviewDecision(
+        verdict="accepted", document_type="receipt", name=name, date="2024-03-01", time="10:00"
+    )
+    return Sidecar(original_filename=original, review=review)
+
+
+def test_write_sidecar_keeps_catalog_in_sync(tmp_path):
+    data_file = tmp_path / "2024" / "03" / "a.jpg"
+    data_file.parent.mkdir(parents=True)
+    data_file.write_bytes(b"img")
+    write_sidecar(data_file, _sidecar("scan_a.jpg", "Shop"))
+    assert reconcile_catalog(tmp_path) == 0
+    _, accepted = load_reorganized_state(tmp_path)
+    assert accepted["scan_a.jpg"][1] == "2024/03/a.jpg"
+    delete_sidecar(data_file)
+    assert reconcile_catalog(tmp_path) == 0
+    assert load_reorganized_state(tmp_path)[1] == {}
+
+
+def test_reconcile_rereads_only_changed_sidecars(tmp_path):
+    month = tmp_path / "2024" / "03"
+    month.mkdir(parents=True)
+    for stem in ("a", "b"):
+        (month / f"{stem}.jpg").write_bytes(b"img")
+        (month / f"{stem}.json").write_text(_sidecar(f"scan_{stem}.jpg", "Shop").model_dump_json(), encoding="utf-8")
+    assert reconcile_catalog(tmp_path) == 2
+    version = catalog_version(tmp_path)
+    (month / "b.json").write_text(_sidecar("scan_b.jpg", "Renamed Shop").model_dump_json(), encoding="utf-8")
+    assert reconcile_catalog(tmp_path) == 1
+    assert catalog_version(tmp_path) == version + 1
+    _, accepted = load_reorganized_state(tmp_path)
+    assert accepted["scan_b.jpg"][0].review.name == "Renamed Shop"
@@ -0,0 +1,79 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+from blank_pages import BLANK_INK_RATIO, blank_keys, ink_ratio, split_blank_pages
+from models import DocumentIndex, ReviewDecision, batch_serial_key
+
+
+def _page(path, text=False):
+    rng = np.random.default_rng(0)
+    pixels = np.clip(235 + rng.normal(0, 6, (1200, 900)), 0, 255).astype(np.uint8)
+    pixels[:, :20] = 30
+    pixels[500:520, 300:320] = 200
+    img = Image.fromarray(pixels)
+    if text:
+        draw = ImageDraw.Draw(img)
+        for y in range(150, 1000, 60):
+            draw.rectangle((120, y, 760, y + 14), fill=20)
+    img.save(path)
+    return path
+
+
+def test_backsides_are_blank_and_only_all_blank_documents_are_tossed(tmp_path):
+    items = [
+        (batch_serial_key(1, i), _page(tmp_path / f"{i}.jpg", text=i in (1, 3)))
+        for i in range(1, 5)
+    ]
+    assert ink_ratio(items[0][1]) > 0.05
+    assert ink_ratio(items[1][1]) < BLANK_INK_RATIO
+    blank = blank_keys(items + [("1:9", tmp_path / "missing.jpg")])
+    assert blank == {"1:2", "1:4"}
+
+    index = DocumentIndex.from_raw_groups([["1:1", "1:2"]], {k for k, _ in items})
+    docs, pages = split_blank_pages(index, blank)
+    assert [str(d) for d in docs] == ["1:4"]
+    assert pages == ["1:2"]
+
+
+def test_skip_blank_pages_tosses_blank_documents_and_records_empty_pages(tmp_path):
+    from blank_pages import skip_blank_pages
+    from data import load_decisions, load_ocr_results, save_document_groups
+    from models import DocumentGroups
+    from working_set import clear_working_set
+
+    clear_working_set()
+    items = [(batch_serial_key(1, i), _page(tmp_path / f"{i}.jpg", text=i in (1, 3))) for i in range(1, 5)]
+    save_document_groups(tmp_path, DocumentGroups(groups=[["1:1", "1:2"]]))
+    remaining, empty, tossed = skip_blank_pages(tmp_path, items, {k for k, _ in items})
+    assert [k for k, _ in remaining] == ["1:1", "1:3"]
+    assert sorted(empty) == ["1:2", "1:4"] and all(r.markdown == "" for r in empty.values())
+    assert [str(d) for d in tossed] == ["1:4"]
+    assert load_decisions(tmp_path)["1:4"].verdict == "tossed"
+    assert set(load_ocr_results(tmp_path)) == {"1:2", "1:4"}
+
+
+def test_recovered_blank_document_is_not_tossed_again(tmp_path):
+    from blank_pages import skip_blank_pages
+    from data import load_decisions, load_ocr_results, save_decisions
+    from working_set import clear_working_set
+
+    clear_working_set()
+    items = [(batch_serial_key(1, i), _page(tmp_path / f"{i}.jpg", text=i == 1)) for i in range(1, 3)]
+    keys = {k for k, _ in items}
+    skip_blank_pages(tmp_path, items, keys)
+    decisions = load_decisions(tmp_path)
+    assert decisions["1:2"].comment == "blank page"
+    del decisions["1:2"]
+    save_decisions(tmp_path, decisions)
+
+    ocr = load_ocr_results(tmp_path)
+    todo = [(k, p) for k, p in items if k not in ocr]
+    remaining, empty, tossed = skip_blank_pages(tmp_path, todo, keys)
+    assert [k for k, _ in remaining] == ["1:1"] and empty == {} and tossed == []
+    assert "1:2" not in load_decisions(tmp_path)
+
+    decisions = load_decisions(tmp_path)
+    decisions["1:2"] = ReviewDecision(verdict="accepted", document_type="other", name="Note", date="", time="")
+    save_decisions(tmp_path, decisions)
+    remaining, empty, tossed = skip_blank_pages(tmp_path, items, keys)
+    assert tossed == [] and load_decisions(tmp_path)["1:2"].verdict == "accepted"
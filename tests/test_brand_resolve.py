@@ -1,6 +1,7 @@
+import pandas as pd
 import pytest
 
-from brand_registry import BrandDirectory, BrandEntry, resolve_brand
+from brand_registry import BrandDirectory, BrandEntry, BrandMatcher, enrich_receipt_brand_columns, resolve_brand
 
 
 def test_resolve_brand_empty_name_returns_empty_result():
@@ -52,3 +53,20 @@ def test_resolve_brand_trims_prefix_and_extracts_location():
     result = resolve_brand("seven-eleven KLCC", directory)
     assert result.brand_id == "seven"
     assert result.brand_location == "KLCC"
+
+
+def test_enrich_receipt_brand_columns_maps_unique_names():
+    directory = BrandDirectory(
+        brands=[BrandEntry(id="seven", label="Seven-Eleven", prefixes=["seven-eleven"])]
+    )
+    df = pd.DataFrame(
+        {
+            "document_type": ["receipt", "receipt", "other", "receipt"],
+            "name": ["Seven-Eleven KLCC", "Seven-Eleven KLCC", "Seven-Eleven", "Corner Shop"],
+        }
+    )
+    out = enrich_receipt_brand_columns(df, BrandMatcher(directory))
+    assert out["brand_id"].tolist()[:2] == ["seven", "seven"]
+    assert out["brand_location"].tolist() == ["KLCC", "KLCC", "", ""]
+    assert out["merchant_group"].tolist() == ["Seven-Eleven", "Seven-Eleven", "", "Corner Shop"]
+    assert pd.isna(out["brand_id"].iloc[2]) and pd.isna(out["brand_id"].iloc[3])
@@ -0,0 +1,32 @@
+import random
+from datetime import timedelta
+
+from dedupe_candidates import find_dedupe_pairs, receipt_index
+from models import ReviewDecision
+
+
+def test_sweep_finds_every_pair_within_tolerances():
+    rng = random.Random(11)
+    decisions = {
+        f"1-{i}": ReviewDecision(
+            verdict="accepted",
+            document_type="receipt",
+            name=rng.choice(["Lawson", "Lawsn", "FamilyMart", ""]),
+            date=f"2024-01-{rng.randint(1, 3):02d}",
+            time=f"{rng.randint(9, 11):02d}:{rng.randint(0, 59):02d}",
+            cost=float(rng.choice([0, 100, 101, 103, 500, 505, -100])),
+        )
+        for i in range(400)
+    }
+    index = receipt_index(decisions)
+    for minutes, tolerance in [(5, 0.0), (5, 0.01), (20, 0.05)]:
+        expected = set()
+        for a in range(len(index)):
+            for b in range(a + 1, len(index)):
+                ca, cb = decisions[index.keys[a]].cost, decisions[index.keys[b]].cost
+                if index.epochs[b] - index.epochs[a] <= minutes * 60 and abs(ca - cb) <= tolerance * max(abs(ca), abs(cb)):
+                    expected.add((index.keys[a], index.keys[b]))
+        pairs = find_dedupe_pairs(decisions, index, timedelta(minutes=minutes), tolerance)
+        assert {(p.first, p.second) for p in pairs} == expected
+        assert [p.score for p in pairs] == sorted((p.score for p in pairs), reverse=True)
+        assert all(0.0 <= p.score <= 1.0 for p in pairs)
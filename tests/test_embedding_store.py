@@ -0,0 +1,67 @@
+import numpy as np
+
+from embedding_store import EmbeddingStore, open_embedding_store
+
+
+def test_append_grows_memory_mapped_matrix(tmp_path):
+    store = open_embedding_store(tmp_path, "nomic-embed-text:latest")
+    assert store.matrix() is None
+    store.append(["a", "b"], np.array([[1, 0], [0, 1]], dtype=np.float32))
+    first = store.matrix()
+    store.append(["ç"], np.array([[0.5, 0.5]], dtype=np.float32))
+
+    reopened = EmbeddingStore(store.root)
+    assert reopened.names() == ["a", "b", "ç"]
+    assert reopened.lookup()["ç"] == 2
+    matrix = reopened.matrix()
+    assert isinstance(matrix, np.memmap)
+    assert matrix.dtype == np.float32
+    assert np.array_equal(matrix, [[1, 0], [0, 1], [0.5, 0.5]])
+    assert np.array_equal(first, [[1, 0], [0, 1]])
+    assert np.load(store.root / "vectors.npy").shape == (3, 2)
+
+
+def test_models_are_namespaced_and_torn_names_ignored(tmp_path):
+    a = open_embedding_store(tmp_path, "model-a")
+    b = open_embedding_store(tmp_path, "model-b")
+    a.append(["x"], np.ones((1, 3), dtype=np.float32))
+    assert b.names() == []
+
+    with open(a.root / "names.jsonl", "ab") as f:
+        f.write(b'"half')
+    reopened = EmbeddingStore(a.root)
+    assert reopened.names() == ["x"]
+    reopened.append(["y"], np.zeros((1, 3), dtype=np.float32))
+    assert EmbeddingStore(a.root).names() == ["x", "y"]
+
+
+def test_ensure_embeddings_persists_chunks_and_reports_progress(tmp_path, monkeypatch):
+    import name_similarity
+
+    monkeypatch.setattr(name_similarity, "EMBED_CHUNK_SIZE", 3)
+    names = [f"shop {i}" for i in range(10)]
+    seen: list[tuple[int, int]] = []
+    cached, matrix = name_similarity.ensure_embeddings(
+        tmp_path, names, name_similarity.OFFLINE_EMBED_MODEL, progress=lambda done, total: seen.append((done, total))
+    )
+    assert sorted(cached) == sorted(names)
+    assert matrix.shape == (10, 512)
+    assert [total for _, total in seen] == [10] * 4 and seen[-1][0] == 10
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0, atol=1e-5)
+    assert name_similarity.missing_embeddings(tmp_path, names + ["new"], name_similarity.OFFLINE_EMBED_MODEL) == ["new"]
+
+
+def test_legacy_npz_is_migrated_only_on_request(tmp_path):
+    from name_similarity import EMBED_MODEL, embedding_store, migrate_legacy_embeddings
+
+    legacy = tmp_path / "name_embeddings.npz"
+    np.savez(legacy, names=np.array(["a", "b"], dtype=object), matrix=np.eye(2, dtype=np.float32))
+    store = embedding_store(tmp_path, EMBED_MODEL)
+    store.append(["b"], np.array([[0, 2]], dtype=np.float32))
+    assert legacy.exists()
+
+    assert migrate_legacy_embeddings(tmp_path) == 1
+    assert not legacy.exists() and (tmp_path / "name_embeddings.npz.migrated").exists()
+    reopened = embedding_store(tmp_path, EMBED_MODEL)
+    assert reopened.names() == ["b", "a"]
+    assert np.array_equal(reopened.matrix(), [[0, 2], [1, 0]])
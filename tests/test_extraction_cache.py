@@ -0,0 +1,40 @@
+import extraction_runner
+from extraction_cache import extraction_cache_stats, get_cached_extraction, put_cached_extraction, reset_cache_counters
+from extraction_runner import iter_extractions
+from models import OtherResult
+
+
+def _other(title: str) -> OtherResult:
+    return OtherResult(document_type="other", language="en", date="", time="", title=title)
+
+
+def test_cached_extraction_skips_model_call(tmp_path, monkeypatch):
+    calls: list[str] = []
+
+    def fake_extract(ocr_text: str, has_boxes: bool = False, custom_instruction: str = ""):
+        calls.append(ocr_text)
+        return _other(ocr_text)
+
+    monkeypatch.setitem(extraction_runner.EXTRACTORS, "fake", fake_extract)
+    reset_cache_counters()
+    items = [("1:1", "alpha", False), ("1:2", "beta", False)]
+    first = dict(iter_extractions("fake", items, cache_root=tmp_path))
+    second = dict(iter_extractions("fake", items, cache_root=tmp_path))
+    third = dict(iter_extractions("fake", items, custom_instruction="be terse", cache_root=tmp_path))
+    assert sorted(calls) == ["alpha", "alpha", "beta", "beta"]
+    assert second["1:2"] == first["1:2"]
+    assert third["1:1"].title == "alpha"
+    stats = extraction_cache_stats(tmp_path)
+    assert (stats.hits, stats.misses, stats.entries) == (2, 4, 4)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    entry = _other("x")
+    size = len(entry.model_dump_json())
+    for prompt in ("a", "b", "c"):
+        put_cached_extraction(tmp_path, "m", prompt, entry, max_bytes=size * 2)
+        if prompt == "b":
+            assert get_cached_extraction(tmp_path, "m", "a") is not None
+    assert get_cached_extraction(tmp_path, "m", "a") is not None
+    assert get_cached_extraction(tmp_path, "m", "b") is None
+    assert get_cached_extraction(tmp_path, "m", "c") is not None
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import extraction
+from extraction_runner import RateLimiter, iter_extractions
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    script: list[int] = []
+    connections: set[int] = set()
+    active = 0
+    peak = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        cls = type(self)
+        with cls.lock:
+            cls.connections.add(self.client_address[1])
+            status = cls.script.pop(0) if cls.script else 200
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.active -= 1
+        if status != 200:
+            payload = json.dumps({"error": {"message": "slow down", "type": "rate_limit"}}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        prompt = json.loads(body)["messages"][0]["content"]
+        content = json.dumps({"document_type": "other", "title": prompt.rsplit("\n", 1)[-1]})
+        payload = json.dumps(
+            {
+                "id": "x",
+                "object": "chat.completion",
+                "created": 0,
+                "model": extraction.OPENAI_MODEL,
+                "choices": [
+                    {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+                ],
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(extraction, "RETRY_BASE_DELAY", 0.01)
+    extraction.openai_client.cache_clear()
+    _StandInHandler.script = []
+    _StandInHandler.connections = set()
+    _StandInHandler.peak = 0
+    yield _StandInHandler
+    server.shutdown()
+    extraction.openai_client.cache_clear()
+
+
+def test_iter_extractions_retries_and_runs_concurrently(stand_in):
+    stand_in.script = [429, 503]
+    name = f"OpenAI - {extraction.OPENAI_MODEL}"
+    items = [(f"1:{i}", f"doc {i}", False) for i in range(6)]
+    results = dict(iter_extractions(name, items, concurrency=3))
+    assert set(results) == {key for key, _, _ in items}
+    assert all(not isinstance(r, Exception) for r in results.values())
+    assert results["1:4"].title == "doc 4"
+    assert 1 < stand_in.peak <= 3
+    assert len(stand_in.connections) < len(items)
+
+
+def test_each_retry_takes_a_limiter_token(stand_in):
+    stand_in.script = [429]
+    acquired: list[int] = []
+
+    class CountingLimiter(RateLimiter):
+        def acquire(self, tokens: int = 0) -> None:
+            acquired.append(tokens)
+
+    name = f"OpenAI - {extraction.OPENAI_MODEL}"
+    results = dict(iter_extractions(name, [("1:1", "doc", False)], limiter=CountingLimiter(60)))
+    assert results["1:1"].title == "doc"
+    assert len(acquired) == 2 and acquired[0] == acquired[1] > 0
+
+
+def test_non_retryable_error_is_returned(stand_in):
+    stand_in.script = [400]
+    name = f"OpenAI - {extraction.OPENAI_MODEL}"
+    results = dict(iter_extractions(name, [("1:1", "doc", False)]))
+    assert isinstance(results["1:1"], Exception)
+
+
+def test_rate_limiter_spaces_requests():
+    now = [0.0]
+    slept: list[float] = []
+
+    def sleep(s: float) -> None:
+        slept.append(s)
+        now[0] += s
+
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=300, clock=lambda: now[0], sleep=sleep)
+    for _ in range(60):
+        limiter.acquire(5)
+    assert slept == []
+    limiter.acquire(5)
+    assert slept == [pytest.approx(1.0)]
+    limiter.acquire(300)
+    assert now[0] == pytest.approx(61.0, abs=0.01)
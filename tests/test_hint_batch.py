@@ -0,0 +1,52 @@
+import random
+
+from models import CorruptedResult, OtherResult, ReceiptItem, ReceiptResult
+from rules.cost_check import cost_check
+from rules.cost_large_check import cost_large_check
+from rules.cost_zero_check import cost_zero_check
+from rules.currency_uncommon_check import currency_uncommon_check
+from rules.date_check import date_check
+from validation import evaluate_hints, hint_severity
+
+RULES = [date_check, cost_zero_check, cost_large_check, currency_uncommon_check, cost_check]
+
+
+def _random_extraction(rng):
+    date = rng.choice(["", "2025-03-01", "2019-07-15", "2012-01-01", "2099-01-01", "2024-13-01", "03/01/2025"])
+    time = rng.choice(["", "09:30", "09:30:15", "25:00", "9am"])
+    kind = rng.random()
+    if kind < 0.1:
+        return CorruptedResult(document_type="corrupted")
+    if kind < 0.3:
+        return OtherResult(document_type="other", language="en", date=date, time=time, title="Letter")
+    items = [ReceiptItem(name="x", total_price=rng.choice([None, 100.0, 250.5])) for _ in range(rng.randint(0, 3))]
+    return ReceiptResult(
+        document_type="receipt",
+        language="ja",
+        date=date,
+        time=time,
+        name="Shop",
+        currency=rng.choice(["JPY", "jpy", "CNY", "USD", "", " "]),
+        address="",
+        items=items,
+        cost=rng.choice([0.0, 100.0, 350.5, 500.0, 12_000.0]),
+    )
+
+
+def test_batch_evaluation_matches_scalar_rules_and_reuses_cached_rows():
+    rng = random.Random(11)
+    extractions = {f"1-{i}": _random_extraction(rng) for i in range(400)}
+    table = evaluate_hints(extractions, RULES)
+    for key, ext in extractions.items():
+        for rule in RULES:
+            assert table.at[key, rule.__name__] == hint_severity(rule(ext)), (rule.__name__, ext)
+        assert table.at[key, "severity"] == max(hint_severity(rule(ext)) for rule in RULES)
+
+    extractions.pop("1-0")
+    extractions["1-1"] = ReceiptResult(
+        document_type="receipt", language="ja", date="", time="", name="", currency="JPY", address="", cost=0.0
+    )
+    updated = evaluate_hints(extractions, RULES)
+    assert list(updated.index) == list(extractions)
+    assert updated.at["1-1", "cost_zero_check"] == 2
+    assert updated.at["1-2", "severity"] == table.at["1-2", "severity"]
@@ -0,0 +1,50 @@
+import random
+
+import numpy as np
+from PIL import Image
+
+import image_hash
+from image_hash import find_near_duplicates, hamming, refresh_image_hashes
+
+
+def _scan(path, seed, size=(300, 400)):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 255, (8, 6, 3), dtype=np.uint8)
+    Image.fromarray(pixels).resize(size, Image.Resampling.BILINEAR).save(path)
+
+
+def test_rescans_hash_close_and_only_changed_files_are_rehashed(tmp_path, monkeypatch):
+    month = tmp_path / "2024" / "03"
+    month.mkdir(parents=True)
+    _scan(month / "a.jpg", 1)
+    _scan(month / "a_again.png", 1, size=(600, 800))
+    _scan(month / "b.jpg", 2)
+    rels = ["2024/03/a.jpg", "2024/03/a_again.png", "2024/03/b.jpg", "2024/03/notes.pdf"]
+
+    hashes = refresh_image_hashes(tmp_path, rels)
+    assert set(hashes) == set(rels[:3])
+    assert hamming(hashes[rels[0]], hashes[rels[1]]) <= 4
+    assert hamming(hashes[rels[0]], hashes[rels[2]]) > 10
+
+    calls = []
+    original = image_hash.dhash
+    monkeypatch.setattr(image_hash, "dhash", lambda path: calls.append(path.name) or original(path))
+    assert refresh_image_hashes(tmp_path, rels) == hashes
+    assert calls == []
+    _scan(month / "b.jpg", 1)
+    refresh_image_hashes(tmp_path, rels[1:])
+    assert calls == ["b.jpg"]
+
+
+def test_multi_index_matches_brute_force():
+    rng = random.Random(5)
+    seeds = [rng.getrandbits(64) for _ in range(40)]
+    hashes = {f"k{i}": rng.choice(seeds) ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for i in range(300)}
+    keys = list(hashes)
+    expected = sorted(
+        (a, b, hamming(hashes[a], hashes[b]))
+        for i, a in enumerate(keys)
+        for b in keys[i + 1:]
+        if hamming(hashes[a], hashes[b]) <= 6
+    )
+    assert sorted(find_near_duplicates(hashes, 6)) == expected
@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import numpy as np
+
+from name_similarity import levenshtein_similarity
+from normalize_engines import StringEngine
+
+NAMES = ["seven eleven", "seven-eleven", "7 eleven", "lawson", "lawson station", "family mart"]
+
+
+def test_string_engine_distance_matches_pairwise_levenshtein():
+    dist = StringEngine()._dist_matrix(Path("."), NAMES)
+    expected = np.array([[1.0 - levenshtein_similarity(a, b) for b in NAMES] for a in NAMES])
+    assert dist.dtype == np.float32
+    assert np.allclose(dist, expected, atol=1e-6)
+
+
+def test_string_engine_clusters_similar_names():
+    clusters = StringEngine().run(Path("."), NAMES, 0.2)
+    assert sorted(sorted(c) for c in clusters.values()) == [["seven eleven", "seven-eleven"]]
+
+
+def test_string_engine_keeps_pairs_exactly_at_threshold():
+    from normalize_engines import clear_normalize_cache
+
+    names = ["dcee", "dceea", "zzzz"]
+    engine = StringEngine()
+    eps = 1.0 - 80 / 100
+    clear_normalize_cache()
+    assert list(engine.run(Path("."), names, eps).values()) == [["dcee", "dceea"]]
+    clear_normalize_cache()
+    engine.run(Path("."), names, 1.0 - 50 / 100)
+    assert list(engine.run(Path("."), names, eps).values()) == [["dcee", "dceea"]]
+    assert engine.run(Path("."), names, 1.0 - 81 / 100) == {}
+
+
+def test_embedding_engine_sparse_graph_matches_dense_clustering(monkeypatch):
+    from sklearn.cluster import DBSCAN
+    from sklearn.metrics.pairwise import cosine_distances
+
+    import normalize_engines
+    from normalize_engines import EmbeddingEngine
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(40, 16))
+    vectors = (centers[rng.integers(0, 40, 300)] + rng.normal(scale=0.1, size=(300, 16))).astype(np.float32)
+    names = [f"name {i}" for i in range(300)]
+    monkeypatch.setattr(normalize_engines, "ensure_embeddings", lambda output_path, *_: (names, vectors))
+    monkeypatch.setattr(normalize_engines, "active_embedding_model", lambda: "test-model")
+    monkeypatch.setattr(normalize_engines, "BLOCK_BYTES", 4 * 300 * 7)
+
+    eps = 0.02
+    graph = EmbeddingEngine()._radius_graph(Path("."), names, eps)
+    assert graph.nnz < 300 * 300 // 4
+    clusters = EmbeddingEngine().run(Path("."), names, eps)
+    labels = DBSCAN(eps=eps, min_samples=2, metric="precomputed").fit(cosine_distances(vectors)).labels_
+    dense: dict[int, list[str]] = {}
+    for i, label in enumerate(labels):
+        if label != -1:
+            dense.setdefault(label, []).append(names[i])
+    assert sorted(map(sorted, clusters.values())) == sorted(map(sorted, dense.values()))
+
+
+def test_run_reuses_cached_distances_across_eps(monkeypatch):
+    from normalize_engines import DISTANCE_TOLERANCE, clear_normalize_cache
+
+    clear_normalize_cache()
+    engine = StringEngine()
+    calls: list[float] = []
+    original = engine._radius_graph
+
+    def counting(output_path, names, eps):
+        calls.append(round(eps - DISTANCE_TOLERANCE, 6))
+        return original(output_path, names, eps)
+
+    monkeypatch.setattr(engine, "_radius_graph", counting)
+    wide = engine.run(Path("."), NAMES, 0.5)
+    narrow = engine.run(Path("."), list(reversed(NAMES)), 0.2)
+    again = engine.run(Path("."), NAMES, 0.2)
+    assert calls == [0.5]
+    assert sorted(sorted(c) for c in narrow.values()) == [["seven eleven", "seven-eleven"]]
+    assert again == narrow
+    assert len(wide) >= len(narrow)
+    engine.run(Path("."), NAMES + ["lawson store"], 0.2)
+    assert calls == [0.5, 0.2]
@@ -0,0 +1,85 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+import ocr_runner
+from models import DetectedBox
+from ocr_prep import prepare_ocr_image, to_source_boxes
+from ocr_runner import iter_ocr_results
+
+
+def _red_bounds(img: Image.Image) -> list[int]:
+    pixels = np.asarray(img.convert("RGB")).astype(int)
+    ys, xs = np.nonzero((pixels[..., 0] > 150) & (pixels[..., 1] < 80))
+    h, w = pixels.shape[:2]
+    return [int(xs.min() / w * 1000), int(ys.min() / h * 1000), int(xs.max() / w * 1000), int(ys.max() / h * 1000)]
+
+
+def _skewed_scan(path):
+    page = Image.new("RGB", (1200, 1600), "white")
+    draw = ImageDraw.Draw(page)
+    for y in range(100, 1500, 50):
+        draw.rectangle((100, y, 1100, y + 15), fill=(30, 30, 30))
+    draw.rectangle((700, 800, 900, 860), fill=(200, 0, 0))
+    canvas = Image.new("RGB", (3000, 4000), (250, 250, 250))
+    canvas.paste(page.rotate(-3, expand=True, fillcolor="white"), (600, 900))
+    canvas.save(path, quality=95)
+    return canvas
+
+
+def test_prepared_image_is_cropped_deskewed_and_boxes_map_back(tmp_path):
+    source = tmp_path / "scan.jpg"
+    canvas = _skewed_scan(source)
+    prepared = prepare_ocr_image(tmp_path, source, 1600)
+    assert max(prepared.size) == 1600
+    assert abs(prepared.angle - 3.0) <= 0.25
+    assert prepared.crop[2] - prepared.crop[0] < 1500
+    assert prepare_ocr_image(tmp_path, source, 1600) == prepared
+
+    with Image.open(prepared.path) as derivative:
+        box = DetectedBox(ref_type="0", coords=[_red_bounds(derivative)])
+    mapped = to_source_boxes([box], prepared)[0].coords[0]
+    assert all(abs(a - b) <= 3 for a, b in zip(mapped, _red_bounds(canvas)))
+
+
+def test_runner_sends_prepared_copy_and_returns_source_boxes(monkeypatch, tmp_path):
+    class Provider:
+        INPUT_MAX_EDGE = 800
+        seen = []
+
+        def run(self, path, structured=False):
+            self.seen.append(path)
+            return "<|ref|>all<|/ref|><|det|>[[0, 0, 1000, 1000]]<|/det|>" if structured else "text"
+
+    provider = Provider()
+    monkeypatch.setitem(ocr_runner.OCR_PROVIDERS, "prep", provider)
+    source = tmp_path / "scan.jpg"
+    _skewed_scan(source)
+    result = dict(iter_ocr_results("prep", [("1:1", source)], True, prep_root=tmp_path))["1:1"]
+    assert {p.name for p in provider.seen} == {prepare_ocr_image(tmp_path, source, 800).path.name}
+    x1, y1, x2, y2 = result.boxes[0].coords[0]
+    assert 150 < x1 < 250 and 200 < y1 < 260 and 560 < x2 < 650 and 600 < y2 < 660
+
+
+def test_cache_is_keyed_on_prep_settings(monkeypatch, tmp_path):
+    class Provider:
+        INPUT_MAX_EDGE = 800
+        calls = 0
+
+        def run(self, path, structured=False):
+            Provider.calls += 1
+            return "text"
+
+    monkeypatch.setitem(ocr_runner.OCR_PROVIDERS, "prep", Provider())
+    source = tmp_path / "scan.jpg"
+    _skewed_scan(source)
+
+    def run(**kwargs):
+        list(iter_ocr_results("prep", [("1:1", source)], False, cache_root=tmp_path, **kwargs))
+        return Provider.calls
+
+    assert run(prep_root=tmp_path) == 1
+    assert run(prep_root=tmp_path) == 1
+    assert run() == 2
+    assert run() == 2
+    assert run(prep_root=tmp_path, max_edge=600) == 3
+    assert run(prep_root=tmp_path, max_edge=800) == 3
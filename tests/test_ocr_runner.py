@@ -0,0 +1,78 @@
+import threading
+import time
+from pathlib import Path
+
+import ocr_runner
+from ocr_runner import iter_ocr_results
+
+
+class _FakeProvider:
+    MAX_CONCURRENCY = None
+
+    def __init__(self, fail: set[str] = frozenset()):
+        self.fail = fail
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def run(self, path: Path, structured: bool = False) -> str:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        if path.name in self.fail:
+            raise RuntimeError("boom")
+        if structured:
+            return f"<|ref|>{path.name}<|/ref|><|det|>[[1, 2, 3, 4]]<|/det|>"
+        return f"text {path.name}"
+
+
+def test_iter_ocr_results_bounds_in_flight_images(monkeypatch):
+    provider = _FakeProvider(fail={"b.png"})
+    monkeypatch.setitem(ocr_runner.OCR_PROVIDERS, "fake", provider)
+    items = [(f"1:{i}", Path(name)) for i, name in enumerate(["a.png", "b.png", "c.png", "d.png", "e.png"])]
+    results = dict(iter_ocr_results("fake", items, structured=True, concurrency=2))
+    assert set(results) == {key for key, _ in items}
+    assert provider.peak <= 4
+    assert not results["1:1"].succeeded
+    assert results["1:0"].markdown == "text a.png"
+    assert results["1:0"].boxes[0].text == "a.png"
+
+
+def test_effective_concurrency_respects_provider_cap(monkeypatch):
+    provider = _FakeProvider()
+    provider.MAX_CONCURRENCY = 1
+    monkeypatch.setitem(ocr_runner.OCR_PROVIDERS, "serial", provider)
+    assert ocr_runner.effective_concurrency("serial", 8) == 1
+    list(iter_ocr_results("serial", [("1:1", Path("a.png")), ("1:2", Path("b.png"))], structured=True, concurrency=8))
+    assert provider.peak == 1
+
+
+def test_iter_ocr_results_reuses_cache_by_image_content(monkeypatch, tmp_path):
+    provider = _FakeProvider()
+    calls: list[str] = []
+    original_run = provider.run
+
+    def counting_run(path: Path, structured: bool = False) -> str:
+        calls.append(path.name)
+        return original_run(path, structured)
+
+    provider.run = counting_run
+    monkeypatch.setitem(ocr_runner.OCR_PROVIDERS, "fake", provider)
+    (tmp_path / "a.png").write_bytes(b"same bytes")
+    (tmp_path / "copy.png").write_bytes(b"same bytes")
+    (tmp_path / "b.png").write_bytes(b"other bytes")
+
+    first = dict(iter_ocr_results("fake", [("1:1", tmp_path / "a.png")], False, cache_root=tmp_path))
+    second = dict(
+        iter_ocr_results(
+            "fake", [("2:1", tmp_path / "copy.png"), ("2:2", tmp_path / "b.png")], False, cache_root=tmp_path
+        )
+    )
+    assert calls == ["a.png", "b.png"]
+    assert second["2:1"] == first["1:1"]
+
+    list(iter_ocr_results("fake", [("2:1", tmp_path / "copy.png")], True, cache_root=tmp_path))
+    assert calls.count("copy.png") == 2
@@ -0,0 +1,38 @@
+import ast
+import importlib
+import importlib.util
+import re
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _page_paths() -> list[Path]:
+    app = (ROOT / "app.py").read_text(encoding="utf-8")
+    return [ROOT / p for p in re.findall(r'st\.Page\("([^"]+)"', app)]
+
+
+def _resolves(module, module_name: str, name: str) -> bool:
+    if hasattr(module, name):
+        return True
+    return hasattr(module, "__path__") and importlib.util.find_spec(f"{module_name}.{name}") is not None
+
+
+def test_every_page_imports_resolve():
+    pages = _page_paths()
+    assert pages
+    missing = []
+    for page in pages:
+        tree = ast.parse(page.read_text(encoding="utf-8"), filename=str(page))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                module = importlib.import_module(node.module)
+                missing.extend(
+                    f"{page.relative_to(ROOT)}: {node.module}.{alias.name}"
+                    for alias in node.names
+                    if alias.name != "*" and not _resolves(module, node.module, alias.name)
+                )
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    importlib.import_module(alias.name)
+    assert missing == []
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from PIL import Image
+from streamlit.testing.v1 import AppTest
+
+import settings
+from settings import AppConfig
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _configure(monkeypatch, tmp_path, **values):
+    config = tmp_path / "config.json"
+    config.write_text(AppConfig(**values).model_dump_json(), encoding="utf-8")
+    monkeypatch.setattr(settings, "CONFIG_PATH", config)
+
+
+def test_marked_workshop_renders_a_marked_file(monkeypatch, tmp_path):
+    output = tmp_path / "out"
+    (output / "marked").mkdir(parents=True)
+    Image.new("RGB", (300, 400), "white").save(output / "marked" / "1-1.jpg")
+    _configure(monkeypatch, tmp_path, batch_output_path=str(output))
+
+    app = AppTest.from_file(str(ROOT / "pages/curate/marked_workshop.py"), default_timeout=30).run()
+    assert not app.exception
+    assert app.title[0].value == "Marked Workshop"
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+import pytest
+
+from pipeline import build_parser, parse_deadline
+from settings import AppConfig
+
+
+def test_parse_deadline_clock_time_rolls_to_next_day():
+    now = datetime(2025, 3, 1, 22, 30)
+    assert parse_deadline("07:00", now) == datetime(2025, 3, 2, 7, 0)
+    assert parse_deadline("23:15", now) == datetime(2025, 3, 1, 23, 15)
+
+
+def test_parse_deadline_iso():
+    assert parse_deadline("2025-03-02T06:45") == datetime(2025, 3, 2, 6, 45)
+
+
+def test_invalid_deadline_is_a_usage_error(capsys):
+    with pytest.raises(SystemExit) as exc:
+        build_parser(AppConfig()).parse_args(["--deadline", "nope"])
+    assert exc.value.code == 2
+    assert "invalid deadline 'nope'" in capsys.readouterr().err
+    assert build_parser(AppConfig()).parse_args(["--deadline", "2025-03-02T06:45"]).deadline == datetime(2025, 3, 2, 6, 45)
@@ -0,0 +1,92 @@
+import threading
+
+import record_log
+from record_log import RecordLog
+
+
+def test_record_log_put_get_and_reopen(tmp_path):
+    log = RecordLog(tmp_path / "store.log")
+    log.put_many({"1:1": b'{"a":1}', "1:2": b'{"a":2}'})
+    log.put("1:1", b'{"a":3}')
+    assert log.get("1:1") == b'{"a":3}'
+    reopened = RecordLog(tmp_path / "store.log")
+    assert reopened.read_all() == {"1:1": b'{"a":3}', "1:2": b'{"a":2}'}
+
+
+def test_record_log_replace_all_only_appends_changes(tmp_path):
+    log = RecordLog(tmp_path / "store.log")
+    log.put_many({"1:1": b"1", "1:2": b"2"})
+    size_before = sum(p.stat().st_size for p in log.root.iterdir())
+    log.replace_all({"1:1": b"1", "1:2": b"2"})
+    assert sum(p.stat().st_size for p in log.root.iterdir()) == size_before
+    log.replace_all({"1:1": b"1"})
+    assert RecordLog(tmp_path / "store.log").keys() == ["1:1"]
+
+
+def test_record_log_discards_torn_trailing_write(tmp_path):
+    log = RecordLog(tmp_path / "store.log")
+    log.put("1:1", b"ok")
+    segment = next(log.root.iterdir())
+    with open(segment, "ab") as f:
+        f.write(b"1:2\t{partial")
+    reopened = RecordLog(tmp_path / "store.log")
+    assert reopened.read_all() == {"1:1": b"ok"}
+    reopened.put("1:3", b"next")
+    assert RecordLog(tmp_path / "store.log").read_all() == {"1:1": b"ok", "1:3": b"next"}
+
+
+def test_record_log_compaction_keeps_latest_values(tmp_path, monkeypatch):
+    monkeypatch.setattr(record_log, "COMPACT_MIN_BYTES", 1 << 30)
+    log = RecordLog(tmp_path / "store.log")
+    for i in range(50):
+        log.put_many({"1:1": str(i).encode(), "1:2": b"x" * i})
+    log.delete_many(["1:2"])
+    log.put("1:3", b"kept")
+    log.compact()
+    log.put("1:1", b"after")
+    assert log.read_all() == {"1:1": b"after", "1:3": b"kept"}
+    assert RecordLog(tmp_path / "store.log").read_all() == {"1:1": b"after", "1:3": b"kept"}
+
+
+def test_record_log_writers_on_the_same_root_do_not_clobber_each_other(tmp_path):
+    writers = [RecordLog(tmp_path / "store.log") for _ in range(4)]
+
+    def write(n: int) -> None:
+        for i in range(200):
+            writers[n].put(f"{n}:{i}", f"value-{n}-{i}".encode())
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(len(writers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    expected = {f"{n}:{i}": f"value-{n}-{i}".encode() for n in range(len(writers)) for i in range(200)}
+    assert RecordLog(tmp_path / "store.log").read_all() == expected
+    assert all(writers[0].get(key) == value for key, value in expected.items())
+
+
+def test_record_log_treats_a_corrupted_value_as_missing(tmp_path):
+    log = RecordLog(tmp_path / "store.log")
+    log.put_many({"1:1": b"good", "1:2": b"fine"})
+    segment = next(log.root.iterdir())
+    segment.write_bytes(segment.read_bytes().replace(b"good", b"gxod"))
+    assert log.get("1:1") is None
+    assert log.get("1:2") == b"fine"
+    assert log.read_all() == {"1:2": b"fine"}
+
+
+def test_legacy_ocr_json_is_left_alone_until_migrated(tmp_path):
+    from data import append_ocr_result, load_ocr_results, migrate_legacy_ocr_results
+    from models import OcrResult
+    from working_set import clear_working_set
+
+    clear_working_set()
+    legacy = tmp_path / "ocr.json"
+    legacy.write_text('{"1:1": {"markdown": "old"}, "1:2": {"markdown": "kept"}}', encoding="utf-8")
+    append_ocr_result(tmp_path, "1:1", OcrResult(markdown="new"))
+    assert set(load_ocr_results(tmp_path)) == {"1:1"}
+    assert legacy.exists()
+
+    assert migrate_legacy_ocr_results(tmp_path) == 1
+    assert not legacy.exists() and (tmp_path / "ocr.json.migrated").exists()
+    assert {k: v.markdown for k, v in load_ocr_results(tmp_path).items()} == {"1:1": "new", "1:2": "kept"}
@@ -0,0 +1,32 @@
+import os
+from io import BytesIO
+
+from PIL import Image
+
+from models import DetectedBox
+from review_prefetch import page_image, prefetch_pages, preview_image
+
+
+def test_pages_are_downscaled_annotated_and_keyed_by_source_version(tmp_path):
+    source = tmp_path / "scan.png"
+    Image.new("RGB", (3000, 4000), "white").save(source)
+    boxes = [DetectedBox(ref_type="text", coords=[[100, 100, 600, 200]], text="ACME")]
+    plain_spec = (source, 1, None, {})
+    annotated_spec = (source, 1, boxes, {"name": ["1:0"]})
+
+    prefetch_pages(tmp_path, [plain_spec, annotated_spec])
+    plain = page_image(tmp_path, plain_spec)
+    annotated = page_image(tmp_path, annotated_spec)
+    with Image.open(BytesIO(plain)) as img:
+        assert max(img.size) == 2000
+    assert annotated != plain
+    assert page_image(tmp_path, annotated_spec) is annotated
+
+    preview = preview_image(tmp_path, source)
+    assert preview.mode == "RGB" and preview.size == (1500, 2000)
+
+    Image.new("RGB", (400, 300), "black").save(source)
+    later = source.stat().st_mtime_ns + 1_000_000_000
+    os.utime(source, ns=(later, later))
+    with Image.open(BytesIO(page_image(tmp_path, plain_spec))) as img:
+        assert img.size == (400, 300)
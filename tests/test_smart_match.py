@@ -0,0 +1,194 @@
+import json
+import random
+import string
+
+from data import (
+    build_smart_match_history,
+    load_smart_match_entries,
+    migrate_legacy_smart_match_cache,
+    rename_smart_match_confirmed,
+    update_smart_match_entries,
+)
+from models import SmartMatchHistoryRow
+from name_similarity import (
+    MIN_PHONE_DIGITS,
+    PHONE_BOOST_MIN,
+    PHONE_WEIGHT,
+    QUICK_APPLY_THRESHOLD,
+    SMART_MATCH_THRESHOLD,
+    SmartMatchIndex,
+    levenshtein_similarity,
+    normalize_phone_for_match,
+    smart_match_index,
+)
+
+
+def _linear_scan(query_name, query_phone, history):
+    query_digits = normalize_phone_for_match(query_phone)
+    if not query_name and len(query_digits) < MIN_PHONE_DIGITS:
+        return []
+    best_name, best_phone = {}, {}
+    for row in history:
+        name_score = levenshtein_similarity(query_name, row.extracted) if query_name else 0.0
+        row_digits = normalize_phone_for_match(row.extracted_phone)
+        phone_score = (
+            levenshtein_similarity(query_digits, row_digits)
+            if len(query_digits) >= MIN_PHONE_DIGITS and len(row_digits) >= MIN_PHONE_DIGITS
+            else 0.0
+        )
+        best_name[row.confirmed] = max(best_name.get(row.confirmed, 0.0), name_score)
+        best_phone[row.confirmed] = max(best_phone.get(row.confirmed, 0.0), phone_score)
+    out = []
+    for confirmed, name_score in best_name.items():
+        phone_score = best_phone[confirmed]
+        if name_score < SMART_MATCH_THRESHOLD and phone_score < PHONE_BOOST_MIN:
+            continue
+        combined = name_score + PHONE_WEIGHT * (phone_score if phone_score >= PHONE_BOOST_MIN else 0.0)
+        out.append((confirmed, name_score, phone_score, combined, max(name_score, phone_score) >= QUICK_APPLY_THRESHOLD))
+    out.sort(key=lambda x: (-x[3], -max(x[1], x[2]), x[0]))
+    return out
+
+
+def test_index_matches_linear_scan_and_tracks_updates():
+    rng = random.Random(7)
+    merchants = ["".join(rng.choices(string.ascii_lowercase + " ", k=rng.randint(3, 12))) for _ in range(80)]
+    phones = ["".join(rng.choices("0123456789", k=rng.choice([5, 8, 10]))) for _ in range(30)] + ["", ""]
+    history = [
+        SmartMatchHistoryRow(
+            extracted="".join(c if rng.random() > 0.15 else rng.choice(string.ascii_lowercase) for c in m),
+            extracted_phone=rng.choice(phones),
+            confirmed=m.title(),
+        )
+        for m in rng.choices(merchants, k=400)
+    ]
+    index = SmartMatchIndex()
+    for step in range(3):
+        index.sync(history)
+        for _ in range(25):
+            query_name, query_phone = rng.choice(merchants + [""]), rng.choice(phones)
+            got = [
+                (c.confirmed_name, c.name_score, c.phone_score, c.combined_score, c.quick_apply)
+                for c in index.candidates(query_name, query_phone)
+            ]
+            assert got == _linear_scan(query_name, query_phone, history)
+        history = history[50:] + [row.model_copy(update={"confirmed": "Renamed"}) for row in history[:20]]
+
+
+def test_legacy_cache_is_compacted_on_migration_and_updated_in_place(tmp_path):
+    legacy = {
+        "1-1": {"extracted": "ACME", "confirmed": "Acme", "extracted_phone": "555"},
+        "1-2": {"extracted": "ACME", "confirmed": "Acme", "extracted_phone": "555"},
+        "1-3": {"extracted": "Acme Co", "confirmed": "Acme Corp", "extracted_phone": ""},
+        "1-4": {"extracted": "junk", "confirmed": "", "extracted_phone": ""},
+    }
+    (tmp_path / "smart_match_cache.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    assert load_smart_match_entries(tmp_path) == []
+    assert (tmp_path / "smart_match_cache.json").exists()
+    assert migrate_legacy_smart_match_cache(tmp_path) == 3
+    assert (tmp_path / "smart_match_cache.json.migrated").exists()
+    entries = load_smart_match_entries(tmp_path)
+    assert {(e.extracted, e.confirmed, e.count) for e in entries} == {("ACME", "Acme", 2), ("Acme Co", "Acme Corp", 1)}
+
+    acme = SmartMatchHistoryRow(extracted="ACME", extracted_phone="555", confirmed="Acme")
+    update_smart_match_entries(tmp_path, [acme.model_copy(update={"confirmed": "Acme Inc"})], removed=[acme])
+    rename_smart_match_confirmed(tmp_path, {"Acme Corp": "Acme Inc", "Acme": "Acme Inc"})
+    entries = load_smart_match_entries(tmp_path)
+    assert {(e.extracted, e.confirmed, e.count) for e in entries} == {("ACME", "Acme Inc", 2), ("Acme Co", "Acme Inc", 1)}
+
+    history = build_smart_match_history({}, {}, entries)
+    assert sorted(r.extracted for r in history) == ["ACME", "Acme Co"]
+
+
+def test_quick_apply_flags_follow_history_changes():
+    rows = [
+        SmartMatchHistoryRow(extracted="Lawson Shibuya", extracted_phone="03-1234-5678", confirmed="Lawson"),
+        SmartMatchHistoryRow(extracted="Family Mart", extracted_phone="", confirmed="FamilyMart"),
+    ]
+    queries = [("Lawson Shibuya", ""), ("Unknown", "0312345679"), ("Seven Eleven", ""), ("", "")]
+    index = SmartMatchIndex().sync(rows)
+    assert index.quick_apply_flags(queries).tolist() == [True, True, False, False]
+
+    seven = SmartMatchHistoryRow(extracted="Seven-Eleven", extracted_phone="", confirmed="7-Eleven")
+    index.sync(rows + [seven])
+    assert index.quick_apply_flags(queries).tolist() == [True, True, True, False]
+
+    index.sync(rows[1:] + [seven])
+    assert index.quick_apply_flags(queries).tolist() == [False, False, True, False]
+
+
+def test_quick_apply_flags_agree_with_candidates():
+    rng = random.Random(3)
+    history = [
+        SmartMatchHistoryRow(extracted="abcdefghijklmnopqrst", extracted_phone="", confirmed="Alpha"),
+        SmartMatchHistoryRow(extracted="zzzz", extracted_phone="12345678", confirmed="Dial"),
+    ] + [
+        SmartMatchHistoryRow(
+            extracted="".join(rng.choices("abcde ", k=rng.randint(3, 9))),
+            extracted_phone="".join(rng.choices("0123", k=rng.choice([5, 8]))),
+            confirmed=rng.choice(["One", "Two", "Three", "Four"]),
+        )
+        for _ in range(60)
+    ]
+    queries = [("abcdefghijklmnopqxyz", ""), ("zzzq", "12345670"), ("qqqq", "12345670")] + [
+        ("".join(rng.choices("abcde ", k=rng.randint(0, 9))), "".join(rng.choices("0123", k=rng.choice([0, 5, 8]))))
+        for _ in range(200)
+    ]
+    index = SmartMatchIndex().sync(history)
+    expected = [any(c.quick_apply for c in index.candidates(*q)) for q in queries]
+    assert expected[:3] == [True, True, False]
+    assert index.quick_apply_flags(queries).tolist() == expected
+
+
+def test_phone_index_matches_linear_scan_for_long_numbers():
+    rng = random.Random(11)
+    phones = ["".join(rng.choices("0123456789", k=rng.choice([7, 10, 12, 19, 20, 27]))) for _ in range(60)]
+    history = [
+        SmartMatchHistoryRow(extracted=f"shop {i}", extracted_phone=phone, confirmed=f"Shop {i % 25}")
+        for i, phone in enumerate(phones)
+    ]
+    index = SmartMatchIndex().apply(history)
+    for phone in phones:
+        for _ in range(3):
+            digits = list(phone)
+            for _ in range(rng.randint(0, 3)):
+                op, pos = rng.choice("dis"), rng.randrange(len(digits))
+                if op == "d" and len(digits) > 7:
+                    del digits[pos]
+                elif op == "i":
+                    digits.insert(pos, rng.choice("0123456789"))
+                else:
+                    digits[pos] = rng.choice("0123456789")
+            query = "".join(digits)
+            got = [
+                (c.confirmed_name, c.name_score, c.phone_score, c.combined_score, c.quick_apply)
+                for c in index.candidates("", query)
+            ]
+            assert got == _linear_scan("", query, history)
+
+
+def test_writers_update_the_cached_index_in_place(tmp_path):
+    from working_set import clear_working_set
+
+    clear_working_set()
+    lawson = SmartMatchHistoryRow(extracted="LAWSON", extracted_phone="03-1234-5678", confirmed="Lawson")
+    update_smart_match_entries(tmp_path, [lawson])
+    index = smart_match_index(tmp_path, [])
+    assert [c.confirmed_name for c in index.candidates("", "0312345679")] == ["Lawson"]
+
+    mart = SmartMatchHistoryRow(extracted="FAMILY MART", extracted_phone="", confirmed="Family Mart")
+    update_smart_match_entries(tmp_path, [mart], removed=[lawson])
+    assert smart_match_index(tmp_path, []) is index
+    assert index.candidates("", "0312345679") == []
+    assert index.confirmed_names() == {"Family Mart"}
+
+    rename_smart_match_confirmed(tmp_path, {"Family Mart": "FamilyMart"})
+    pending = [SmartMatchHistoryRow(extracted="Seven", extracted_phone="", confirmed="7-Eleven")]
+    assert smart_match_index(tmp_path, pending) is index
+    assert index.confirmed_names() == {"FamilyMart", "7-Eleven"}
+    assert smart_match_index(tmp_path, []).confirmed_names() == {"FamilyMart"}
+
+    clear_working_set()
+    rebuilt = smart_match_index(tmp_path, [])
+    assert rebuilt is not index
+    assert rebuilt.candidates("family mart", "") == index.candidates("family mart", "")
@@ -0,0 +1,63 @@
+import threading
+import time
+from pathlib import Path
+
+import ocr_runner
+import extraction_runner
+from models import CorruptedResult, DocumentIndex, OcrResult
+from stream_runner import iter_overlapped, streamable_doc_keys
+
+
+class _SlowProvider:
+    MAX_CONCURRENCY = None
+
+    def run(self, path: Path, structured: bool = False) -> str:
+        time.sleep(0.05)
+        return f"text {path.name}"
+
+
+def test_iter_overlapped_parses_documents_while_ocr_runs(monkeypatch):
+    monkeypatch.setitem(ocr_runner.OCR_PROVIDERS, "slow", _SlowProvider())
+    seen: list[str] = []
+    lock = threading.Lock()
+
+    def fake_extract(ocr_text: str, has_boxes: bool = False, custom_instruction: str = ""):
+        with lock:
+            seen.append(ocr_text)
+        return CorruptedResult(document_type="corrupted")
+
+    monkeypatch.setitem(extraction_runner.EXTRACTORS, "fake", fake_extract)
+    index = DocumentIndex.from_raw_groups([["1:1", "1:2"]], {"1:0", "1:1", "1:2", "1:3", "1:4"})
+    items = [(f"1:{i}", Path(f"{i}.png")) for i in (1, 2, 3, 4)]
+    ready = {"1:0": OcrResult(markdown="done already")}
+    events = list(iter_overlapped("slow", items, False, 1, index, ready, "fake", "", skip={"1:4"}))
+
+    order = [(stage, key) for stage, key, _ in events]
+    parsed = [key for stage, key, _ in events if stage == "parse"]
+    assert sorted(parsed) == ["1:0", "1:1-2", "1:3"]
+    assert order.index(("parse", "1:1-2")) < order.index(("ocr", "1:4"))
+    multi = next(text for text in seen if "text 1.png" in text)
+    assert "--- Page 2 ---\ntext 2.png" in multi
+
+
+def test_streamable_doc_keys_requires_all_pages():
+    index = DocumentIndex.from_raw_groups([["1:1", "1:2"]], {"1:1", "1:2", "1:3"})
+    assert streamable_doc_keys(index, {"1:1"}, {"1:3"}, set()) == [index.key_to_doc_key("1:3")]
+
+
+def test_parse_results_are_returned_while_later_pages_are_still_in_ocr(monkeypatch):
+    class _SlowerProvider(_SlowProvider):
+        def run(self, path: Path, structured: bool = False) -> str:
+            time.sleep(0.2)
+            return f"text {path.name}"
+
+    monkeypatch.setitem(ocr_runner.OCR_PROVIDERS, "slower", _SlowerProvider())
+    monkeypatch.setitem(
+        extraction_runner.EXTRACTORS, "fake", lambda *_, **__: CorruptedResult(document_type="corrupted")
+    )
+    keys = [f"1:{i}" for i in range(1, 5)]
+    index = DocumentIndex.from_raw_groups([], set(keys))
+    items = [(k, Path(f"{k[2:]}.png")) for k in keys]
+    events = iter_overlapped("slower", items, False, 1, index, {}, "fake", "", skip=set(), parse_concurrency=4)
+    order = [(stage, key) for stage, key, _ in events]
+    assert order.index(("parse", "1:1")) < order.index(("ocr", "1:2"))
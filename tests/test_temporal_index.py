@@ -0,0 +1,71 @@
+import random
+from datetime import date, datetime
+
+from dedupe_candidates import (
+    MAX_GAP,
+    WEEK_WINDOW,
+    find_adjacent_documents,
+    get_receipts_in_week,
+    parse_verdict_datetime,
+    receipt_index,
+)
+from models import ReviewDecision
+from temporal_index import TemporalIndex
+
+
+def _decisions(rng, n):
+    out = {}
+    for i in range(n):
+        out[f"1-{i}"] = ReviewDecision(
+            verdict=rng.choice(["accepted", "accepted", "tossed"]),
+            document_type=rng.choice(["receipt", "receipt", "invoice"]),
+            name="x",
+            date=f"2024-{rng.randint(1, 3):02d}-{rng.randint(1, 28):02d}",
+            time=rng.choice([f"{rng.randint(0, 23):02d}:{rng.choice([0, 1, 2, 3, 5]):02d}", ""]),
+            cost=rng.choice([1.0, 2.0]),
+        )
+    return out
+
+
+def _linear(decisions, target, lo, hi):
+    rows = []
+    for fn, d in decisions.items():
+        if d.verdict == "tossed" or d.document_type != "receipt":
+            continue
+        dt = parse_verdict_datetime(d.date, d.time)
+        if dt is not None and lo <= dt <= hi:
+            rows.append((fn, dt))
+    return rows
+
+
+def test_receipt_queries_match_linear_scan():
+    rng = random.Random(3)
+    decisions = _decisions(rng, 600)
+    index = receipt_index(decisions)
+    for _ in range(60):
+        date_str = f"2024-{rng.randint(1, 3):02d}-{rng.randint(1, 28):02d}"
+        time_str = f"{rng.randint(0, 23):02d}:{rng.choice([0, 2, 4]):02d}"
+        target = parse_verdict_datetime(date_str, time_str)
+
+        week = _linear(decisions, target, target - WEEK_WINDOW, target + WEEK_WINDOW)
+        week.append(("marked.jpg", target))
+        week.sort(key=lambda x: x[1])
+        got = get_receipts_in_week(
+            date_str, time_str, decisions,
+            include_fn="marked.jpg", include_date=date_str, include_time=time_str, index=index,
+        )
+        assert got == [fn for fn, _ in week]
+
+        near = [(fn, dt) for fn, dt in _linear(decisions, target, target - MAX_GAP, target + MAX_GAP) if decisions[fn].cost == 1.0]
+        near.sort(key=lambda x: abs(x[1] - target))
+        assert find_adjacent_documents(date_str, time_str, 1.0, decisions, index=index) == [fn for fn, _ in near]
+
+
+def test_window_and_on_this_day():
+    moments = [datetime(2023, 3, 5, 9), date(2024, 3, 5), datetime(2024, 3, 6), datetime(2022, 3, 5, 23, 59)]
+    index = TemporalIndex(["a", "b", "c", "d"], moments)
+    assert index.on_day(3, 5) == ["d", "a", "b"]
+    assert index.on_day(2, 29) == []
+    assert index.window(date(2024, 3, 5), date(2024, 3, 6), closed=False) == ["b"]
+    assert index.first() == datetime(2022, 3, 5, 23, 59)
+    assert len(TemporalIndex([], [])) == 0
@@ -0,0 +1,32 @@
+import os
+
+from PIL import Image
+
+from thumbnails import thumbnail, thumbnails
+
+
+def test_thumbnail_is_cached_and_invalidated_by_source_mtime(tmp_path):
+    source = tmp_path / "scan.png"
+    Image.new("RGB", (3000, 1500), "white").save(source)
+
+    thumb = thumbnail(tmp_path, source, 600)
+    assert thumb.suffix == ".webp"
+    with Image.open(thumb) as img:
+        assert img.size == (600, 300)
+    built = thumb.stat().st_mtime_ns
+    assert thumbnail(tmp_path, source, 600).stat().st_mtime_ns == built
+
+    Image.new("RGB", (1000, 2000), "black").save(source)
+    os.utime(source, ns=(built + 1_000_000_000, built + 1_000_000_000))
+    with Image.open(thumbnail(tmp_path, source, 600)) as img:
+        assert img.size == (300, 600)
+
+
+def test_unreadable_sources_fall_back_to_original(tmp_path):
+    good = tmp_path / "a.png"
+    Image.new("RGB", (10, 10)).save(good)
+    bad = tmp_path / "b.png"
+    bad.write_bytes(b"not an image")
+    result = thumbnails(tmp_path, [good, bad, good])
+    assert result[bad] == bad
+    assert result[good] != good
@@ -0,0 +1,44 @@
+import json
+import time
+
+from data import append_ocr_result, load_decisions, load_ocr_results, save_decisions
+from models import OcrResult, ReviewDecision
+
+
+def _decision(name):
+    return ReviewDecision(verdict="accepted", document_type="receipt", name=name, date="", time="")
+
+
+def test_loads_are_shared_copies_and_revalidate_on_disk_change(tmp_path):
+    save_decisions(tmp_path, {"1-1": _decision("A")})
+    first = load_decisions(tmp_path)
+    first["1-2"] = _decision("scratch")
+    second = load_decisions(tmp_path)
+    assert set(second) == {"1-1"}
+    assert second["1-1"] is first["1-1"]
+
+    time.sleep(0.01)
+    (tmp_path / "decisions.json").write_text(
+        json.dumps({"1-1": _decision("B").model_dump(), "1-3": _decision("C").model_dump()}), encoding="utf-8"
+    )
+    assert {k: d.name for k, d in load_decisions(tmp_path).items()} == {"1-1": "B", "1-3": "C"}
+
+
+def test_appends_update_the_cached_ocr_map(tmp_path):
+    append_ocr_result(tmp_path, "1-1", OcrResult(markdown="a"))
+    assert set(load_ocr_results(tmp_path)) == {"1-1"}
+    append_ocr_result(tmp_path, "1-2", OcrResult(markdown="b"))
+    results = load_ocr_results(tmp_path)
+    assert {k: r.markdown for k, r in results.items()} == {"1-1": "a", "1-2": "b"}
+
+
+def test_scan_index_round_trips_and_returns_independent_copies(tmp_path):
+    from models import ScanBatch, ScanIndex, load_scan_index, save_scan_index
+
+    batch = ScanBatch(batch_id=1, start_datetime="2025-01-01", end_datetime="2025-01-02", files={1: "a.jpg"})
+    save_scan_index(tmp_path, ScanIndex(batches=[batch]))
+    loaded = load_scan_index(tmp_path)
+    assert loaded.batches == [batch]
+    loaded.batches[0].files[2] = "b.jpg"
+    loaded.batches[0].archived = True
+    assert load_scan_index(tmp_path).batches == [batch]
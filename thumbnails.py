@@ -0,0 +1,60 @@
+import hashlib
+import os
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from extraction_cache import CACHE_DIRNAME
+
+THUMBS_DIRNAME = "thumbs"
+GRID_SIZE = 640
+DISPLAY_SIZE = 2000
+THUMB_QUALITY = 80
+THUMB_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def thumbnail_path(cache_root: Path, source: Path, size: int) -> Path:
+    digest = hashlib.sha1(str(source.resolve()).encode("utf-8")).hexdigest()[:20]
+    return cache_root / CACHE_DIRNAME / THUMBS_DIRNAME / f"{digest}_{size}.webp"
+
+
+def _render(source: Path, target: Path, size: int) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with Image.open(source) as img:
+        img.draft("RGB", (size, size))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((size, size))
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        img.save(tmp, "WEBP", quality=THUMB_QUALITY)
+    os.replace(tmp, target)
+
+
+def thumbnail(cache_root: Path, source: Path, size: int = GRID_SIZE) -> Path:
+    target = thumbnail_path(cache_root, source, size)
+    try:
+        fresh = target.stat().st_mtime_ns >= source.stat().st_mtime_ns
+    except FileNotFoundError:
+        fresh = False
+    if not fresh:
+        _render(source, target, size)
+    return target
+
+
+def _thumbnail_or_source(cache_root: Path, source: Path, size: int) -> Path:
+    try:
+        return thumbnail(cache_root, source, size)
+    except Exception:
+        return source
+
+
+def thumbnails(cache_root: Path, sources: Iterable[Path], size: int = GRID_SIZE) -> dict[Path, Path]:
+    unique = list(dict.fromkeys(sources))
+    if len(unique) <= 1:
+        return {s: _thumbnail_or_source(cache_root, s, size) for s in unique}
+    with ThreadPoolExecutor(max_workers=min(THUMB_WORKERS, len(unique)), thread_name_prefix="thumb") as pool:
+        return dict(zip(unique, pool.map(lambda s: _thumbnail_or_source(cache_root, s, size), unique)))
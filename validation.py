@@ -1,9 +1,12 @@
+import threading
 from datetime import datetime
 from typing import Protocol
 
+import numpy as np
+import pandas as pd
 from pydantic import BaseModel
 
-from models import DocumentExtraction
+from models import DocumentExtraction, ReceiptResult
 
 
 # --- Hints (non-blocking cues for the user) ---
@@ -18,6 +21,86 @@ class HintRule(Protocol):
     def __call__(self, extraction: DocumentExtraction) -> list[Hint]: ...
 
 
+class BatchHintRule(Protocol):
+    def __call__(self, table: pd.DataFrame, now: datetime) -> pd.Series: ...
+
+
+HINT_ERROR_COLOR = "#dc3545"
+HINT_WARNING_COLOR = "#b8860b"
+HINT_SEVERITY_BY_COLOR = {HINT_ERROR_COLOR: 2, HINT_WARNING_COLOR: 1}
+SEVERITY_LABELS = {0: "Clean", 1: "Warning", 2: "Error"}
+
+_BATCH_RULES: dict[HintRule, BatchHintRule] = {}
+
+
+def batch_rule(rule: HintRule):
+    def register(batch: BatchHintRule) -> BatchHintRule:
+        _BATCH_RULES[rule] = batch
+        return batch
+
+    return register
+
+
+def hint_severity(hints: list[Hint]) -> int:
+    return max((HINT_SEVERITY_BY_COLOR.get(h.color, 0) for h in hints), default=0)
+
+
+def extraction_table(extractions: dict[str, DocumentExtraction]) -> pd.DataFrame:
+    rows = []
+    for ext in extractions.values():
+        receipt = isinstance(ext, ReceiptResult)
+        totals = [i.total_price for i in ext.items if i.total_price is not None] if receipt else []
+        rows.append((
+            ext.document_type,
+            getattr(ext, "date", ""),
+            getattr(ext, "time", ""),
+            ext.cost if receipt else np.nan,
+            ext.currency if receipt else "",
+            sum(totals) if totals else np.nan,
+        ))
+    return pd.DataFrame(
+        rows,
+        index=pd.Index(list(extractions), dtype=object),
+        columns=["document_type", "date", "time", "cost", "currency", "items_sum"],
+    )
+
+
+_hint_cache: tuple[tuple, dict[str, DocumentExtraction], pd.DataFrame] | None = None
+_hint_cache_lock = threading.Lock()
+
+
+def _evaluate(extractions: dict[str, DocumentExtraction], rules: list[HintRule], now: datetime) -> pd.DataFrame:
+    table = extraction_table(extractions)
+    out = pd.DataFrame(index=table.index)
+    for rule in rules:
+        batch = _BATCH_RULES.get(rule)
+        if batch is not None:
+            out[rule.__name__] = batch(table, now).astype(np.int8)
+        else:
+            out[rule.__name__] = np.array([hint_severity(rule(ext)) for ext in extractions.values()], dtype=np.int8)
+    out["severity"] = out.max(axis=1).astype(np.int8) if rules else np.zeros(len(out), dtype=np.int8)
+    return out
+
+
+def evaluate_hints(extractions: dict[str, DocumentExtraction], rules: list[HintRule]) -> pd.DataFrame:
+    global _hint_cache
+    now = datetime.now()
+    signature = (tuple(rules), now.date())
+    with _hint_cache_lock:
+        cached = _hint_cache
+    previous, previous_result = (cached[1], cached[2]) if cached is not None and cached[0] == signature else ({}, None)
+    fresh = {k: v for k, v in extractions.items() if previous.get(k) is not v}
+    if previous_result is None or len(fresh) == len(extractions):
+        result = _evaluate(extractions, rules, now)
+    else:
+        reused = previous_result.loc[[k for k in extractions if k not in fresh]]
+        result = pd.concat([reused, _evaluate(fresh, rules, now)]) if fresh else reused
+        result = result.loc[list(extractions)]
+    with _hint_cache_lock:
+        _hint_cache = (signature, dict(extractions), result)
+    return result
+
+
 # --- Submission blockers (must pass before save) ---
 
 
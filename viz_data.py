@@ -1,17 +1,20 @@
 from pathlib import Path
 from urllib.parse import quote
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+from archive_catalog import catalog_version
 from brand_registry import (
     brand_registry_mtime,
     enrich_receipt_brand_columns,
-    load_brand_directory,
+    load_brand_matcher,
 )
 from data import load_reorganized_state
 from models import Sidecar
 from settings import get_config
+from temporal_index import TemporalIndex
 
 
 def get_output_path() -> Path | None:
@@ -44,12 +47,12 @@ def sync_query_param(param_name: str, widget_key: str, valid_values: list[str]):
 
 def load_viz_records(output_path_str: str) -> pd.DataFrame:
     mt = brand_registry_mtime()
-    return _load_viz_records_cached(output_path_str, mt)
+    return _load_viz_records_cached(output_path_str, mt, catalog_version(Path(output_path_str)))
 
 
 @st.cache_data(ttl=120)
-def _load_viz_records_cached(output_path_str: str, brand_registry_mtime: float) -> pd.DataFrame:
-    _ = brand_registry_mtime
+def _load_viz_records_cached(output_path_str: str, brand_registry_mtime: float, catalog_version: int) -> pd.DataFrame:
+    _ = brand_registry_mtime, catalog_version
     output_path = Path(output_path_str)
     _tossed, accepted_metadata = load_reorganized_state(output_path)
 
@@ -92,13 +95,27 @@ def _load_viz_records_cached(output_path_str: str, brand_registry_mtime: float)
         df["parsed_date"] = pd.to_datetime(df["date"], format="%Y-%m-%d", errors="coerce")
         df["year"] = df["parsed_date"].dt.year
         df["month"] = df["parsed_date"].dt.month
-    directory = load_brand_directory()
-    df = enrich_receipt_brand_columns(df, directory)
+    df = enrich_receipt_brand_columns(df, load_brand_matcher())
     return df
 
 
+def load_viz_timeline(output_path_str: str) -> TemporalIndex:
+    return _load_viz_timeline_cached(output_path_str, catalog_version(Path(output_path_str)))
+
+
+@st.cache_resource(max_entries=4)
+def _load_viz_timeline_cached(output_path_str: str, catalog_version: int) -> TemporalIndex:
+    _ = catalog_version
+    df = load_viz_records(output_path_str)
+    if df.empty:
+        return TemporalIndex([], [])
+    dated = df["parsed_date"].notna().to_numpy()
+    return TemporalIndex(np.flatnonzero(dated).tolist(), df["parsed_date"].to_numpy()[dated])
+
+
 def clear_viz_data_cache() -> None:
     _load_viz_records_cached.clear()
+    _load_viz_timeline_cached.clear()
     _load_viz_items_cached.clear()
 
 
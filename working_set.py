@@ -0,0 +1,69 @@
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+Signature = tuple | None
+
+_ENTRIES: dict[tuple[str, Path], tuple[Signature, Any]] = {}
+_LOCK = threading.Lock()
+
+
+def file_signature(path: Path) -> Signature:
+    try:
+        if path.is_dir():
+            with os.scandir(path) as it:
+                return tuple(sorted((e.name, e.stat().st_size, e.stat().st_mtime_ns) for e in it if e.is_file()))
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def _slot(kind: str, path: Path) -> tuple[str, Path]:
+    return kind, path.resolve()
+
+
+def _identity(value: T) -> T:
+    return value
+
+
+def cached(kind: str, path: Path, loader: Callable[[], T], copy: Callable[[T], T] = _identity) -> T:
+    slot = _slot(kind, path)
+    signature = file_signature(path)
+    with _LOCK:
+        hit = _ENTRIES.get(slot)
+        if hit is not None and hit[0] == signature:
+            return copy(hit[1])
+    value = loader()
+    with _LOCK:
+        _ENTRIES[slot] = (signature, value)
+        return copy(value)
+
+
+def stored(kind: str, path: Path, value: Any) -> None:
+    with _LOCK:
+        _ENTRIES[_slot(kind, path)] = (file_signature(path), value)
+
+
+def updated(kind: str, path: Path, before: Signature, update: Callable[[Any], Any]) -> None:
+    slot = _slot(kind, path)
+    with _LOCK:
+        hit = _ENTRIES.get(slot)
+        if hit is None or hit[0] != before:
+            _ENTRIES.pop(slot, None)
+            return
+        _ENTRIES[slot] = (file_signature(path), update(hit[1]))
+
+
+def forget(kind: str, path: Path) -> None:
+    with _LOCK:
+        _ENTRIES.pop(_slot(kind, path), None)
+
+
+def clear_working_set() -> None:
+    with _LOCK:
+        _ENTRIES.clear()